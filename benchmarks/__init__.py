@@ -0,0 +1,10 @@
+"""
+Benchmarks for the job tracking API.
+
+- ``bench_api`` seeds a store at a chosen scale and drives every route, in process
+  and over a local uvicorn, writing throughput, latency percentiles, memory per job
+  and startup time as JSON
+- ``compare`` diffs two ``bench_api`` result files
+- ``bench_projection`` compares full and compact job serialization
+- ``bench_memory`` measures memory per job and read cost of the in-memory store
+"""
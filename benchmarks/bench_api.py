@@ -0,0 +1,250 @@
+"""
+Load and latency benchmark for the API.
+
+Seeds a store with synthetic pipelines, jobs, trigger DAGs and wave forecasts, then
+drives every route with read, mixed and write workloads. It runs the app in process
+through an ASGI transport, over HTTP against a local uvicorn, or both. Throughput,
+p50/p95/p99 latency (overall and per route), memory per job and startup time are
+written as JSON, tagged with the git commit, so runs can be compared with
+``python -m benchmarks.compare``.
+
+Run from the project root:
+
+    python -m benchmarks.bench_api --jobs 100k --output results.json
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.bench_api --jobs 1M --mode uvicorn
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.measure import Recorder, rss_bytes
+from benchmarks.seed import Scale, parse_count, seed
+from benchmarks.workloads import WORKLOADS, Session, run
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ("inprocess", "uvicorn")
+
+# How long to wait for the uvicorn server to seed and start answering
+READY_TIMEOUT = 1800
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def memory_summary(before: int, after: int, jobs: Optional[int]) -> Dict[str, Any]:
+    """RSS around seeding; per-job cost is only known when this process seeded the jobs"""
+    return {
+        "rss_before_seed": before,
+        "rss_after_seed": after,
+        "bytes_per_job": round((after - before) / jobs) if jobs else None,
+    }
+
+
+async def drive(client: httpx.AsyncClient, scale: Scale, workload: str, args) -> Dict[str, Any]:
+    recorder = Recorder()
+    session = Session(scale, recorder, args.seed)
+    await run(session, client, workload, args.warmup, args.concurrency)
+    recorder.reset()
+
+    started = time.perf_counter()
+    await run(session, client, workload, args.operations, args.concurrency)
+    return recorder.summary(time.perf_counter() - started)
+
+
+def run_inprocess(scale: Scale, args) -> Dict[str, Any]:
+    # config.py reads the environment on import
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    started = time.perf_counter()
+    from server import api
+    imported = time.perf_counter()
+
+    gc.collect()
+    rss_before = rss_bytes()
+    seeded = not scale.is_seeded(api.jobs_db)
+    if seeded:
+        seed(api.jobs_db, api.pipelines_db, scale)
+    seed_seconds = time.perf_counter() - imported if seeded else 0.0
+    gc.collect()
+    rss_after = rss_bytes()
+
+    async def drive_all():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return {workload: await drive(client, scale, workload, args) for workload in args.workloads}
+
+    results = asyncio.run(drive_all())
+    api.jobs_db.flush()
+    return {
+        "mode": "inprocess",
+        "jobs": len(api.jobs_db),
+        "startup": {
+            "startup_seconds": round(imported - started, 3),
+            "seed_seconds": round(seed_seconds, 3),
+            "seeded": seeded,
+        },
+        "memory": memory_summary(rss_before, rss_after, scale.jobs if seeded else None),
+        "workloads": results,
+    }
+
+
+def wait_ready(process: subprocess.Popen, url: str):
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        try:
+            if httpx.get(url).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    raise RuntimeError(f"uvicorn did not answer {url} within {READY_TIMEOUT} seconds")
+
+
+def run_uvicorn(scale: Scale, args) -> Dict[str, Any]:
+    env = dict(os.environ)
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    command = [
+        sys.executable, "-m", "benchmarks.serve",
+        "--jobs", str(scale.jobs),
+        "--pipelines", str(scale.pipelines),
+        "--forecast-points", str(scale.forecast_points),
+        "--seed", str(scale.seed),
+        "--port", str(args.port),
+    ]
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    spawned = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+    try:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"uvicorn exited with status {process.wait()} before seeding finished")
+        report = json.loads(line)
+        wait_ready(process, f"{base_url}/api/queue")
+        ready_seconds = time.perf_counter() - spawned
+
+        async def drive_all():
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                return {workload: await drive(client, scale, workload, args) for workload in args.workloads}
+
+        results = asyncio.run(drive_all())
+        rss_after_run = rss_bytes(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    return {
+        "mode": "uvicorn",
+        "jobs": report["jobs"],
+        "startup": {
+            # Process start to first response, not counting synthetic seeding
+            "startup_seconds": round(ready_seconds - report["seed_seconds"], 3),
+            "import_seconds": report["import_seconds"],
+            "seed_seconds": report["seed_seconds"],
+            "seeded": report["seeded"],
+        },
+        "memory": {
+            **memory_summary(report["rss_before_seed"], report["rss_after_seed"], scale.jobs if report["seeded"] else None),
+            "rss_after_run": rss_after_run,
+        },
+        "workloads": results,
+    }
+
+
+def print_summary(report: Dict[str, Any]):
+    out = sys.stderr
+    print(f"{report['config']['jobs']:,} jobs, commit {(report['commit'] or 'unknown')[:12]}", file=out)
+    for result in report["results"]:
+        startup, memory = result["startup"], result["memory"]
+        per_job = f"{memory['bytes_per_job']:,} B/job" if memory["bytes_per_job"] is not None else "n/a"
+        print(f"\n[{result['mode']}] startup {startup['startup_seconds']:.2f}s, "
+              f"seed {startup['seed_seconds']:.2f}s, memory {per_job}", file=out)
+        print(f"  {'workload':<8} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}", file=out)
+        for workload, summary in result["workloads"].items():
+            latency = summary["latency_ms"]
+            print(f"  {workload:<8} {summary['throughput_rps']:>10,.1f} {latency['p50']:>9.2f} "
+                  f"{latency['p95']:>9.2f} {latency['p99']:>9.2f} {summary['errors']:>7}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=parse_count, default=parse_count("10k"), help="jobs to seed, e.g. 1k, 100k, 1M")
+    parser.add_argument("--pipelines", type=int, default=50, help="pipelines the jobs are spread over")
+    parser.add_argument("--forecast-points", type=int, default=48, help="entries per seeded wave forecast")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for data and workloads")
+    parser.add_argument("--mode", choices=MODES + ("both",), default="both")
+    parser.add_argument("--workload", default="read,mixed,write", help=f"comma-separated: {', '.join(WORKLOADS)}")
+    parser.add_argument("--operations", type=int, default=2000, help="operations per workload")
+    parser.add_argument("--warmup", type=int, default=200, help="unrecorded operations before each workload")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--database-url", help="store to benchmark (defaults to DATABASE_URL, i.e. memory)")
+    parser.add_argument("--port", type=int, default=8765, help="port for the uvicorn server")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    args.workloads = [name.strip() for name in args.workload.split(",") if name.strip()]
+    unknown = [name for name in args.workloads if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workload: {', '.join(unknown)}")
+    if args.jobs < 100:
+        parser.error("--jobs must be at least 100")
+
+    scale = Scale(args.jobs, args.pipelines, args.forecast_points, seed=args.seed)
+    modes = MODES if args.mode == "both" else (args.mode,)
+
+    report = {
+        "benchmark": "api",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        **git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "jobs": scale.jobs,
+            "pipelines": scale.pipelines,
+            "forecast_points": scale.forecast_points,
+            "seed": scale.seed,
+            "operations": args.operations,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "database_url": args.database_url or os.environ.get("DATABASE_URL") or "memory://",
+        },
+        "results": [],
+    }
+    for mode in modes:
+        result = run_uvicorn(scale, args) if mode == "uvicorn" else run_inprocess(scale, args)
+        report["results"].append(result)
+
+    print_summary(report)
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
+
+
+if __name__ == "__main__":
+    main()
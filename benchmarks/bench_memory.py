@@ -0,0 +1,140 @@
+"""
+Memory benchmark for the in-memory job store.
+
+Seeds synthetic pipelines, jobs, trigger DAGs and wave forecasts straight into a
+fresh store, without the API, and reports the RSS each job adds (indexes
+included). It then times the reads whose cost depends on how jobs are held: single
+gets, a page of the newest jobs (each also loaded only as deep as the API's compact
+projection needs), filtered and searched pages and a status change.
+Results are JSON tagged with the git commit, so runs before and after a change can
+be put side by side.
+
+Run from the project root:
+
+    python -m benchmarks.bench_memory --jobs 1M --output memory.json
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+from benchmarks.bench_api import git_revision
+from benchmarks.measure import rss_bytes
+from benchmarks.seed import LOCATIONS, Scale, parse_count, seed
+from server.models import JobStatus
+from server.projection import COMPACT
+from server.store import open_store
+
+
+def time_per_call(fn: Callable[[int], Any], calls: int) -> float:
+    """Mean microseconds per call of ``fn(i)``"""
+    started = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return round((time.perf_counter() - started) / calls * 1e6, 2)
+
+
+def run(scale: Scale, reads: int) -> Dict[str, Any]:
+    jobs_db, pipelines_db = open_store("memory://")
+
+    gc.collect()
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    seed(jobs_db, pipelines_db, scale)
+    seed_seconds = time.perf_counter() - started
+    gc.collect()
+    rss_after = rss_bytes()
+
+    rng = random.Random(scale.seed)
+    ids = [scale.job_id(rng.randrange(scale.jobs)) for _ in range(reads)]
+    pipeline_ids = [scale.pipeline_id(rng.randrange(scale.pipelines)) for _ in range(reads)]
+    locations = [rng.choice(LOCATIONS) for _ in range(reads)]
+
+    compact = COMPACT.trigger_depth
+
+    def flip(i: int):
+        job = jobs_db.get(ids[i])
+        jobs_db.update_status(job, JobStatus.PENDING if job.status != JobStatus.PENDING else JobStatus.COMPLETED)
+
+    return {
+        "jobs": len(jobs_db),
+        "seed_seconds": round(seed_seconds, 3),
+        "memory": {
+            "rss_before_seed": rss_before,
+            "rss_after_seed": rss_after,
+            "bytes_per_job": round((rss_after - rss_before) / scale.jobs),
+        },
+        "reads_us": {
+            "get": time_per_call(lambda i: jobs_db.get(ids[i]), reads),
+            "get_compact": time_per_call(lambda i: jobs_db.get(ids[i], depth=compact), reads),
+            "newest_page_100": time_per_call(lambda i: jobs_db.query(limit=100), max(1, reads // 10)),
+            "newest_page_100_compact": time_per_call(
+                lambda i: jobs_db.query(limit=100, depth=compact), max(1, reads // 10)
+            ),
+            "pipeline_page_100": time_per_call(
+                lambda i: jobs_db.query(pipeline_id=pipeline_ids[i], status=JobStatus.COMPLETED, limit=100),
+                max(1, reads // 10),
+            ),
+            "args_page_100": time_per_call(
+                lambda i: jobs_db.query(args={"location": locations[i], "days": "3"}, limit=100),
+                max(1, reads // 10),
+            ),
+            "error_page_100": time_per_call(
+                lambda i: jobs_db.query(pipeline_id=pipeline_ids[i], error="timed out", limit=100),
+                max(1, reads // 10),
+            ),
+            "update_status": time_per_call(flip, reads),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=parse_count, default=parse_count("100k"), help="jobs to seed, e.g. 100k, 1M")
+    parser.add_argument("--pipelines", type=int, default=50, help="pipelines the jobs are spread over")
+    parser.add_argument("--forecast-points", type=int, default=48, help="entries per seeded wave forecast")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the data and the reads")
+    parser.add_argument("--reads", type=int, default=10000, help="timed calls per read")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+    if args.jobs < 100:
+        parser.error("--jobs must be at least 100")
+
+    scale = Scale(args.jobs, args.pipelines, args.forecast_points, seed=args.seed)
+    result = run(scale, args.reads)
+    report = {
+        "benchmark": "memory",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        **git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "jobs": scale.jobs,
+            "pipelines": scale.pipelines,
+            "forecast_points": scale.forecast_points,
+            "seed": scale.seed,
+            "reads": args.reads,
+        },
+        "result": result,
+    }
+
+    memory, reads = result["memory"], result["reads_us"]
+    print(f"{result['jobs']:,} jobs, commit {(report['commit'] or 'unknown')[:12]}: "
+          f"{memory['bytes_per_job']:,} B/job, seeded in {result['seed_seconds']:.1f}s", file=sys.stderr)
+    print("  " + ", ".join(f"{name} {us:,.1f} us" for name, us in reads.items()), file=sys.stderr)
+
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
+
+
+if __name__ == "__main__":
+    main()
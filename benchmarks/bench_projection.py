@@ -0,0 +1,101 @@
+"""
+Compare full recursive Job serialization with the compact projection.
+
+Builds a chain of jobs where each one triggers the previous, then serializes
+the whole list both ways and reports payload size and time, plus the time to
+assemble the compact list from the response cache.
+
+Run from the project root:
+
+    python -m benchmarks.bench_projection --jobs 200
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from server.cache import ResponseCache
+from server.models import Job, JobStatus, JobType, Pipeline, PipelineStatus
+from server.projection import COMPACT, Projection, project_job
+
+
+def build_chain(length: int):
+    now = datetime.now()
+    pipeline = Pipeline(
+        id="pipeline_bench",
+        name="Benchmark Pipeline",
+        description="Synthetic trigger chain",
+        status=PipelineStatus.ACTIVE,
+        created_at=now,
+        updated_at=now,
+        metadata={"region": "West Coast", "priority": "high", "notes": "x" * 512},
+    )
+
+    jobs = []
+    previous = None
+    for i in range(length):
+        job = Job(
+            id=f"job_{i:010d}",
+            pipeline_id=pipeline.id,
+            type=JobType.WEATHER_FORECAST,
+            status=JobStatus.COMPLETED,
+            created_at=now + timedelta(seconds=i),
+            updated_at=now + timedelta(seconds=i),
+            args={"location": "San Francisco Bay", "days": 5},
+            triggers=[previous] if previous else [],
+            pipeline=pipeline,
+        )
+        jobs.append(job)
+        previous = job
+    return jobs
+
+
+def measure(label: str, serialize, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = serialize()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<24} {len(body):>14,} bytes {elapsed * 1000:>10.2f} ms")
+    return len(body), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=200, help="length of the trigger chain")
+    parser.add_argument("--repeat", type=int, default=3, help="serializations per measurement")
+    args = parser.parse_args()
+
+    jobs = build_chain(args.jobs)
+    expanded = Projection.parse(expand="triggers,pipeline", depth=1)
+
+    full_size, full_time = measure(
+        "full (response_model)",
+        lambda: json.dumps([job.model_dump(mode="json") for job in jobs]).encode(),
+        args.repeat,
+    )
+    compact_size, compact_time = measure(
+        "compact (default)",
+        lambda: json.dumps([project_job(job, COMPACT) for job in jobs]).encode(),
+        args.repeat,
+    )
+    measure(
+        "expand=triggers,pipeline",
+        lambda: json.dumps([project_job(job, expanded) for job in jobs]).encode(),
+        args.repeat,
+    )
+
+    cache = ResponseCache()
+    cache.render_many(jobs, COMPACT)
+    _, cached_time = measure(
+        "compact (cached)",
+        lambda: cache.render_many(jobs, COMPACT),
+        args.repeat,
+    )
+
+    print(f"\ncompact payload is {full_size / compact_size:.1f}x smaller "
+          f"and {full_time / compact_time:.1f}x faster to serialize")
+    print(f"cached fragments are {compact_time / cached_time:.1f}x faster than serializing compact jobs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare two ``bench_api`` result files.
+
+Prints throughput, latency percentiles, memory per job and startup time side by
+side for every mode and workload the two runs share, and marks changes for the
+worse that exceed ``--threshold``.
+
+    python -m benchmarks.compare base.json head.json --threshold 0.1 --fail
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Metric -> True when a larger value is better
+METRICS = {
+    "throughput_rps": True,
+    "p50": False,
+    "p95": False,
+    "p99": False,
+}
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        report = json.load(f)
+    if report.get("benchmark") != "api":
+        raise SystemExit(f"{path} is not a bench_api result file")
+    return report
+
+
+def rows(base: Dict[str, Any], head: Dict[str, Any]) -> Iterator[Tuple[str, str, Optional[float], Optional[float], bool]]:
+    """(label, metric, base value, head value, larger is better) for everything both runs measured"""
+    base_results = {result["mode"]: result for result in base["results"]}
+    for result in head["results"]:
+        previous = base_results.get(result["mode"])
+        if previous is None:
+            continue
+        mode = result["mode"]
+        yield mode, "bytes_per_job", previous["memory"]["bytes_per_job"], result["memory"]["bytes_per_job"], False
+        yield mode, "startup_seconds", previous["startup"]["startup_seconds"], result["startup"]["startup_seconds"], False
+        for workload, summary in result["workloads"].items():
+            before = previous["workloads"].get(workload)
+            if before is None:
+                continue
+            for metric, higher_is_better in METRICS.items():
+                if metric == "throughput_rps":
+                    yield f"{mode}/{workload}", metric, before[metric], summary[metric], higher_is_better
+                else:
+                    yield f"{mode}/{workload}", f"{metric} ms", before["latency_ms"][metric], summary["latency_ms"][metric], higher_is_better
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change that counts as a regression")
+    parser.add_argument("--fail", action="store_true", help="exit with status 1 when anything regressed")
+    args = parser.parse_args()
+
+    base, head = load(args.base), load(args.head)
+    for key, value in head["config"].items():
+        if base["config"].get(key) != value:
+            print(f"warning: {key} differs: {base['config'].get(key)} vs {value}", file=sys.stderr)
+
+    print(f"base {(base['commit'] or 'unknown')[:12]}  head {(head['commit'] or 'unknown')[:12]}")
+    print(f"{'run':<18} {'metric':<16} {'base':>12} {'head':>12} {'change':>9}")
+    regressions = 0
+    for label, metric, before, after, higher_is_better in rows(base, head):
+        if before is None or after is None:
+            continue
+        change = (after - before) / before if before else 0.0
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > args.threshold:
+            flag = "  regressed"
+            regressions += 1
+        print(f"{label:<18} {metric:<16} {before:>12,.2f} {after:>12,.2f} {change:>+8.1%}{flag}")
+
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
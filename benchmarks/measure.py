@@ -0,0 +1,87 @@
+"""
+Timing and memory helpers shared by the benchmarks.
+"""
+import os
+import resource
+import sys
+from collections import defaultdict
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional
+
+PERCENTILES = (50, 95, 99)
+
+
+def rss_bytes(pid: Optional[int] = None) -> int:
+    """Resident set size of ``pid`` (this process by default).
+
+    Read from /proc where it exists. Elsewhere only this process can be measured,
+    and only by its peak RSS.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        if pid is not None and pid != os.getpid():
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def latency_summary(samples: Iterable[float]) -> Dict[str, float]:
+    """Latency percentiles in milliseconds"""
+    ordered = sorted(samples)
+    summary = {f"p{p}": percentile(ordered, p) * 1000 for p in PERCENTILES}
+    summary["mean"] = sum(ordered) / len(ordered) * 1000 if ordered else 0.0
+    summary["max"] = ordered[-1] * 1000 if ordered else 0.0
+    return {name: round(value, 3) for name, value in summary.items()}
+
+
+class Recorder:
+    """Latency samples and unexpected responses, per route"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client, route: str, method: str, url: str, expect=(200,), **kwargs):
+        """Send one request and record it under ``route``.
+
+        The response body is read in full (including streamed exports) before the
+        clock stops.
+        """
+        start = perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[route].append(perf_counter() - start)
+        if response.status_code not in expect:
+            self.errors[route] += 1
+        return response
+
+    def reset(self):
+        self.samples.clear()
+        self.errors.clear()
+
+    def summary(self, seconds: float) -> Dict[str, Any]:
+        everything = [sample for samples in self.samples.values() for sample in samples]
+        return {
+            "requests": len(everything),
+            "errors": sum(self.errors.values()),
+            "duration_seconds": round(seconds, 3),
+            "throughput_rps": round(len(everything) / seconds, 1) if seconds else 0.0,
+            "latency_ms": latency_summary(everything),
+            "routes": {
+                route: {
+                    "requests": len(samples),
+                    "errors": self.errors.get(route, 0),
+                    "latency_ms": latency_summary(samples),
+                }
+                for route, samples in sorted(self.samples.items())
+            },
+        }
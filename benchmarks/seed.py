@@ -0,0 +1,160 @@
+"""
+Deterministic synthetic data for the API benchmarks.
+
+Job ``i`` of a scale always has the same id, pipeline, type and status. A workload
+can therefore pick valid ids without seeing the store, which matters when the store
+lives in a uvicorn process. Args, trigger edges and forecast values come from a
+seeded RNG, so the same scale and seed always produce the same data.
+"""
+import math
+import random
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List
+
+from server.forecast import WaveSeries
+from server.models import Job, JobStatus, JobType, Pipeline, PipelineStatus, WaveForecastData
+from server.store import JobRepository, PipelineRepository
+
+JOB_TYPES = list(JobType)
+
+# Status of seeded jobs, cycled in this proportion
+STATUS_MIX = [JobStatus.COMPLETED] * 6 + [JobStatus.FAILED] + [JobStatus.PENDING] * 2 + [JobStatus.PROCESSING]
+
+LOCATIONS = ["San Francisco Bay", "Monterey Bay", "Half Moon Bay", "Santa Cruz", "Bodega Bay", "Point Reyes"]
+DIRECTIONS = ["SW", "WSW", "W", "WNW", "NW"]
+PRIORITIES = ["high", "normal", "normal", "low"]
+
+# Jobs handed to the store per add_many call
+SEED_CHUNK = 10000
+
+# A job's triggers are drawn from the most recent jobs of its pipeline
+TRIGGER_WINDOW = 32
+
+
+def parse_count(value: str) -> int:
+    """Parse a job count such as ``5000``, ``10k`` or ``1M``"""
+    text = value.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    if multiplier > 1:
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+@dataclass
+class Scale:
+    jobs: int
+    pipelines: int = 50
+    forecast_points: int = 48
+    max_triggers: int = 2
+    seed: int = 0
+
+    def job_id(self, i: int) -> str:
+        return f"bench_job_{i:08d}"
+
+    def pipeline_id(self, p: int) -> str:
+        return f"bench_pipeline_{p:04d}"
+
+    def pipeline_of(self, i: int) -> int:
+        return i % self.pipelines
+
+    def job_type(self, i: int) -> JobType:
+        return JOB_TYPES[i % len(JOB_TYPES)]
+
+    def job_status(self, i: int) -> JobStatus:
+        return STATUS_MIX[(i // len(JOB_TYPES)) % len(STATUS_MIX)]
+
+    def has_forecast(self, i: int) -> bool:
+        return self.job_type(i) == JobType.WAVE_FORECAST and self.job_status(i) == JobStatus.COMPLETED
+
+    def is_seeded(self, jobs_db: JobRepository) -> bool:
+        return self.job_id(0) in jobs_db and self.job_id(self.jobs - 1) in jobs_db
+
+
+def _args(rng: random.Random, job_type: JobType) -> dict:
+    args = {"location": rng.choice(LOCATIONS)}
+    if job_type == JobType.FETCH_TERRAIN:
+        args.update(resolution=rng.choice(["low", "medium", "high"]), format="GeoJSON")
+    else:
+        args["days"] = rng.randint(1, 7)
+    if job_type == JobType.WEATHER_FORECAST:
+        args["include_hourly"] = rng.random() < 0.5
+    return args
+
+
+def _forecast(rng: random.Random, start: datetime, points: int, location: str) -> WaveForecastData:
+    """Hourly forecast: a slow swell plus noise, so downsampling has a shape to keep"""
+    first = int(start.timestamp()) // 3600 * 3600
+    phase = rng.random() * math.tau
+    heights = array("d", (
+        round(max(0.1, 1.5 + math.sin(phase + h / 12) + rng.gauss(0, 0.15)), 2) for h in range(points)
+    ))
+    series = WaveSeries(
+        times=array("q", range(first, first + points * 3600, 3600)),
+        heights=heights,
+        periods=array("d", (round(rng.uniform(6, 14), 1) for _ in range(points))),
+        directions=array("H", (rng.randrange(len(DIRECTIONS)) for _ in range(points))),
+        labels=list(DIRECTIONS),
+    )
+    return WaveForecastData(data=series, location=location, unit="metric")
+
+
+def seed(jobs_db: JobRepository, pipelines_db: PipelineRepository, scale: Scale):
+    """Add the scale's pipelines and jobs, oldest first, through the normal store API"""
+    rng = random.Random(scale.seed)
+    now = datetime.now()
+    first = now - timedelta(seconds=scale.jobs)
+
+    pipelines: List[Pipeline] = []
+    for p in range(scale.pipelines):
+        pipeline = Pipeline(
+            id=scale.pipeline_id(p),
+            name=f"Benchmark Pipeline {p}",
+            description="Synthetic pipeline for benchmarks",
+            status=PipelineStatus.ACTIVE,
+            created_at=first,
+            updated_at=first,
+            metadata={"region": "West Coast", "priority": PRIORITIES[p % len(PRIORITIES)]},
+        )
+        pipelines_db.add(pipeline)
+        pipelines.append(pipeline)
+
+    recent: List[List[Job]] = [[] for _ in pipelines]
+    batch: List[Job] = []
+    for i in range(scale.jobs):
+        p = scale.pipeline_of(i)
+        job_type = scale.job_type(i)
+        status = scale.job_status(i)
+        created = first + timedelta(seconds=i)
+        args = _args(rng, job_type)
+
+        candidates = recent[p]
+        triggers = rng.sample(candidates, min(len(candidates), rng.randint(0, scale.max_triggers)))
+        job = Job(
+            id=scale.job_id(i),
+            pipeline_id=pipelines[p].id,
+            type=job_type,
+            status=status,
+            error_message="Upstream API timed out after 30 seconds" if status == JobStatus.FAILED else None,
+            created_at=created,
+            updated_at=created,
+            args=args,
+            wave_forecast_data=(
+                _forecast(rng, created, scale.forecast_points, args["location"]) if scale.has_forecast(i) else None
+            ),
+            triggers=triggers,
+            pipeline=pipelines[p],
+        )
+
+        candidates.append(job)
+        if len(candidates) > TRIGGER_WINDOW:
+            candidates.pop(0)
+        batch.append(job)
+        if len(batch) == SEED_CHUNK:
+            jobs_db.add_many(batch)
+            batch = []
+
+    if batch:
+        jobs_db.add_many(batch)
+    jobs_db.flush()
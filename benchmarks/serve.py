@@ -0,0 +1,59 @@
+"""
+Run the API under uvicorn with a seeded store, for ``bench_api --mode uvicorn``.
+
+Prints one JSON line with import and seed timings and memory use before it starts
+serving. The store is seeded only if it does not already hold this scale's jobs, so
+a persistent ``DATABASE_URL`` measures reopening an existing database.
+
+    python -m benchmarks.serve --jobs 100k --port 8765
+"""
+import argparse
+import gc
+import json
+import time
+
+import uvicorn
+
+from benchmarks.measure import rss_bytes
+from benchmarks.seed import Scale, parse_count, seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=parse_count, default=parse_count("10k"))
+    parser.add_argument("--pipelines", type=int, default=50)
+    parser.add_argument("--forecast-points", type=int, default=48)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    scale = Scale(args.jobs, args.pipelines, args.forecast_points, seed=args.seed)
+
+    rss_start = rss_bytes()
+    started = time.perf_counter()
+    from server.api import app, jobs_db, pipelines_db
+    imported = time.perf_counter()
+
+    gc.collect()
+    rss_before = rss_bytes()
+    seeded = not scale.is_seeded(jobs_db)
+    if seeded:
+        seed(jobs_db, pipelines_db, scale)
+    gc.collect()
+    rss_after = rss_bytes()
+
+    print(json.dumps({
+        "import_seconds": round(imported - started, 3),
+        "seed_seconds": round(time.perf_counter() - imported, 3) if seeded else 0.0,
+        "seeded": seeded,
+        "jobs": len(jobs_db),
+        "rss_start": rss_start,
+        "rss_before_seed": rss_before,
+        "rss_after_seed": rss_after,
+    }), flush=True)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Request mixes for the API benchmark.
+
+Each operation is a coroutine that sends one or more requests through a
+``Recorder``, labelled by route. A workload is a weighted choice of operations;
+``read`` only queries, ``mixed`` is mostly reads with a steady trickle of writes,
+and ``write`` is dominated by creates, transitions and worker traffic.
+
+``GET /api/events`` is not driven: an event stream stays open for as long as the
+client wants it, so it has no request latency to measure.
+"""
+import asyncio
+import random
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from benchmarks.measure import Recorder
+from benchmarks.seed import JOB_TYPES, LOCATIONS, Scale
+from server.models import JobStatus, JobType
+
+
+class Session:
+    """State shared by the concurrent clients of one run"""
+
+    def __init__(self, scale: Scale, recorder: Recorder, seed: int = 0):
+        self.scale = scale
+        self.recorder = recorder
+        self.rng = random.Random(seed)
+        # Jobs created during the run; the only ones cancelled or deleted
+        self.created: List[str] = []
+        self.worker = 0
+
+    def any_job(self) -> str:
+        return self.scale.job_id(self.rng.randrange(self.scale.jobs))
+
+    def forecast_job(self) -> str:
+        while True:
+            i = self.rng.randrange(self.scale.jobs)
+            if self.scale.has_forecast(i):
+                return self.scale.job_id(i)
+
+    def any_pipeline(self) -> str:
+        return self.scale.pipeline_id(self.rng.randrange(self.scale.pipelines))
+
+    def job_payload(self) -> dict:
+        job_type = self.rng.choice(JOB_TYPES)
+        args = {"location": self.rng.choice(LOCATIONS)}
+        if job_type != JobType.FETCH_TERRAIN:
+            args["days"] = self.rng.randint(1, 7)
+        return {"type": job_type.value, "pipeline_id": self.any_pipeline(), "args": args}
+
+    def job_filter(self) -> dict:
+        choice = self.rng.randrange(4)
+        if choice == 1:
+            return {"status": self.rng.choice(list(JobStatus)).value}
+        if choice == 2:
+            return {"type": self.rng.choice(JOB_TYPES).value}
+        if choice == 3:
+            return {"pipeline_id": self.any_pipeline()}
+        return {}
+
+
+Operation = Callable[[Session, object], Awaitable[None]]
+
+
+# Reads
+
+async def list_jobs(session: Session, client):
+    await session.recorder.request(client, "GET /api/jobs", "GET", "/api/jobs", params={"limit": 100, **session.job_filter()})
+
+
+async def list_jobs_next_page(session: Session, client):
+    params = {"limit": 100, **session.job_filter()}
+    response = await session.recorder.request(client, "GET /api/jobs", "GET", "/api/jobs", params=params)
+    cursor = response.headers.get("X-Next-Cursor")
+    if cursor:
+        await session.recorder.request(client, "GET /api/jobs?cursor", "GET", "/api/jobs", params={**params, "cursor": cursor})
+
+
+async def get_job(session: Session, client):
+    await session.recorder.request(client, "GET /api/jobs/{job_id}", "GET", f"/api/jobs/{session.any_job()}")
+
+
+async def get_job_expanded(session: Session, client):
+    await session.recorder.request(
+        client, "GET /api/jobs/{job_id}?expand", "GET", f"/api/jobs/{session.any_job()}",
+        params={"expand": "triggers,pipeline"},
+    )
+
+
+async def revalidate_job(session: Session, client):
+    job_id = session.any_job()
+    response = await session.recorder.request(client, "GET /api/jobs/{job_id}", "GET", f"/api/jobs/{job_id}")
+    await session.recorder.request(
+        client, "GET /api/jobs/{job_id} (If-None-Match)", "GET", f"/api/jobs/{job_id}",
+        headers={"If-None-Match": response.headers.get("ETag", "")}, expect=(200, 304),
+    )
+
+
+async def wave_forecast(session: Session, client):
+    await session.recorder.request(
+        client, "GET /api/jobs/{job_id}/wave-forecast", "GET", f"/api/jobs/{session.forecast_job()}/wave-forecast",
+        params={"points": 24},
+    )
+
+
+async def dependents(session: Session, client):
+    await session.recorder.request(client, "GET /api/jobs/{job_id}/dependents", "GET", f"/api/jobs/{session.any_job()}/dependents")
+
+
+async def export_jobs(session: Session, client):
+    # One pipeline's failed jobs of one type: big enough to stream, small enough to repeat
+    await session.recorder.request(
+        client, "GET /api/jobs/export", "GET", "/api/jobs/export",
+        params={
+            "format": session.rng.choice(["ndjson", "csv"]),
+            "pipeline_id": session.any_pipeline(),
+            "type": session.rng.choice(JOB_TYPES).value,
+            "status": JobStatus.FAILED.value,
+        },
+    )
+
+
+async def stats(session: Session, client):
+    await session.recorder.request(client, "GET /api/stats", "GET", "/api/stats")
+
+
+async def pipeline_stats(session: Session, client):
+    await session.recorder.request(client, "GET /api/pipelines/{pipeline_id}/stats", "GET", f"/api/pipelines/{session.any_pipeline()}/stats")
+
+
+async def list_pipelines(session: Session, client):
+    await session.recorder.request(client, "GET /api/pipelines", "GET", "/api/pipelines")
+
+
+async def get_pipeline(session: Session, client):
+    await session.recorder.request(client, "GET /api/pipelines/{pipeline_id}", "GET", f"/api/pipelines/{session.any_pipeline()}")
+
+
+async def queue(session: Session, client):
+    await session.recorder.request(client, "GET /api/queue", "GET", "/api/queue")
+
+
+async def cache(session: Session, client):
+    await session.recorder.request(client, "GET /api/cache", "GET", "/api/cache")
+
+
+# Writes
+
+async def create_job(session: Session, client):
+    payload = {**session.job_payload(), "trigger_ids": [session.any_job()]}
+    response = await session.recorder.request(client, "POST /api/jobs", "POST", "/api/jobs", json=payload)
+    if response.status_code == 200:
+        session.created.append(response.json()["id"])
+
+
+async def create_batch(session: Session, client):
+    # A chain of ten jobs, each triggered by the one before it
+    items = []
+    for i in range(10):
+        item = {**session.job_payload(), "key": f"k{i}"}
+        if i:
+            item["trigger_keys"] = [f"k{i - 1}"]
+        items.append(item)
+    response = await session.recorder.request(client, "POST /api/jobs/batch", "POST", "/api/jobs/batch", json={"jobs": items})
+    if response.status_code == 200:
+        session.created.extend(response.json()["ids"])
+
+
+async def retry_job(session: Session, client):
+    if not session.created:
+        return await create_job(session, client)
+    # A job a worker has claimed in the meantime is not retryable; that 400 is expected
+    await session.recorder.request(
+        client, "POST /api/jobs/{job_id}/retry", "POST", f"/api/jobs/{session.rng.choice(session.created)}/retry",
+        expect=(200, 400),
+    )
+
+
+async def bulk_cancel(session: Session, client):
+    if not session.created:
+        return await create_batch(session, client)
+    ids = session.rng.sample(session.created, min(10, len(session.created)))
+    await session.recorder.request(client, "POST /api/jobs/bulk", "POST", "/api/jobs/bulk", json={"action": "cancel", "ids": ids})
+
+
+async def delete_job(session: Session, client):
+    if not session.created:
+        return await create_job(session, client)
+    job_id = session.created.pop(session.rng.randrange(len(session.created)))
+    await session.recorder.request(client, "DELETE /api/jobs/{job_id}", "DELETE", f"/api/jobs/{job_id}")
+
+
+async def create_pipeline(session: Session, client):
+    payload = {"name": "Benchmark pipeline", "status": "active", "metadata": {"priority": "normal"}}
+    await session.recorder.request(client, "POST /api/pipelines", "POST", "/api/pipelines", json=payload)
+
+
+async def worker_cycle(session: Session, client):
+    """Claim a job, heartbeat its lease and report it complete (or, one time in five, failed)"""
+    session.worker += 1
+    worker_id = f"bench-worker-{session.worker}"
+    response = await session.recorder.request(
+        client, "POST /api/workers/claim", "POST", "/api/workers/claim",
+        json={"worker_id": worker_id, "types": [JobType.FETCH_TERRAIN.value, JobType.TIDE_FORECAST.value], "max_jobs": 1},
+    )
+    if response.status_code != 200:
+        return
+    jobs = response.json()["jobs"]
+    if not jobs:
+        return
+    job_id = jobs[0]["id"]
+    await session.recorder.request(
+        client, "POST /api/workers/heartbeat", "POST", "/api/workers/heartbeat",
+        json={"worker_id": worker_id, "job_ids": [job_id]},
+    )
+    # 409 when another client deleted or cancelled the job after it was claimed
+    if session.rng.random() < 0.2:
+        await session.recorder.request(
+            client, "POST /api/jobs/{job_id}/fail", "POST", f"/api/jobs/{job_id}/fail",
+            json={"worker_id": worker_id, "error_message": "Benchmark failure"}, expect=(200, 409),
+        )
+    else:
+        await session.recorder.request(
+            client, "POST /api/jobs/{job_id}/complete", "POST", f"/api/jobs/{job_id}/complete",
+            json={"worker_id": worker_id}, expect=(200, 409),
+        )
+
+
+READS: List[Tuple[Operation, int]] = [
+    (list_jobs, 10),
+    (list_jobs_next_page, 4),
+    (get_job, 20),
+    (get_job_expanded, 6),
+    (revalidate_job, 6),
+    (wave_forecast, 6),
+    (dependents, 4),
+    (export_jobs, 1),
+    (stats, 4),
+    (pipeline_stats, 4),
+    (list_pipelines, 2),
+    (get_pipeline, 2),
+    (queue, 2),
+    (cache, 1),
+]
+
+WRITES: List[Tuple[Operation, int]] = [
+    (create_job, 10),
+    (create_batch, 2),
+    (retry_job, 3),
+    (bulk_cancel, 2),
+    (delete_job, 6),
+    (create_pipeline, 1),
+    (worker_cycle, 6),
+]
+
+
+def _mix(*parts: Tuple[List[Tuple[Operation, int]], float]) -> List[Tuple[Operation, float]]:
+    """Scale each group so its weights add up to its share of the mix"""
+    mix = []
+    for operations, share in parts:
+        total = sum(weight for _, weight in operations)
+        mix.extend((operation, weight / total * share) for operation, weight in operations)
+    return mix
+
+
+WORKLOADS: Dict[str, List[Tuple[Operation, float]]] = {
+    "read": _mix((READS, 1.0)),
+    "mixed": _mix((READS, 0.8), (WRITES, 0.2)),
+    "write": _mix((READS, 0.3), (WRITES, 0.7)),
+}
+
+
+async def run(session: Session, client, workload: str, operations: int, concurrency: int):
+    """Run ``operations`` operations from ``workload`` across ``concurrency`` clients"""
+    choices, weights = zip(*WORKLOADS[workload])
+    remaining = operations
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            operation = session.rng.choices(choices, weights)[0]
+            await operation(session, client)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
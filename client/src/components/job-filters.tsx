@@ -104,6 +104,7 @@ export function JobFilters({ onFilterChange }: JobFiltersProps) {
                     <MenuItem value="processing">Processing</MenuItem>
                     <MenuItem value="completed">Completed</MenuItem>
                     <MenuItem value="failed">Failed</MenuItem>
+                    <MenuItem value="cancelled">Cancelled</MenuItem>
                   </Select>
                 </FormControl>
               )}
@@ -0,0 +1,43 @@
+import { useInfiniteQuery } from "@tanstack/react-query";
+import { JobWithTriggers } from "@/lib/types";
+
+interface JobPage {
+  jobs: JobWithTriggers[];
+  nextCursor: string | null;
+}
+
+// Pages of GET /api/jobs, following the X-Next-Cursor header the server sends
+// while more jobs match, so lists are never cut off at the first page
+export function useJobPages(queryKey: unknown[], params: URLSearchParams, enabled = true) {
+  const query = useInfiniteQuery({
+    queryKey,
+    queryFn: async ({ pageParam }): Promise<JobPage> => {
+      const pageParams = new URLSearchParams(params);
+      if (pageParam) pageParams.set('cursor', pageParam);
+
+      const response = await fetch(`/api/jobs?${pageParams.toString()}`, {
+        credentials: 'include'
+      });
+
+      if (!response.ok) {
+        throw new Error('Failed to fetch jobs');
+      }
+
+      return {
+        jobs: await response.json(),
+        nextCursor: response.headers.get('X-Next-Cursor'),
+      };
+    },
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.nextCursor,
+    enabled,
+  });
+
+  return {
+    ...query,
+    jobs: query.data?.pages.flatMap((page) => page.jobs),
+    hasMore: query.hasNextPage,
+    loadMore: () => query.fetchNextPage(),
+    isLoadingMore: query.isFetchingNextPage,
+  };
+}
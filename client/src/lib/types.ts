@@ -12,6 +12,7 @@ export interface Pipeline {
   created_at: string;
   updated_at: string;
   metadata: Record<string, any> | null;
+  version: number;
 }
 
 export interface Job {
@@ -24,8 +25,12 @@ export interface Job {
   updated_at: string;
   args: Record<string, any>;
   wave_forecast_data: WaveForecastData | null;
+  result_job_id: string | null;
+  version: number;
+  trigger_ids: string[];
 }
 
+// Returned when the request asks for ?expand=triggers
 export interface JobWithTriggers extends Job {
   triggers: Job[];
 }
@@ -45,6 +50,56 @@ export interface WaveForecastData {
   unit?: string;
 }
 
+// Returned by /api/pipelines/{id}/stats
+export interface PipelineStats {
+  pipeline_id: string;
+  total: number;
+  by_status: Partial<Record<JobStatus, number>>;
+  by_type: Partial<Record<JobType, number>>;
+  by_status_type: Partial<Record<JobStatus, Partial<Record<JobType, number>>>>;
+}
+
+// Returned by /api/pipelines/{id}/graph
+export interface PipelineGraph {
+  pipeline_id: string;
+  version: number;
+  jobs: number;
+  edges: number;
+  nodes: Array<{ id: string; type: JobType; status: JobStatus; trigger_ids: string[] }>;
+  external_triggers: Record<string, JobStatus>;
+  ready: string[];
+  blocked: string[];
+  stalled: string[];
+  cycle: string[];
+  critical_path: {
+    seconds: number;
+    jobs: Array<{ id: string; type: JobType; status: JobStatus; seconds: number; estimated: boolean }>;
+  };
+}
+
+// Returned by /api/jobs/{id}/blast-radius
+export interface BlastRadius {
+  job_id: string;
+  pipeline_id: string;
+  status: JobStatus;
+  dependents: string[];
+  by_status: Partial<Record<JobStatus, number>>;
+}
+
+// Returned by /api/stats
+export interface JobStats {
+  total: number;
+  by_status: Partial<Record<JobStatus, number>>;
+  by_type: Partial<Record<JobType, number>>;
+  by_status_type: Partial<Record<JobStatus, Partial<Record<JobType, number>>>>;
+  by_pipeline: Record<string, Partial<Record<JobStatus, Partial<Record<JobType, number>>>>>;
+  failure_rate: Record<string, { completed: number; failed: number; failure_rate: number }>;
+  histogram: {
+    bucket_minutes: number;
+    buckets: Array<{ start: string; created: number; completed: number; failed: number }>;
+  };
+}
+
 export interface JobFilters {
   type?: JobType | "";
   status?: JobStatus | "";
@@ -1,7 +1,7 @@
 import { useState, useEffect } from "react";
 import { useQuery } from "@tanstack/react-query";
 import { useRouter } from "@tanstack/react-router";
-import { JobWithTriggers, JobFilters, Pipeline } from "@/lib/types";
+import { JobFilters, JobStats, Pipeline } from "@/lib/types";
 import { JobStatus } from "@/schema";
 import { styled } from "@mui/material/styles";
 import { 
@@ -31,6 +31,10 @@ import {
   GitBranch,
 } from "lucide-react";
 import { SimplePipelineModal } from "@/components/simple-pipeline-modal";
+import { useJobPages } from "@/hooks/use-job-pages";
+
+// Recent jobs fetched per page; older ones are loaded on request
+const RECENT_JOBS_PAGE_SIZE = 10;
 
 export default function Dashboard() {
   const router = useRouter();
@@ -59,30 +63,23 @@ export default function Dashboard() {
     console.log("Modal state changed to:", pipelineModalOpen);
   }, [pipelineModalOpen]);
   
-  // Fetch jobs with filters
-  const { data, isLoading, error } = useQuery<JobWithTriggers[]>({
-    queryKey: ['jobs', filters],
-    queryFn: async ({ queryKey }) => {
-      const [_endpoint ] = queryKey as [string, JobFilters];
-      const filterParams = new URLSearchParams();
-      
-      if (filters.type) filterParams.append('type', filters.type);
-      if (filters.status) filterParams.append('status', filters.status);
-      if (filters.dateFrom) filterParams.append('dateFrom', filters.dateFrom);
-      if (filters.dateTo) filterParams.append('dateTo', filters.dateTo);
-      
-      const queryString = filterParams.toString() ? `?${filterParams.toString()}` : '';
-      const response = await fetch(`/api/jobs${queryString}`, {
-        credentials: 'include'
-      });
-      
-      if (!response.ok) {
-        throw new Error('Failed to fetch jobs');
-      }
-      
-      return response.json();
-    }
-  });
+  // Fetch jobs with filters, a page at a time
+  const filterParams = new URLSearchParams();
+  if (filters.type) filterParams.append('type', filters.type);
+  if (filters.status) filterParams.append('status', filters.status);
+  if (filters.dateFrom) filterParams.append('dateFrom', filters.dateFrom);
+  if (filters.dateTo) filterParams.append('dateTo', filters.dateTo);
+  filterParams.append('expand', 'triggers');
+  filterParams.append('limit', String(RECENT_JOBS_PAGE_SIZE));
+  
+  const {
+    jobs: data,
+    isLoading,
+    error,
+    hasMore,
+    loadMore,
+    isLoadingMore,
+  } = useJobPages(['jobs', filters], filterParams);
   
   // Fetch pipelines
   const { 
@@ -104,10 +101,26 @@ export default function Dashboard() {
     }
   });
   
+  // Fetch aggregate counts; the job list is paginated, so never count it client-side
+  const { data: stats } = useQuery<JobStats>({
+    queryKey: ['stats'],
+    queryFn: async () => {
+      const response = await fetch('/api/stats', {
+        credentials: 'include'
+      });
+      
+      if (!response.ok) {
+        throw new Error('Failed to fetch job stats');
+      }
+      
+      return response.json();
+    }
+  });
+  
   // Status card data
-  const pendingJobs = data?.filter(job => job.status === "pending") || [];
-  const processingJobs = data?.filter(job => job.status === "processing") || [];
-  const completedJobs = data?.filter(job => job.status === "completed") || [];
+  const pendingCount = stats?.by_status.pending || 0;
+  const processingCount = stats?.by_status.processing || 0;
+  const completedCount = stats?.by_status.completed || 0;
   
   return (
     <DashboardContainer>
@@ -142,7 +155,7 @@ export default function Dashboard() {
                   </CardHeader>
                   <StyledCardContent>
                     <Typography variant="h3" component="div" fontWeight="bold" sx={{ my: 1 }}>
-                      {pendingJobs.length}
+                      {pendingCount}
                     </Typography>
                     <Typography variant="body2" color="text.secondary">
                       Waiting to be processed
@@ -162,7 +175,7 @@ export default function Dashboard() {
                   </CardHeader>
                   <StyledCardContent>
                     <Typography variant="h3" component="div" fontWeight="bold" sx={{ my: 1 }}>
-                      {processingJobs.length}
+                      {processingCount}
                     </Typography>
                     <Typography variant="body2" color="text.secondary">
                       Currently running
@@ -182,7 +195,7 @@ export default function Dashboard() {
                   </CardHeader>
                   <StyledCardContent>
                     <Typography variant="h3" component="div" fontWeight="bold" sx={{ my: 1 }}>
-                      {completedJobs.length}
+                      {completedCount}
                     </Typography>
                     <Typography variant="body2" color="text.secondary">
                       Successfully finished
@@ -322,7 +335,7 @@ export default function Dashboard() {
                   </TableHead>
                   <TableBody>
                     {data && data.length > 0 ? (
-                      data.slice(0, 10).map((job) => (
+                      data.map((job) => (
                         <StyledTableRow 
                           key={job.id}
                           onClick={() => router.navigate({ to: '/job/$id', params: { id: job.id } })}
@@ -416,6 +429,16 @@ export default function Dashboard() {
                   </TableBody>
                 </Table>
               </TableContainer>
+              {hasMore && (
+                <LoadMoreContainer>
+                  <Typography variant="body2" color="text.secondary">
+                    Showing the newest {data?.length ?? 0} jobs; older jobs match too
+                  </Typography>
+                  <Button size="small" onClick={loadMore} disabled={isLoadingMore}>
+                    {isLoadingMore ? 'Loading...' : 'Load more'}
+                  </Button>
+                </LoadMoreContainer>
+              )}
             </Paper>
           </>
         )}
@@ -489,6 +512,14 @@ const PaperHeader = styled(Box)({
   alignItems: 'center'
 });
 
+const LoadMoreContainer = styled(Box)({
+  padding: '12px 24px',
+  borderTop: '1px solid rgba(0, 0, 0, 0.08)',
+  display: 'flex',
+  justifyContent: 'space-between',
+  alignItems: 'center'
+});
+
 const StyledTableRow = styled(TableRow)({
   '&:last-child td, &:last-child th': { border: 0 },
   '&:hover': { 
@@ -1,3 +1,4 @@
+import { useEffect } from 'react';
 import { useParams, useRouter } from '@tanstack/react-router';
 import { useQuery, useMutation } from "@tanstack/react-query";
 import { JobWithPipeline } from "@/lib/types";
@@ -32,18 +33,21 @@ export default function JobDetailsPage() {
     queryKey: [`/api/jobs/${id}`],
     queryFn: async ({ queryKey }) => {
       const [url] = queryKey as [string];
-      const res = await fetch(url, { credentials: 'include' });
+      const res = await fetch(`${url}?expand=triggers,pipeline`, { credentials: 'include' });
       if (!res.ok) throw new Error('Failed to fetch job details');
       return res.json();
     },
-    refetchInterval: (query) => {
-      if (query.state.data?.status === 'processing') {
-        return 2000;
-      }
-      return false;
-    },
   });
   
+  // Refetch only when the server pushes a change for this job instead of polling
+  useEffect(() => {
+    const events = new EventSource(`/api/events?job_id=${encodeURIComponent(id)}`);
+    const onChange = () => refetch();
+    ['job_status', 'job_triggers', 'reset'].forEach((name) => events.addEventListener(name, onChange));
+    events.addEventListener('job_removed', () => router.navigate({ to: '/' }));
+    return () => events.close();
+  }, [id]);
+  
   const deleteJobMutation = useMutation({
     mutationFn: async () => {
       await apiRequest('DELETE', `/api/jobs/${id}`);
@@ -36,10 +36,11 @@ import {
   Archive,
   Trash2
 } from "lucide-react";
-import { Pipeline, JobWithTriggers } from "@/lib/types";
+import { Pipeline, PipelineStats } from "@/lib/types";
 import { getStatusColor, formatFullDate } from "@/lib/utils";
 import { prettyJSON } from "@/lib/utils";
 import { JobTimeline } from "../components/JobTimeline";
+import { useJobPages } from "@/hooks/use-job-pages";
 
 export default function PipelineDetailsPage() {
   const router = useRouter();
@@ -70,24 +71,34 @@ export default function PipelineDetailsPage() {
     enabled: !!id
   });
   
-  // Fetch pipeline's jobs
+  // Fetch pipeline's jobs, a page at a time
   const {
-    data: jobs,
+    jobs,
     isLoading: isJobsLoading,
     error: jobsError,
-    refetch: refetchJobs
-  } = useQuery<JobWithTriggers[]>({
-    queryKey: ['/api/jobs', { pipeline_id: id }],
-    queryFn: async ({ queryKey }) => {
-      const [_endpoint, filters] = queryKey as [string, { pipeline_id: string }];
-      if (!filters.pipeline_id) throw new Error("No pipeline ID provided");
-      
-      const response = await fetch(`/api/jobs?pipeline_id=${filters.pipeline_id}`, {
+    refetch: refetchJobs,
+    hasMore,
+    loadMore,
+    isLoadingMore,
+  } = useJobPages(
+    ['/api/jobs', { pipeline_id: id }],
+    new URLSearchParams({ pipeline_id: id ?? '', expand: 'triggers' }),
+    !!id
+  );
+  
+  // Fetch the pipeline's job counts without listing every job
+  const {
+    data: stats,
+    refetch: refetchStats
+  } = useQuery<PipelineStats>({
+    queryKey: ['/api/pipelines', id, 'stats'],
+    queryFn: async () => {
+      const response = await fetch(`/api/pipelines/${id}/stats`, {
         credentials: 'include'
       });
       
       if (!response.ok) {
-        throw new Error(`Failed to fetch jobs for pipeline: ${filters.pipeline_id}`);
+        throw new Error(`Failed to fetch stats for pipeline: ${id}`);
       }
       
       return response.json();
@@ -98,6 +109,7 @@ export default function PipelineDetailsPage() {
   const handleRefresh = () => {
     refetchPipeline();
     refetchJobs();
+    refetchStats();
   };
   
   const getStatusChip = (status: string): JSX.Element => {
@@ -300,7 +312,7 @@ export default function PipelineDetailsPage() {
                         <Workflow size={20} color="#6b7280" />
                       </Box>
                       <Typography variant="h4" fontWeight="bold">
-                        {jobs?.length || 0}
+                        {stats?.total || 0}
                       </Typography>
                     </CardContent>
                   </Card>
@@ -316,7 +328,7 @@ export default function PipelineDetailsPage() {
                         <CheckCircle size={20} color="#22c55e" />
                       </Box>
                       <Typography variant="h4" fontWeight="bold">
-                        {jobs?.filter(job => job.status === "completed").length || 0}
+                        {stats?.by_status.completed || 0}
                       </Typography>
                     </CardContent>
                   </Card>
@@ -332,7 +344,7 @@ export default function PipelineDetailsPage() {
                         <Clock size={20} color="#9ca3af" />
                       </Box>
                       <Typography variant="h4" fontWeight="bold">
-                        {jobs?.filter(job => job.status === "pending").length || 0}
+                        {stats?.by_status.pending || 0}
                       </Typography>
                     </CardContent>
                   </Card>
@@ -348,7 +360,7 @@ export default function PipelineDetailsPage() {
                         <AlertCircle size={20} color="#ef4444" />
                       </Box>
                       <Typography variant="h4" fontWeight="bold">
-                        {jobs?.filter(job => job.status === "failed").length || 0}
+                        {stats?.by_status.failed || 0}
                       </Typography>
                     </CardContent>
                   </Card>
@@ -461,6 +473,16 @@ export default function PipelineDetailsPage() {
                   </TableBody>
                 </Table>
               </TableContainer>
+              {hasMore && (
+                <Box sx={{ px: 3, py: 1.5, borderTop: '1px solid rgba(0, 0, 0, 0.08)', display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
+                  <Typography variant="body2" color="text.secondary">
+                    Showing the newest {jobs?.length ?? 0} jobs; this pipeline has more
+                  </Typography>
+                  <Button size="small" onClick={loadMore} disabled={isLoadingMore}>
+                    {isLoadingMore ? 'Loading...' : 'Load more'}
+                  </Button>
+                </Box>
+              )}
             </Paper>
           </>
         ) : null}
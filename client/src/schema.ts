@@ -3,7 +3,7 @@ import { createInsertSchema } from "drizzle-zod";
 import { z } from "zod";
 
 export type JobType = "fetchTerrain" | "weatherForecast" | "tideForecast" | "waveForecast";
-export type JobStatus = "pending" | "processing" | "completed" | "failed";
+export type JobStatus = "pending" | "processing" | "completed" | "failed" | "cancelled";
 export type PipelineStatus = "active" | "archived" | "completed";
 
 export const pipelines = pgTable("pipelines", {
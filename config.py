@@ -1,6 +1,7 @@
 """
 Configuration settings for the Job Tracking System
 """
+import os
 
 # FastAPI backend settings
 FASTAPI_HOST = "0.0.0.0"  # Set to 0.0.0.0 to allow external connections
@@ -9,8 +10,65 @@ FASTAPI_PORT = 8000
 # React frontend settings
 REACT_DEV_PORT = 3000
 
-# Database settings (if using a database in the future)
-DATABASE_URL = None  # Currently using in-memory storage
+# Database settings
+# None (or "memory://") keeps jobs in memory; "sqlite:///jobs.db" persists them to SQLite
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+# Server processes; more than one shares the SQLite store between them (uvicorn reads the same variable)
+WORKERS = int(os.environ.get("WEB_CONCURRENCY", "1"))
+SYNC_INTERVAL = 0.05  # Seconds between checks for changes made by the other processes
+
+# Crash recovery for in-memory storage: journal and snapshot directory (None disables it)
+JOURNAL_DIR = os.environ.get("JOURNAL_DIR")
+SNAPSHOT_INTERVAL = 300  # Seconds between snapshots
+
+# Job execution engine: set RUN_EXECUTOR=1 to run pending jobs instead of only tracking them
+RUN_EXECUTOR = os.environ.get("RUN_EXECUTOR") == "1"
+EXECUTOR_PROCESSES = os.cpu_count() or 1  # Process pool size for CPU-bound handlers
+EXECUTOR_CONCURRENCY = {  # Jobs of each type allowed to run at once
+    "fetchTerrain": 16,
+    "weatherForecast": 16,
+    "tideForecast": 16,
+    "waveForecast": EXECUTOR_PROCESSES,
+}
+
+# Worker leases: claimed jobs whose lease runs out are returned to PENDING
+LEASE_SECONDS = 60  # Default lease length
+LEASE_REAP_INTERVAL = 5  # Seconds between checks for expired leases
+
+# Retention: finished jobs move out of the live store into a compressed archive in
+# ARCHIVE_DIR (None disables retention altogether)
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR")
+RETENTION_TTL = {  # Seconds since its last update after which a job in each status is archived
+    "completed": 7 * 24 * 3600,
+    "cancelled": 7 * 24 * 3600,
+    "failed": 30 * 24 * 3600,
+}
+RETENTION_KEEP_PER_PIPELINE = 10000  # Newer jobs than this per pipeline stay live whatever their age (None for no limit)
+RETENTION_ARCHIVE_PIPELINES = True  # Archive every job of an ARCHIVED pipeline that is not processing
+RETENTION_INTERVAL = 60  # Seconds between retention passes
+RETENTION_BATCH = 500  # Jobs archived at a time; the event loop is free between batches
+
+# Memory budget for cached, pre-encoded job JSON
+RESPONSE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Result cache: a job with the same type and args as a recent one completes with its
+# result instead of running, and identical jobs in flight at once run only once
+RESULT_CACHE_TTL = {  # Seconds a result is reused per job type; 0 only coalesces, unlisted types always run
+    "fetchTerrain": 24 * 3600,
+    "weatherForecast": 15 * 60,
+    "tideForecast": 6 * 3600,
+    "waveForecast": 30 * 60,
+}
+RESULT_CACHE_BYTES = 32 * 1024 * 1024  # Memory budget for cached results, least recently used out first
+
+# Pipelines whose trigger graph (GET /api/pipelines/{id}/graph) is kept and updated in place
+PIPELINE_GRAPH_CACHE = 64
+
+# Sampling profiler for slow requests; off until switched on with POST /api/profiler
+PROFILER_INTERVAL = 0.005  # Seconds between stack samples
+PROFILER_THRESHOLD = 0.25  # Requests slower than this many seconds are profiled
+PROFILER_WINDOW = 60  # Seconds of samples kept
 
 # API settings
 ENABLE_CORS = True
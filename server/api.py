@@ -1,21 +1,54 @@
 import os
 import json
+import asyncio
+import base64
 import uuid
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any, Union
-from fastapi import FastAPI, HTTPException, Query, Body
+from fastapi import FastAPI, HTTPException, Query, Body, Response, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 import uvicorn
 
+from config import (
+    DATABASE_URL, WORKERS, SYNC_INTERVAL, JOURNAL_DIR, SNAPSHOT_INTERVAL,
+    RUN_EXECUTOR, EXECUTOR_CONCURRENCY, EXECUTOR_PROCESSES,
+    LEASE_SECONDS, LEASE_REAP_INTERVAL, RESPONSE_CACHE_BYTES, RESULT_CACHE_TTL, RESULT_CACHE_BYTES,
+    ARCHIVE_DIR, RETENTION_TTL, RETENTION_KEEP_PER_PIPELINE, RETENTION_ARCHIVE_PIPELINES,
+    RETENTION_INTERVAL, RETENTION_BATCH, PIPELINE_GRAPH_CACHE,
+    PROFILER_INTERVAL, PROFILER_THRESHOLD, PROFILER_WINDOW
+)
 from server.models import (
     Job, JobType, JobStatus, PipelineStatus, Pipeline,
     WaveForecastEntry, WaveForecastData, 
-    CreateJobPayload, CreatePipelinePayload
+    CreateJobPayload, CreatePipelinePayload,
+    CreateJobBatchPayload, CreateJobBatchResult,
+    BulkAction, BulkJobPayload, BulkJobOutcome, BulkJobResult,
+    ClaimJobsPayload, HeartbeatPayload, CompleteJobPayload, FailJobPayload,
+    ProfilerSettings
 )
+from server.store import JobStore, SortKey, open_store
+from server.journal import Journal
+from server.events import ChangeFeed, matches
+from server.forecast import DOWNSAMPLE_METHODS, parse_time
+from server.executor import Executor
+from server.scheduler import ReadyQueue
+from server.results import ResultCache
+from server.graph import PipelineGraphs, find_cycle, topological_order
+from server.stats import HISTOGRAMS, JobStats
+from server.workers import LeaseError, LeaseManager
+from server.projection import COMPACT, Projection, project_job
+from server.cache import ResponseCache, dumps
+from server.compression import CompressionMiddleware
+from server.export import EXPORT_FORMATS, csv_lines, ndjson_lines
+from server.search import arg_terms, words
+from server.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics, MetricsMiddleware
+from server.profiler import SamplingProfiler
+from server.archive import JobArchive
+from server.retention import Retention
 
 app = FastAPI(title="Job Tracking API")
 
@@ -26,11 +59,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
-# In-memory database
-jobs_db: Dict[str, Job] = {}
-pipelines_db: Dict[str, Pipeline] = {}
+# Compress large responses (and streamed exports) for clients that accept it
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# Pagination settings for job listings
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Largest number of jobs accepted by one batch request
+MAX_BATCH_SIZE = 10000
+
+# Points returned by the wave forecast chart endpoint
+DEFAULT_CHART_POINTS = 500
+MAX_CHART_POINTS = 10000
+
+# Largest number of jobs one bulk retry, cancel or delete may touch
+MAX_BULK_SIZE = 100000
+
+# Statuses each bulk action may be applied from
+RETRYABLE = {JobStatus.FAILED, JobStatus.PENDING, JobStatus.CANCELLED}
+CANCELLABLE = {JobStatus.PENDING, JobStatus.PROCESSING}
+
+# Limits for the worker protocol
+MAX_CLAIM = 100
+MAX_LEASE_SECONDS = 3600
+
+# Job and pipeline storage (in-memory unless DATABASE_URL selects a database).
+# With several worker processes every one of them opens the same SQLite file
+jobs_db, pipelines_db = open_store(DATABASE_URL, shared=WORKERS > 1)
 
 # Sample initial data
 def generate_sample_data():
@@ -63,14 +122,16 @@ def generate_sample_data():
     job3_id = f"job_{uuid.uuid4().hex[:10]}"
     job4_id = f"job_{uuid.uuid4().hex[:10]}"
     
-    # Create jobs with different statuses
+    now = datetime.now()
+    
+    # Create jobs with different statuses and staggered timestamps
     jobs_db[job1_id] = Job(
         id=job1_id,
         pipeline_id=pipeline_id,
         type=JobType.FETCH_TERRAIN,
         status=JobStatus.PENDING,
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
+        created_at=now - timedelta(days=7),
+        updated_at=now - timedelta(days=7),
         args={"location": "San Francisco Bay", "resolution": "high", "format": "GeoJSON"},
         triggers=[],
         pipeline=pipelines_db[pipeline_id]
@@ -81,8 +142,8 @@ def generate_sample_data():
         pipeline_id=pipeline_id,
         type=JobType.WEATHER_FORECAST,
         status=JobStatus.PROCESSING,
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
+        created_at=now - timedelta(days=3, hours=12),
+        updated_at=now - timedelta(hours=2),
         args={"location": "San Francisco Bay", "days": 5, "include_hourly": True},
         triggers=[],
         pipeline=pipelines_db[pipeline_id]
@@ -93,11 +154,11 @@ def generate_sample_data():
         pipeline_id=pipeline_id,
         type=JobType.WAVE_FORECAST,
         status=JobStatus.COMPLETED,
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
+        created_at=now - timedelta(days=1, hours=6),
+        updated_at=now - timedelta(hours=5),
         args={"location": "San Francisco Bay", "days": 2, "include_direction": True},
         wave_forecast_data=wave_forecast_data,
-        triggers=[],
+        triggers=[jobs_db[job1_id]],
         pipeline=pipelines_db[pipeline_id]
     )
     
@@ -106,64 +167,382 @@ def generate_sample_data():
         pipeline_id=pipeline_id,
         type=JobType.TIDE_FORECAST,
         status=JobStatus.FAILED,
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
+        created_at=now - timedelta(hours=1),
+        updated_at=now - timedelta(minutes=30),
         error_message="API connection timed out after 30 seconds",
         args={"location": "San Francisco Bay", "days": 3},
         triggers=[],
         pipeline=pipelines_db[pipeline_id]
     )
-    
-    # Set up job triggers
-    jobs_db[job3_id].triggers = [jobs_db[job1_id]]
 
-# Generate sample data at startup
-generate_sample_data()
+# Recover the in-memory store from its journal when one is configured
+journal = None
+if JOURNAL_DIR and isinstance(jobs_db, JobStore):
+    journal = Journal(JOURNAL_DIR, jobs_db, pipelines_db)
+    journal.recover()
+    journal.attach()
+
+# Change feed pushed to clients over Server-Sent Events
+change_feed = ChangeFeed()
+jobs_db.subscribe(change_feed.listener)
+pipelines_db.subscribe(change_feed.listener)
+
+# Pre-encoded JSON for projected jobs, dropped whenever anything it embeds changes
+response_cache = ResponseCache(RESPONSE_CACHE_BYTES)
+jobs_db.subscribe(response_cache.listener)
+pipelines_db.subscribe(response_cache.listener)
+
+# Seconds between SSE keepalive comments on an idle stream
+EVENT_KEEPALIVE = 15
+
+# Other processes sharing the store wait while this one seeds and loads its derived
+# state, so nothing they write falls between the snapshot and the first sync
+with jobs_db.exclusive():
+    # Generate sample data at startup, unless the store already holds data
+    if not len(jobs_db) and not len(pipelines_db):
+        generate_sample_data()
+
+    # Aggregate counters for the dashboard, kept current on every write
+    job_stats = JobStats(jobs_db)
+    job_stats.start()
+
+    # Pending jobs whose triggers have completed, shared by the executor and remote workers
+    ready_jobs = ReadyQueue(jobs_db)
+    ready_jobs.start()
+
+# Trigger graphs of recently viewed pipelines, updated in place as their jobs change
+pipeline_graphs = PipelineGraphs(jobs_db, PIPELINE_GRAPH_CACHE)
+jobs_db.subscribe(pipeline_graphs.listener)
+
+# Completes jobs identical to recent or running ones without running them again
+result_cache = ResultCache(jobs_db, RESULT_CACHE_TTL, RESULT_CACHE_BYTES)
+
+# Leases on jobs claimed by remote workers, kept in the store when it is shared
+leases = LeaseManager(jobs_db, ready_jobs, jobs_db.lease_table())
+leases.start()
+
+# Runs pending jobs once their triggers complete (opt-in, see config.py)
+executor = Executor(jobs_db, ready_jobs, EXECUTOR_CONCURRENCY, EXECUTOR_PROCESSES) if RUN_EXECUTOR else None
+
+# Prometheus metrics; gauges read counters the structures above already keep current
+metrics = Metrics()
+jobs_db.subscribe(metrics.listener)
+metrics.gauge("store_jobs", "Jobs in the store", lambda: len(jobs_db))
+metrics.gauge("store_pipelines", "Pipelines in the store", lambda: len(pipelines_db))
+metrics.gauge("jobs_by_status", "Jobs per status", lambda: {s.value: job_stats.by_status.get(s.value, 0) for s in JobStatus}, ("status",))
+metrics.gauge("ready_queue_depth", "Ready jobs waiting per type", lambda: ready_jobs.stats()["depth_by_type"], ("type",))
+metrics.gauge("worker_leases", "Jobs leased to remote workers", lambda: len(leases.leases))
+metrics.gauge("executor_running", "Jobs running in the built-in executor", lambda: len(executor.running) if executor is not None else 0)
+metrics.gauge("event_subscribers", "Open Server-Sent Events streams", lambda: len(change_feed.subscribers))
+metrics.gauge("response_cache_bytes", "Bytes of cached job JSON", lambda: response_cache.bytes)
+metrics.counter("response_cache_hits_total", "Response cache hits", lambda: response_cache.hits)
+metrics.counter("response_cache_misses_total", "Response cache misses", lambda: response_cache.misses)
+metrics.gauge("result_cache_bytes", "Bytes of cached job results", lambda: result_cache.bytes)
+metrics.counter("result_cache_hits_total", "Jobs completed from a cached result", lambda: result_cache.hits)
+metrics.counter("result_cache_coalesced_total", "Jobs completed with the result of an identical job in flight", lambda: result_cache.coalesced)
+metrics.counter("result_cache_misses_total", "Jobs queued to run with no identical result cached or in flight", lambda: result_cache.misses)
+
+# Moves finished jobs out of the live store into a compressed archive (opt-in, see config.py)
+retention = None
+if ARCHIVE_DIR:
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    retention = Retention(
+        jobs_db,
+        pipelines_db,
+        JobArchive(os.path.join(ARCHIVE_DIR, "archive.db")),
+        ttl=RETENTION_TTL,
+        keep_per_pipeline=RETENTION_KEEP_PER_PIPELINE,
+        archive_pipelines=RETENTION_ARCHIVE_PIPELINES,
+        batch_size=RETENTION_BATCH,
+    )
+    metrics.counter("jobs_archived_total", "Jobs moved to the archive by retention", lambda: retention.archived)
+
+# Samples the event loop during slow requests, once switched on with POST /api/profiler
+profiler = SamplingProfiler(PROFILER_INTERVAL, PROFILER_THRESHOLD, PROFILER_WINDOW)
+
+# Outermost middleware, so latency and size cover compression and everything else
+app.add_middleware(MetricsMiddleware, metrics=metrics, profiler=profiler)
+
+async def sync_store():
+    """Replay what the other processes wrote, so derived state and cached JSON are current"""
+    jobs_db.sync()
+
+async def run_sync(interval: float):
+    # Keeps event streams and the executor current while no requests arrive
+    while True:
+        await asyncio.sleep(interval)
+        jobs_db.sync()
+
+# Applies to every route declared below
+if WORKERS > 1:
+    app.router.dependencies.append(Depends(sync_store))
+
+@app.on_event("startup")
+async def start_background_tasks():
+    if journal is not None:
+        app.state.snapshot_task = asyncio.create_task(journal.run_checkpoints(SNAPSHOT_INTERVAL))
+    app.state.reaper_task = asyncio.create_task(leases.run_reaper(LEASE_REAP_INTERVAL))
+    if WORKERS > 1:
+        app.state.sync_task = asyncio.create_task(run_sync(SYNC_INTERVAL))
+    if retention is not None:
+        app.state.retention_task = asyncio.create_task(retention.run(RETENTION_INTERVAL))
+    # Before the executor, so duplicates already queued never reach it
+    result_cache.start(ready_jobs)
+    if executor is not None:
+        executor.start()
+
+@app.on_event("shutdown")
+async def close_store():
+    profiler.stop()
+    app.state.reaper_task.cancel()
+    if WORKERS > 1:
+        app.state.sync_task.cancel()
+    if retention is not None:
+        app.state.retention_task.cancel()
+        retention.archive.close()
+    if executor is not None:
+        executor.stop()
+    result_cache.stop()
+    if journal is not None:
+        app.state.snapshot_task.cancel()
+        journal.close()
+    jobs_db.close()
+
+def parse_date(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    # Stored timestamps are naive local time; compare like with like
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def encode_cursor(key: SortKey) -> str:
+    created_at, job_id = key
+    raw = json.dumps([created_at.isoformat(), job_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> SortKey:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (datetime.fromisoformat(created_at), job_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Changes on every restart, so store-wide ETags from a previous run never match
+STORE_EPOCH = uuid.uuid4().hex[:8]
+
+def store_etag() -> str:
+    return f'"{STORE_EPOCH}-{jobs_db.version}.{pipelines_db.version}"'
+
+def job_etag(job: Job, projection: Optional[Projection] = None) -> str:
+    # Embedded triggers and pipelines change independently of the job, so
+    # expanded representations are validated against the whole store
+    if projection is not None and projection.expand:
+        return store_etag()
+    return f'"{job.id}-{job.version}"'
+
+def pipeline_etag(pipeline: Pipeline) -> str:
+    return f'"{pipeline.id}-{pipeline.version}"'
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+def check_if_match(if_match: Optional[str], etag: str):
+    # Optimistic concurrency: refuse to change a job the client has a stale copy of
+    if if_match is not None and not etag_matches(if_match, etag):
+        raise HTTPException(status_code=412, detail="Job has been modified since it was fetched")
+
+def job_response(job: Job, projection: Projection = COMPACT, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(response_cache.render(job, projection), media_type="application/json", headers=headers)
+
+def jobs_response(jobs: List[Job], projection: Projection = COMPACT, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(response_cache.render_many(jobs, projection), media_type="application/json", headers=headers)
+
+def job_projection(
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    depth: int = 1
+) -> Projection:
+    try:
+        return Projection.parse(fields, expand, depth)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def job_search(
+    arg: Optional[List[str]] = Query(None),
+    error: Optional[str] = None
+) -> Dict[str, Any]:
+    # Repeatable arg=key:value filters plus a word search on error messages (see server/search.py)
+    args = {}
+    for item in arg or ():
+        key, sep, value = item.partition(":")
+        if not sep or not key:
+            raise HTTPException(status_code=400, detail=f"arg filter must look like key:value, got {item!r}")
+        args[key] = value
+    # A search with no words would be dropped and match every job, as for bulk filters
+    if error and not words(error):
+        raise HTTPException(status_code=400, detail="error filter has no words to search for")
+    return {"args": args or None, "error": error or None}
 
 # API Routes
 
-@app.get("/api/jobs", response_model=List[Job])
+@app.get("/api/jobs")
 async def get_jobs(
     type: Optional[str] = None,
     status: Optional[str] = None,
     dateFrom: Optional[str] = None,
     dateTo: Optional[str] = None,
-    pipeline_id: Optional[str] = None
+    pipeline_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    search: Dict[str, Any] = Depends(job_search),
+    projection: Projection = Depends(job_projection),
+    if_none_match: Optional[str] = Header(None)
+):
+    # Nothing in the store has changed since the client's copy: skip the query entirely
+    etag = store_etag()
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # Never return more than one bounded page, whatever the client asks for
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    # Indexed lookup, already sorted by creation date (newest first).
+    # Fetch one extra job to learn whether another page follows.
+    page = jobs_db.query(
+        type=type,
+        status=status,
+        pipeline_id=pipeline_id,
+        date_from=parse_date(dateFrom) if dateFrom else None,
+        date_to=parse_date(dateTo) if dateTo else None,
+        before=decode_cursor(cursor) if cursor else None,
+        limit=limit + 1,
+        depth=projection.trigger_depth,
+        **search,
+    )
+
+    headers = {"ETag": etag}
+    if len(page) > limit:
+        page = page[:limit]
+        last = page[-1]
+        headers["X-Next-Cursor"] = encode_cursor((last.created_at, last.id))
+
+    return jobs_response(page, projection, headers)
+
+@app.get("/api/jobs/export")
+async def export_jobs(
+    format: str = "ndjson",
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+    dateFrom: Optional[str] = None,
+    dateTo: Optional[str] = None,
+    pipeline_id: Optional[str] = None,
+    search: Dict[str, Any] = Depends(job_search),
+    projection: Projection = Depends(job_projection)
 ):
-    filtered_jobs = list(jobs_db.values())
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if format == "csv" and projection.expand:
+        raise HTTPException(status_code=400, detail="CSV exports cannot expand triggers or pipelines")
     
-    # Apply filters
-    if type:
-        filtered_jobs = [job for job in filtered_jobs if job.type == type]
+    filters = dict(
+        type=type,
+        status=status,
+        pipeline_id=pipeline_id,
+        date_from=parse_date(dateFrom) if dateFrom else None,
+        date_to=parse_date(dateTo) if dateTo else None,
+        depth=projection.trigger_depth,
+        **search,
+    )
+    lines = csv_lines if format == "csv" else ndjson_lines
     
-    if status:
-        filtered_jobs = [job for job in filtered_jobs if job.status == status]
+    # Streamed page by page straight from the store, so memory stays flat however much matches
+    return StreamingResponse(
+        lines(jobs_db, filters, projection),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="jobs.{format}"'},
+    )
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    projection: Projection = Depends(job_projection),
+    if_none_match: Optional[str] = Header(None)
+):
+    job = jobs_db.get(job_id, depth=projection.trigger_depth)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
     
-    if pipeline_id:
-        filtered_jobs = [job for job in filtered_jobs if job.pipeline_id == pipeline_id]
+    etag = job_etag(job, projection)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
     
-    if dateFrom:
-        date_from = datetime.fromisoformat(dateFrom.replace('Z', '+00:00'))
-        filtered_jobs = [job for job in filtered_jobs if job.created_at >= date_from]
+    return job_response(job, projection, {"ETag": etag})
+
+@app.get("/api/jobs/{job_id}/wave-forecast")
+async def get_wave_forecast(
+    job_id: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    points: int = Query(DEFAULT_CHART_POINTS, ge=2, le=MAX_CHART_POINTS),
+    method: str = "lttb",
+    if_none_match: Optional[str] = Header(None)
+):
+    job = jobs_db.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.wave_forecast_data is None:
+        raise HTTPException(status_code=404, detail="Job has no wave forecast data")
+    if method not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of: {', '.join(DOWNSAMPLE_METHODS)}")
     
-    if dateTo:
-        date_to = datetime.fromisoformat(dateTo.replace('Z', '+00:00'))
-        filtered_jobs = [job for job in filtered_jobs if job.created_at <= date_to]
+    etag = job_etag(job)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
     
-    # Sort by creation date (newest first)
-    filtered_jobs.sort(key=lambda job: job.created_at, reverse=True)
+    try:
+        lo, hi = job.wave_forecast_data.data.window(
+            parse_time(start) if start else None,
+            parse_time(end) if end else None,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid start or end time")
     
-    return filtered_jobs
+    series = job.wave_forecast_data.data
+    indices = series.downsample(lo, hi, points, method)
+    return JSONResponse({
+        "location": job.wave_forecast_data.location,
+        "unit": job.wave_forecast_data.unit,
+        "total": len(series),
+        "stats": series.stats(lo, hi),
+        "data": series.entries(indices),
+    }, headers={"ETag": etag})
 
-@app.get("/api/jobs/{job_id}", response_model=Job)
-async def get_job(job_id: str):
+@app.get("/api/jobs/{job_id}/dependents")
+async def get_job_dependents(
+    job_id: str,
+    projection: Projection = Depends(job_projection),
+    if_none_match: Optional[str] = Header(None)
+):
     if job_id not in jobs_db:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return jobs_db[job_id]
+    etag = store_etag()
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    jobs = jobs_db.get_dependents(job_id, depth=projection.trigger_depth)
+    return jobs_response(jobs, projection, {"ETag": etag})
 
-@app.post("/api/jobs", response_model=Job)
-async def create_job(payload: CreateJobPayload):
+@app.post("/api/jobs")
+async def create_job(payload: CreateJobPayload, projection: Projection = Depends(job_projection)):
     job_id = f"job_{uuid.uuid4().hex[:10]}"
     
     # Validate pipeline exists
@@ -191,37 +570,438 @@ async def create_job(payload: CreateJobPayload):
         pipeline=pipelines_db[payload.pipeline_id]
     )
     
-    jobs_db[job_id] = new_job
-    return new_job
+    jobs_db.add(new_job)
+    # Listeners (the executor, the result cache) may have moved it on already
+    job = jobs_db.get(job_id, depth=projection.trigger_depth) or new_job
+    return job_response(job, projection, {"ETag": job_etag(job)})
 
-@app.post("/api/jobs/{job_id}/retry", response_model=Job)
-async def retry_job(job_id: str):
-    if job_id not in jobs_db:
+@app.post("/api/jobs/batch", response_model=CreateJobBatchResult)
+async def create_job_batch(payload: CreateJobBatchPayload):
+    items = payload.jobs
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {MAX_BATCH_SIZE} jobs")
+    
+    # Resolve client-side keys to positions in the batch
+    index_by_key: Dict[str, int] = {}
+    for i, item in enumerate(items):
+        if item.key is not None:
+            if item.key in index_by_key:
+                raise HTTPException(status_code=400, detail=f"jobs[{i}]: Duplicate key {item.key}")
+            index_by_key[item.key] = i
+    
+    # Validate every job in one pass, looking each pipeline and existing trigger up once
+    pipelines: Dict[str, Pipeline] = {}
+    existing: Dict[str, Job] = {}
+    batch_triggers: List[List[int]] = []
+    for i, item in enumerate(items):
+        if item.pipeline_id not in pipelines:
+            pipeline = pipelines_db.get(item.pipeline_id)
+            if pipeline is None:
+                raise HTTPException(status_code=400, detail=f"jobs[{i}]: Pipeline {item.pipeline_id} not found")
+            pipelines[item.pipeline_id] = pipeline
+        
+        for trigger_id in item.trigger_ids or ():
+            if trigger_id not in existing:
+                trigger = jobs_db.get(trigger_id)
+                if trigger is None:
+                    raise HTTPException(status_code=400, detail=f"jobs[{i}]: Trigger job {trigger_id} not found")
+                existing[trigger_id] = trigger
+        
+        positions = []
+        for key in item.trigger_keys or ():
+            if key not in index_by_key:
+                raise HTTPException(status_code=400, detail=f"jobs[{i}]: Trigger key {key} not found in batch")
+            positions.append(index_by_key[key])
+        batch_triggers.append(positions)
+    
+    # Order the batch so triggers are created before their dependents
+    order = topological_order(range(len(items)), batch_triggers.__getitem__)
+    if len(order) < len(items):
+        cycle = find_cycle(range(len(items)), batch_triggers.__getitem__)
+        path = " -> ".join(items[i].key for i in cycle + cycle[:1])
+        raise HTTPException(status_code=400, detail=f"Trigger keys form a cycle: {path}")
+    
+    # Build every job, then insert them all at once
+    ids = [f"job_{uuid.uuid4().hex[:10]}" for _ in items]
+    jobs: List[Optional[Job]] = [None] * len(items)
+    now = datetime.now()
+    for i in order:
+        item = items[i]
+        triggers = [existing[t] for t in item.trigger_ids or ()]
+        triggers.extend(jobs[position] for position in batch_triggers[i])
+        jobs[i] = Job(
+            id=ids[i],
+            pipeline_id=item.pipeline_id,
+            type=item.type,
+            status=JobStatus.PENDING,
+            created_at=now,
+            updated_at=now,
+            args=item.args,
+            triggers=triggers,
+            pipeline=pipelines[item.pipeline_id]
+        )
+    
+    jobs_db.add_many([jobs[i] for i in order])
+    
+    return CreateJobBatchResult(
+        ids=ids,
+        keys={item.key: ids[i] for i, item in enumerate(items) if item.key is not None}
+    )
+
+@app.post("/api/jobs/bulk", response_model=BulkJobResult)
+async def bulk_update_jobs(payload: BulkJobPayload):
+    if (payload.ids is None) == (payload.filter is None):
+        raise HTTPException(status_code=400, detail="Provide either ids or filter")
+    
+    results: List[BulkJobOutcome] = []
+    
+    if payload.ids is not None:
+        if len(payload.ids) > MAX_BULK_SIZE:
+            raise HTTPException(status_code=400, detail=f"Bulk request exceeds {MAX_BULK_SIZE} jobs")
+        jobs = []
+        for job_id in dict.fromkeys(payload.ids):
+            job = jobs_db.get(job_id)
+            if job is None:
+                results.append(BulkJobOutcome(id=job_id, outcome="not_found"))
+            else:
+                jobs.append(job)
+    else:
+        f = payload.filter
+        # Search values the index cannot hold would be dropped and widen the filter
+        if f.error is not None and not words(f.error):
+            raise HTTPException(status_code=400, detail="error filter has no words to search for")
+        if f.args and len(set(arg_terms(f.args))) < len(f.args):
+            raise HTTPException(status_code=400, detail="args filter values must be strings, numbers, booleans or null")
+        criteria = (f.type, f.status, f.pipeline_id, f.dateFrom, f.dateTo, f.args, f.error)
+        if not any(criteria) and not f.all:
+            raise HTTPException(status_code=400, detail='Filter has no criteria; set "all": true to act on every job')
+        
+        # Same indexed lookup as GET /api/jobs, without the page limit
+        jobs = jobs_db.query(
+            type=f.type,
+            status=f.status,
+            pipeline_id=f.pipeline_id,
+            date_from=parse_date(f.dateFrom) if f.dateFrom else None,
+            date_to=parse_date(f.dateTo) if f.dateTo else None,
+            limit=MAX_BULK_SIZE + 1,
+            args=f.args,
+            error=f.error,
+        )
+        if len(jobs) > MAX_BULK_SIZE:
+            raise HTTPException(status_code=400, detail=f"Filter matches more than {MAX_BULK_SIZE} jobs")
+    
+    if payload.action == BulkAction.DELETE:
+        jobs_db.remove_many([job.id for job in jobs])
+        results.extend(BulkJobOutcome(id=job.id, outcome="deleted") for job in jobs)
+    else:
+        if payload.action == BulkAction.RETRY:
+            allowed, target, outcome = RETRYABLE, JobStatus.PENDING, "retried"
+        else:
+            allowed, target, outcome = CANCELLABLE, JobStatus.CANCELLED, "cancelled"
+        
+        eligible = [job for job in jobs if job.status in allowed]
+        for job in jobs:
+            if job.status not in allowed:
+                results.append(BulkJobOutcome(id=job.id, outcome="skipped", detail=f"Job is {job.status.value}"))
+        
+        jobs_db.update_status_many(eligible, target)
+        results.extend(BulkJobOutcome(id=job.id, outcome=outcome) for job in eligible)
+    
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result.outcome] = counts.get(result.outcome, 0) + 1
+    
+    return BulkJobResult(action=payload.action, counts=counts, results=results)
+
+@app.post("/api/jobs/{job_id}/retry")
+async def retry_job(
+    job_id: str,
+    projection: Projection = Depends(job_projection),
+    if_match: Optional[str] = Header(None)
+):
+    job = jobs_db.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs_db[job_id]
+    check_if_match(if_match, job_etag(job))
     
-    # Only failed or pending jobs can be retried
-    if job.status not in [JobStatus.FAILED, JobStatus.PENDING]:
-        raise HTTPException(status_code=400, detail="Only failed or pending jobs can be retried")
+    # Only failed, pending or cancelled jobs can be retried
+    if job.status not in RETRYABLE:
+        raise HTTPException(status_code=400, detail="Only failed, pending or cancelled jobs can be retried")
     
     # Update job status to pending
-    job.status = JobStatus.PENDING
-    job.updated_at = datetime.now()
-    job.error_message = None
+    jobs_db.update_status(job, JobStatus.PENDING)
+    job = jobs_db.get(job_id, depth=projection.trigger_depth) or job
     
-    return job
+    return job_response(job, projection, {"ETag": job_etag(job)})
+
+@app.get("/api/events")
+async def stream_events(
+    request: Request,
+    job_id: Optional[str] = None,
+    pipeline_id: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    # EventSource resends the last id it saw as Last-Event-ID when it reconnects
+    if since is None and last_event_id:
+        since = last_event_id
+    try:
+        subscription = change_feed.subscribe(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID or since")
+
+    def format_event(seq: int, data: Dict[str, Any]) -> str:
+        return f"id: {change_feed.event_id(seq)}\nevent: {data['event']}\ndata: {json.dumps(data)}\n\n"
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            if subscription.reset:
+                # Too far behind to replay, or from another run; the client should refetch its data
+                yield f"id: {change_feed.event_id(change_feed.seq)}\nevent: reset\ndata: {{}}\n\n"
+            else:
+                for seq, data in subscription.backlog:
+                    if matches(data, job_id, pipeline_id, status):
+                        yield format_event(seq, data)
+
+            while not subscription.lagged:
+                try:
+                    seq, data = await asyncio.wait_for(subscription.queue.get(), timeout=EVENT_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if matches(data, job_id, pipeline_id, status):
+                    yield format_event(seq, data)
+        finally:
+            change_feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/stats")
+async def get_stats(histogram: str = "hour"):
+    if histogram not in HISTOGRAMS:
+        raise HTTPException(status_code=400, detail=f"histogram must be one of: {', '.join(HISTOGRAMS)}")
+    return job_stats.summary(histogram)
+
+@app.get("/api/cache")
+async def get_cache_stats():
+    return response_cache.stats()
+
+@app.get("/api/result-cache")
+async def get_result_cache_stats():
+    return result_cache.stats()
+
+@app.delete("/api/result-cache")
+async def clear_result_cache():
+    # Later jobs run again; jobs already completed keep the results they were given
+    result_cache.clear()
+    return result_cache.stats()
+
+@app.get("/api/queue")
+async def get_queue_stats():
+    return {
+        **ready_jobs.stats(),
+        "running": len(executor.running) if executor is not None else 0,
+        "leased": len(leases.leases),
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/api/profiler")
+async def get_profiler():
+    return profiler.status()
+
+@app.post("/api/profiler")
+async def set_profiler(settings: ProfilerSettings):
+    if settings.enabled:
+        # Called on the event loop thread, which is the one that gets sampled
+        profiler.start(
+            settings.interval_ms / 1000 if settings.interval_ms else None,
+            settings.threshold_ms / 1000 if settings.threshold_ms is not None else None,
+        )
+    else:
+        profiler.stop()
+    return profiler.status()
+
+@app.get("/api/profiler/profile")
+async def get_profile(reset: bool = False):
+    body = profiler.folded()
+    if reset:
+        profiler.reset()
+    return Response(body, media_type="text/plain")
+
+def require_retention() -> Retention:
+    if retention is None:
+        raise HTTPException(status_code=404, detail="Retention is not enabled (set ARCHIVE_DIR)")
+    return retention
+
+def archived_job_data(row: Dict[str, Any], projection: Projection) -> Dict[str, Any]:
+    # Archived triggers may be gone from both tiers, so the stored ids are returned as they are
+    job = Job.model_validate({**row, "triggers": []})
+    data = project_job(job, projection)
+    if projection.with_trigger_ids:
+        data["trigger_ids"] = row["trigger_ids"]
+    return data
+
+def archive_projection(projection: Projection = Depends(job_projection)) -> Projection:
+    if projection.expand:
+        raise HTTPException(status_code=400, detail="Archived jobs cannot expand triggers or pipelines")
+    return projection
+
+@app.get("/api/retention")
+async def get_retention(retention: Retention = Depends(require_retention)):
+    return await retention.status()
+
+@app.post("/api/retention/run")
+async def run_retention(retention: Retention = Depends(require_retention)):
+    return await retention.run_pass()
+
+@app.get("/api/archive/jobs")
+async def get_archived_jobs(
+    pipeline_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    projection: Projection = Depends(archive_projection),
+    retention: Retention = Depends(require_retention)
+):
+    limit = min(limit, MAX_PAGE_SIZE)
+    rows = await asyncio.to_thread(
+        retention.archive.query, pipeline_id, decode_cursor(cursor) if cursor else None, limit + 1
+    )
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor((datetime.fromisoformat(last["created_at"]), last["id"]))
+
+    return JSONResponse([archived_job_data(row, projection) for row in rows], headers=headers)
+
+@app.get("/api/archive/jobs/{job_id}")
+async def get_archived_job(
+    job_id: str,
+    projection: Projection = Depends(archive_projection),
+    retention: Retention = Depends(require_retention)
+):
+    row = await asyncio.to_thread(retention.archive.get, job_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Job not found in the archive")
+    return JSONResponse(archived_job_data(row, projection))
+
+def lease_seconds(requested: Optional[float]) -> float:
+    return min(requested or LEASE_SECONDS, MAX_LEASE_SECONDS)
+
+def lease_expiry(seconds: float) -> str:
+    return (datetime.now() + timedelta(seconds=seconds)).isoformat()
+
+@app.post("/api/workers/claim")
+async def claim_jobs(payload: ClaimJobsPayload):
+    seconds = lease_seconds(payload.lease_seconds)
+    jobs = leases.claim(
+        payload.worker_id,
+        payload.types or list(JobType),
+        min(payload.max_jobs, MAX_CLAIM),
+        seconds,
+    )
+    return JSONResponse({
+        "lease_expires_at": lease_expiry(seconds),
+        "jobs": [project_job(job) for job in jobs],
+    })
+
+@app.post("/api/workers/heartbeat")
+async def heartbeat(payload: HeartbeatPayload):
+    seconds = lease_seconds(payload.lease_seconds)
+    extended, lost = leases.heartbeat(payload.worker_id, payload.job_ids, seconds)
+    return {"lease_expires_at": lease_expiry(seconds), "extended": extended, "lost": lost}
+
+@app.post("/api/jobs/{job_id}/complete")
+async def complete_job(job_id: str, payload: CompleteJobPayload):
+    try:
+        job = leases.complete(payload.worker_id, job_id, payload.wave_forecast_data)
+    except LeaseError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return job_response(job, headers={"ETag": job_etag(job)})
+
+@app.post("/api/jobs/{job_id}/fail")
+async def fail_job(job_id: str, payload: FailJobPayload):
+    try:
+        job = leases.fail(payload.worker_id, job_id, payload.error_message)
+    except LeaseError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return job_response(job, headers={"ETag": job_etag(job)})
 
 @app.get("/api/pipelines", response_model=List[Pipeline])
-async def get_pipelines():
+async def get_pipelines(response: Response, if_none_match: Optional[str] = Header(None)):
+    etag = f'"{STORE_EPOCH}-{pipelines_db.version}"'
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    response.headers["ETag"] = etag
     return list(pipelines_db.values())
 
 @app.get("/api/pipelines/{pipeline_id}", response_model=Pipeline)
-async def get_pipeline(pipeline_id: str):
-    if pipeline_id not in pipelines_db:
+async def get_pipeline(pipeline_id: str, response: Response, if_none_match: Optional[str] = Header(None)):
+    pipeline = pipelines_db.get(pipeline_id)
+    if pipeline is None:
         raise HTTPException(status_code=404, detail=f"Pipeline with ID {pipeline_id} not found")
     
-    return pipelines_db[pipeline_id]
+    etag = pipeline_etag(pipeline)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    response.headers["ETag"] = etag
+    return pipeline
+
+@app.get("/api/pipelines/{pipeline_id}/stats")
+async def get_pipeline_stats(pipeline_id: str):
+    if pipeline_id not in pipelines_db:
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    return job_stats.pipeline_summary(pipeline_id)
+
+@app.get("/api/pipelines/{pipeline_id}/graph")
+async def get_pipeline_graph(pipeline_id: str, if_none_match: Optional[str] = Header(None)):
+    if pipeline_id not in pipelines_db:
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    
+    graph = pipeline_graphs.get(pipeline_id)
+    etag = f'"{STORE_EPOCH}-{pipeline_id}-{graph.version}"'
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    body = dumps(pipeline_graphs.analyze(pipeline_id))
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+@app.get("/api/jobs/{job_id}/blast-radius")
+async def get_blast_radius(job_id: str):
+    job = jobs_db.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    graph = pipeline_graphs.get(job.pipeline_id)
+    affected = graph.blast_radius(job_id)
+    by_status: Dict[str, int] = {}
+    for dependent_id in affected:
+        status = graph.nodes[dependent_id].status.value
+        by_status[status] = by_status.get(status, 0) + 1
+    return {
+        "job_id": job_id,
+        "pipeline_id": job.pipeline_id,
+        "status": job.status.value,
+        "dependents": affected,
+        "by_status": by_status,
+    }
 
 @app.post("/api/pipelines", response_model=Pipeline)
 async def create_pipeline(payload: CreatePipelinePayload):
@@ -238,20 +1018,19 @@ async def create_pipeline(payload: CreatePipelinePayload):
         metadata=payload.metadata
     )
     
-    pipelines_db[pipeline_id] = new_pipeline
+    pipelines_db.add(new_pipeline)
     return new_pipeline
 
 @app.delete("/api/jobs/{job_id}")
-async def delete_job(job_id: str):
-    if job_id not in jobs_db:
+async def delete_job(job_id: str, if_match: Optional[str] = Header(None)):
+    job = jobs_db.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Remove job from other jobs' triggers
-    for other_job in jobs_db.values():
-        other_job.triggers = [t for t in other_job.triggers if t.id != job_id]
+    check_if_match(if_match, job_etag(job))
     
-    # Delete the job
-    del jobs_db[job_id]
+    # Delete the job; the store also drops it from its dependents' triggers
+    jobs_db.remove(job_id)
     
     return {"message": "Job deleted successfully"}
 
@@ -279,9 +1058,35 @@ async def root():
             "endpoints": [
                 {"method": "GET", "path": "/api/jobs", "description": "Get all jobs (with optional filters)"},
                 {"method": "GET", "path": "/api/jobs/{job_id}", "description": "Get a specific job by ID"},
+                {"method": "GET", "path": "/api/jobs/export", "description": "Stream matching jobs as NDJSON or CSV"},
                 {"method": "POST", "path": "/api/jobs", "description": "Create a new job"},
+                {"method": "POST", "path": "/api/jobs/batch", "description": "Create many jobs in one request"},
+                {"method": "POST", "path": "/api/jobs/bulk", "description": "Retry, cancel or delete many jobs by id or filter"},
                 {"method": "POST", "path": "/api/jobs/{job_id}/retry", "description": "Retry a failed job"},
-                {"method": "DELETE", "path": "/api/jobs/{job_id}", "description": "Delete a job"}
+                {"method": "GET", "path": "/api/jobs/{job_id}/dependents", "description": "Get the jobs triggered by a job"},
+                {"method": "GET", "path": "/api/jobs/{job_id}/wave-forecast", "description": "Slice, downsample and summarize a job's wave forecast"},
+                {"method": "DELETE", "path": "/api/jobs/{job_id}", "description": "Delete a job"},
+                {"method": "GET", "path": "/api/events", "description": "Stream job changes (Server-Sent Events)"},
+                {"method": "GET", "path": "/api/stats", "description": "Job counts, failure rates and activity histograms"},
+                {"method": "GET", "path": "/api/pipelines/{pipeline_id}/stats", "description": "Job counts for one pipeline"},
+                {"method": "GET", "path": "/api/pipelines/{pipeline_id}/graph", "description": "A pipeline's trigger graph: order, ready and blocked jobs, cycles, critical path"},
+                {"method": "GET", "path": "/api/jobs/{job_id}/blast-radius", "description": "Every job in the pipeline that depends on a job"},
+                {"method": "GET", "path": "/api/cache", "description": "Response cache hit rate and memory use"},
+                {"method": "GET", "path": "/api/result-cache", "description": "Result cache hit rate, coalescing and memory use"},
+                {"method": "DELETE", "path": "/api/result-cache", "description": "Forget every cached job result"},
+                {"method": "GET", "path": "/api/queue", "description": "Ready queue depth and wait times per priority class"},
+                {"method": "POST", "path": "/api/workers/claim", "description": "Lease up to N ready jobs to a worker"},
+                {"method": "POST", "path": "/api/workers/heartbeat", "description": "Extend a worker's leases"},
+                {"method": "POST", "path": "/api/jobs/{job_id}/complete", "description": "Report a leased job as completed"},
+                {"method": "POST", "path": "/api/jobs/{job_id}/fail", "description": "Report a leased job as failed"},
+                {"method": "GET", "path": "/metrics", "description": "Prometheus metrics"},
+                {"method": "GET", "path": "/api/profiler", "description": "Slow-request profiler settings and sample counts"},
+                {"method": "POST", "path": "/api/profiler", "description": "Switch the slow-request profiler on or off"},
+                {"method": "GET", "path": "/api/profiler/profile", "description": "Slow-request profile as folded stacks"},
+                {"method": "GET", "path": "/api/retention", "description": "Retention policies and archive size"},
+                {"method": "POST", "path": "/api/retention/run", "description": "Run a retention pass now"},
+                {"method": "GET", "path": "/api/archive/jobs", "description": "Archived jobs, optionally of one pipeline"},
+                {"method": "GET", "path": "/api/archive/jobs/{job_id}", "description": "Get an archived job by ID"}
             ],
             "frontend_url": "http://localhost:5000"
         }
@@ -0,0 +1,184 @@
+"""
+Cold storage for jobs that retention has moved out of the live store.
+
+Archived jobs live in a SQLite file. Each row holds the job in the journal's
+format as zlib-compressed JSON, indexed by id and by (pipeline, creation time), so
+a single job or one pipeline's history can be read back without decompressing
+anything else.
+"""
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from server.journal import dump_job
+from server.models import Job, JobStatus, JobType
+from server.store import SortKey
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive_meta (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS archived_jobs (
+    id TEXT PRIMARY KEY,
+    pipeline_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    archived_at TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS archived_jobs_pipeline_idx ON archived_jobs (pipeline_id, created_at, id);
+CREATE INDEX IF NOT EXISTS archived_jobs_created_idx ON archived_jobs (created_at, id);
+"""
+
+# Rows are a few hundred bytes each, too little for zlib to find much repetition
+# within one. A preset dictionary of the text every job shares makes up for it: the
+# field names in the order the journal writes them and every type and status. It
+# holds no sample values or dates, which would stop matching as data and time move
+# on. The dictionary is saved in the archive file when it is created, so changing
+# this only affects new archives.
+_FORECAST = '{"data":{"time":[],"height":[],"period":[],"direction":[],"labels":[]},"location":"","unit":""}'
+_EMPTY = {
+    "id": '"job_"',
+    "pipeline_id": '"pipeline_"',
+    "error_message": "null",
+    "args": "{}",
+    "result_job_id": "null",
+    "version": "1",
+}
+_SKELETON = ",".join(
+    f'"{name}":' + _EMPTY.get(name, '""')
+    for name in Job.model_fields
+    if name not in ("triggers", "pipeline", "wave_forecast_data")
+)
+ZDICT = (
+    # zlib reaches the end of the dictionary most cheaply, so the most common text goes last
+    "".join(f'"type":"{job_type.value}",' for job_type in JobType)
+    + "".join(f'"status":"{status.value}",' for status in JobStatus)
+    + f'"wave_forecast_data":{_FORECAST},'
+    + "{" + _SKELETON + ',"wave_forecast_data":null,"trigger_ids":["job_"]}'
+).encode()
+COMPRESSION_LEVEL = 6
+
+
+def _timestamp(value: datetime) -> str:
+    return value.isoformat(timespec="microseconds")
+
+
+class JobArchive:
+    """Compressed, append-mostly job storage on disk.
+
+    Writes come from the retention task's worker thread and reads from request
+    handlers, so the connection is shared behind a lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        row = self.conn.execute("SELECT value FROM archive_meta WHERE key = 'zdict'").fetchone()
+        if row is None:
+            self.conn.execute("INSERT INTO archive_meta (key, value) VALUES ('zdict', ?)", (ZDICT,))
+            self.zdict = ZDICT
+        else:
+            self.zdict = bytes(row[0])
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM archived_jobs").fetchone()[0]
+
+    def __contains__(self, job_id: str) -> bool:
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM archived_jobs WHERE id = ?", (job_id,)).fetchone() is not None
+
+    # Encoding
+
+    def _compress(self, data: Dict[str, Any]) -> bytes:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=self.zdict)
+        raw = json.dumps(data, separators=(",", ":")).encode()
+        return compressor.compress(raw) + compressor.flush()
+
+    def _decompress(self, blob: bytes) -> Dict[str, Any]:
+        decompressor = zlib.decompressobj(zdict=self.zdict)
+        return json.loads(decompressor.decompress(blob) + decompressor.flush())
+
+    # Writes
+
+    def put_many(self, jobs: List[Job]) -> int:
+        """Store the jobs, replacing earlier copies; returns the compressed size in bytes"""
+        now = _timestamp(datetime.now())
+        rows = [
+            (job.id, job.pipeline_id, _timestamp(job.created_at), now, self._compress(dump_job(job)))
+            for job in jobs
+        ]
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO archived_jobs (id, pipeline_id, created_at, archived_at, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+        return sum(len(row[4]) for row in rows)
+
+    def discard_many(self, job_ids: List[str]):
+        with self.lock:
+            self.conn.executemany("DELETE FROM archived_jobs WHERE id = ?", [(job_id,) for job_id in job_ids])
+
+    # Reads
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The archived job in the journal's format (trigger ids, compact forecast), or None"""
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM archived_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decompress(row[0]) if row else None
+
+    def query(
+        self,
+        pipeline_id: Optional[str] = None,
+        before: Optional[SortKey] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Archived jobs newest first, optionally of one pipeline, after a (created_at, id) cursor"""
+        clauses = []
+        params: List[Any] = []
+        if pipeline_id:
+            clauses.append("pipeline_id = ?")
+            params.append(pipeline_id)
+        if before is not None:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend((_timestamp(before[0]), before[1]))
+
+        sql = "SELECT data FROM archived_jobs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._decompress(row[0]) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        files = [self.path, self.path + "-wal"]
+        return {
+            "jobs": len(self),
+            "file_bytes": sum(os.path.getsize(path) for path in files if os.path.exists(path)),
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,122 @@
+import json
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Hashable, Iterable, Set, Tuple
+
+from server.models import Job, Pipeline
+from server.projection import COMPACT, Projection, project_job, projection_dependencies
+from server.store import JOB_ADDED, JOB_REMOVED, JOB_STATUS, JOB_TRIGGERS, PIPELINE_ADDED
+
+try:
+    import orjson
+
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value)
+except ImportError:  # orjson is optional; the standard library is just slower
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+# Default memory budget for cached job fragments
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+CacheKey = Tuple[str, int, Hashable]
+
+
+class ResponseCache:
+    """LRU cache of pre-encoded JSON for projected jobs.
+
+    Entries are keyed by job id, version and projection, so a caller holding an
+    out-of-date copy of a job never serves or stores it under the current version.
+    Each entry remembers every job and pipeline whose data it embeds (the job itself,
+    expanded triggers, expanded pipelines), and the cache listens to the stores so a
+    change to any of them drops exactly the entries that contain it. List responses
+    are assembled by joining cached fragments, so an unchanged job is never
+    serialized twice.
+
+    Size is bounded by the total length of the cached fragments.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[CacheKey, Tuple[bytes, Set[str], Set[str]]]" = OrderedDict()
+        self.by_job: Dict[str, Set[CacheKey]] = defaultdict(set)
+        self.by_pipeline: Dict[str, Set[CacheKey]] = defaultdict(set)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # Rendering
+
+    def render(self, job: Job, projection: Projection = COMPACT) -> bytes:
+        key = (job.id, job.version, projection.key)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        body = dumps(project_job(job, projection))
+        job_ids, pipeline_ids = projection_dependencies(job, projection)
+        self._store(key, body, job_ids, pipeline_ids)
+        return body
+
+    def render_many(self, jobs: Iterable[Job], projection: Projection = COMPACT) -> bytes:
+        return b"[" + b",".join(self.render(job, projection) for job in jobs) + b"]"
+
+    def _store(self, key: CacheKey, body: bytes, job_ids: Set[str], pipeline_ids: Set[str]):
+        if len(body) > self.max_bytes:
+            return
+        self.entries[key] = (body, job_ids, pipeline_ids)
+        self.bytes += len(body)
+        for job_id in job_ids:
+            self.by_job[job_id].add(key)
+        for pipeline_id in pipeline_ids:
+            self.by_pipeline[pipeline_id].add(key)
+
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: CacheKey):
+        body, job_ids, pipeline_ids = self.entries.pop(key)
+        self.bytes -= len(body)
+        for index, ids in ((self.by_job, job_ids), (self.by_pipeline, pipeline_ids)):
+            for item_id in ids:
+                keys = index.get(item_id)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[item_id]
+
+    # Invalidation
+
+    def listener(self, event: str, item: Any, previous: Any = None):
+        if isinstance(item, Job) and event in (JOB_ADDED, JOB_STATUS, JOB_TRIGGERS, JOB_REMOVED):
+            self.invalidate(self.by_job.get(item.id))
+        elif isinstance(item, Pipeline) and event == PIPELINE_ADDED:
+            self.invalidate(self.by_pipeline.get(item.id))
+
+    def invalidate(self, keys: Iterable[CacheKey]):
+        for key in list(keys or ()):
+            if key in self.entries:
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self):
+        self.invalidate(list(self.entries))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
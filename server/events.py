@@ -0,0 +1,123 @@
+import asyncio
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from server.models import Job, Pipeline
+from server.store import JOB_STATUS, JOB_TRIGGERS
+
+Event = Tuple[int, Dict[str, Any]]
+
+
+class Subscription:
+    """One connected client: the events it missed plus a queue of live ones"""
+
+    def __init__(self, backlog: List[Event], reset: bool, max_queue: int):
+        self.backlog = backlog
+        # The requested sequence number has already left the replay buffer
+        self.reset = reset
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        # Set when the client fell too far behind; it must reconnect and resume
+        self.lagged = False
+
+
+class ChangeFeed:
+    """In-process pub/sub bus of job and pipeline changes.
+
+    Subscribed to the stores, so every create, status transition, trigger change and
+    delete is published with a monotonically increasing sequence number. The most
+    recent ``history`` events are kept so a reconnecting client can resume from the
+    last sequence number it saw instead of refetching everything.
+
+    Sequence numbers start over in every process, so event ids carry the feed's
+    ``epoch`` as well (``"<epoch>-<seq>"``). An id from another run or another worker
+    process cannot be resumed from and gets a reset instead.
+
+    Publishing happens on the event loop thread, like every store write.
+    """
+
+    def __init__(self, history: int = 10000, max_queue: int = 1000, epoch: Optional[str] = None):
+        self.epoch = epoch or uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.history: Deque[Event] = deque(maxlen=history)
+        self.max_queue = max_queue
+        self.subscribers: Set[Subscription] = set()
+
+    def listener(self, event: str, item: Any, previous: Any = None):
+        if isinstance(item, Job):
+            data = {
+                "event": event,
+                "job_id": item.id,
+                "pipeline_id": item.pipeline_id,
+                "type": item.type.value,
+                "status": item.status.value,
+                "updated_at": item.updated_at.isoformat(),
+                "version": item.version,
+            }
+            if event == JOB_STATUS:
+                data["previous_status"] = previous.value
+            elif event == JOB_TRIGGERS:
+                data["trigger_ids"] = [trigger.id for trigger in item.triggers]
+        elif isinstance(item, Pipeline):
+            data = {
+                "event": event,
+                "pipeline_id": item.id,
+                "status": item.status.value,
+                "updated_at": item.updated_at.isoformat(),
+            }
+        else:
+            return
+
+        self.publish(data)
+
+    def publish(self, data: Dict[str, Any]):
+        self.seq += 1
+        event = (self.seq, data)
+        self.history.append(event)
+
+        for subscription in list(self.subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Never let one slow client hold events for everyone else
+                subscription.lagged = True
+                self.subscribers.discard(subscription)
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def subscribe(self, since: Optional[str] = None) -> Subscription:
+        """Subscribe to live events, replaying those after the event id ``since``.
+
+        ``since`` may also be a bare sequence number; without an epoch it cannot be
+        told apart from a number of another run, so it is only trusted while below
+        the current one. Raises ValueError if ``since`` is not an event id.
+        """
+        backlog: List[Event] = []
+        reset = False
+        if since is not None:
+            epoch, _, number = since.rpartition("-")
+            seq = int(number)
+            if (epoch and epoch != self.epoch) or seq > self.seq or (not epoch and seq >= self.seq):
+                reset = True
+            elif seq < self.seq:
+                oldest = self.history[0][0] if self.history else self.seq + 1
+                reset = seq + 1 < oldest
+                backlog = [event for event in self.history if event[0] > seq]
+
+        subscription = Subscription(backlog, reset, self.max_queue)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+
+def matches(data: Dict[str, Any], job_id: Optional[str], pipeline_id: Optional[str], status: Optional[str]) -> bool:
+    if job_id and data.get("job_id") != job_id:
+        return False
+    if pipeline_id and data.get("pipeline_id") != pipeline_id:
+        return False
+    if status and data.get("status") != status:
+        return False
+    return True
@@ -0,0 +1,142 @@
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Set
+
+from server.handlers import DEFAULT_HANDLERS, Handler, as_result
+from server.models import Job, JobStatus, JobType
+from server.scheduler import ReadyQueue
+from server.store import JOB_REMOVED, JOB_STATUS, JobRepository
+
+
+class Executor:
+    """Runs pending jobs through a handler per job type, honouring the trigger DAG.
+
+    Jobs come from the shared ``ReadyQueue``, which only holds PENDING jobs whose
+    triggers have all COMPLETED and orders them by pipeline priority, age and fair
+    share. The executor is told whenever a job becomes ready, so nothing is ever polled.
+    Being told happens inside the store event that made the job ready, so dispatch is
+    scheduled on the event loop rather than run there: every listener sees a job added
+    or requeued before it sees it start processing.
+
+    Each job type has its own concurrency limit. Coroutine handlers run as tasks on the
+    event loop; CPU-bound handlers run in a shared process pool so they never hold the
+    loop that serves the API.
+    """
+
+    def __init__(
+        self,
+        jobs: JobRepository,
+        ready: ReadyQueue,
+        limits: Dict[str, int],
+        processes: Optional[int] = None,
+        handlers: Optional[Dict[JobType, Handler]] = None,
+    ):
+        self.jobs = jobs
+        self.ready = ready
+        self.limits = {JobType(job_type): limit for job_type, limit in limits.items()}
+        self.processes = processes
+        self.handlers = dict(DEFAULT_HANDLERS if handlers is None else handlers)
+
+        self.active: Dict[JobType, int] = defaultdict(int)
+        self.running: Dict[str, asyncio.Task] = {}
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Job types with a pump scheduled on the event loop
+        self.scheduled: Set[JobType] = set()
+
+    def register(self, job_type: JobType, func, cpu_bound: bool = False):
+        self.handlers[JobType(job_type)] = Handler(func, cpu_bound)
+
+    # Lifecycle
+
+    def start(self):
+        """Start dispatching; must be called from the event loop"""
+        self.loop = asyncio.get_running_loop()
+        if any(handler.cpu_bound for handler in self.handlers.values()):
+            self.pool = ProcessPoolExecutor(max_workers=self.processes)
+        self.jobs.subscribe(self.listener)
+        self.ready.consumers.append(self.pump_soon)
+
+        for job_type in self.handlers:
+            self.pump(job_type)
+
+    def stop(self):
+        self.ready.consumers.remove(self.pump_soon)
+        self.jobs.unsubscribe(self.listener)
+        for task in self.running.values():
+            task.cancel()
+
+        # Interrupted jobs go back to PENDING so the next run picks them up again
+        for job_id in list(self.running):
+            job = self.jobs.get(job_id)
+            if job is not None and job.status == JobStatus.PROCESSING:
+                self.jobs.update_status(job, JobStatus.PENDING)
+        self.running.clear()
+        self.scheduled.clear()
+
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        self.loop = None
+
+    def listener(self, event: str, item: Any, previous: Any = None):
+        task = self.running.get(getattr(item, "id", None))
+        if task is None:
+            return
+        # Cancelled, deleted or otherwise moved on by someone else while running
+        if event == JOB_REMOVED or (event == JOB_STATUS and item.status != JobStatus.PROCESSING):
+            task.cancel()
+
+    # Dispatch
+
+    def pump_soon(self, job_type: JobType):
+        if self.loop is None or job_type not in self.handlers or job_type in self.scheduled:
+            return
+        self.scheduled.add(job_type)
+        self.loop.call_soon(self._scheduled_pump, job_type)
+
+    def _scheduled_pump(self, job_type: JobType):
+        if job_type in self.scheduled:
+            self.scheduled.discard(job_type)
+            self.pump(job_type)
+
+    def pump(self, job_type: JobType):
+        if self.loop is None or job_type not in self.handlers:
+            return
+        limit = self.limits.get(job_type, 1)
+        while self.active[job_type] < limit:
+            job = self.ready.pop(job_type)
+            if job is None:
+                break
+            # Another process serving the same store may have started it first
+            if not self.jobs.transition_many([job], JobStatus.PENDING, JobStatus.PROCESSING):
+                continue
+            self.active[job_type] += 1
+            self.running[job.id] = self.loop.create_task(self.run(job))
+
+    async def run(self, job: Job):
+        handler = self.handlers[job.type]
+        try:
+            if handler.cpu_bound:
+                result = await self.loop.run_in_executor(self.pool, handler.func, job.args)
+            else:
+                result = await handler.func(job.args)
+            result = as_result(result)
+        except asyncio.CancelledError:
+            self.finish(job)
+            return
+        except Exception as exc:
+            self.finish(job)
+            self.jobs.update_status(job, JobStatus.FAILED, str(exc) or type(exc).__name__)
+            return
+
+        self.finish(job)
+        self.jobs.update_status(job, JobStatus.COMPLETED, wave_forecast_data=result)
+
+    def finish(self, job: Job):
+        # Release the slot before writing the outcome, so the status change is not
+        # mistaken for an outside cancellation and dependents can start straight away
+        self.running.pop(job.id, None)
+        self.active[job.type] -= 1
+        self.pump(job.type)
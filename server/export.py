@@ -0,0 +1,75 @@
+import asyncio
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from server.cache import dumps
+from server.models import Job
+from server.projection import EXPANDABLE, Projection, project_job
+from server.store import JobRepository, SortKey, sort_key
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Jobs fetched from the store per step; the only thing an export keeps in memory
+EXPORT_CHUNK = 1000
+
+# CSV columns in model order, for the compact projection
+COLUMNS = [name for name in Job.model_fields if name not in EXPANDABLE] + ["trigger_ids"]
+
+
+async def walk(jobs: JobRepository, filters: Dict[str, Any], chunk: int = EXPORT_CHUNK) -> AsyncIterator[List[Job]]:
+    """Matching jobs newest first, one keyset page at a time.
+
+    Jobs created after the export started sort ahead of the cursor and are never
+    picked up, so the walk always terminates.
+    """
+    before: Optional[SortKey] = None
+    while True:
+        page = jobs.query(**filters, before=before, limit=chunk)
+        if not page:
+            return
+        yield page
+        if len(page) < chunk:
+            return
+        before = sort_key(page[-1])
+        # Let the event loop serve other requests between pages
+        await asyncio.sleep(0)
+
+
+def csv_columns(projection: Projection) -> List[str]:
+    if projection.fields is None:
+        return COLUMNS
+    return [name for name in COLUMNS if name in projection.fields or name == "id"]
+
+
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+async def ndjson_lines(jobs: JobRepository, filters: Dict[str, Any], projection: Projection) -> AsyncIterator[bytes]:
+    async for page in walk(jobs, filters):
+        yield b"".join(dumps(project_job(job, projection)) + b"\n" for job in page)
+
+
+async def csv_lines(jobs: JobRepository, filters: Dict[str, Any], projection: Projection) -> AsyncIterator[bytes]:
+    columns = csv_columns(projection)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    async for page in walk(jobs, filters):
+        for job in page:
+            data = project_job(job, projection)
+            writer.writerow([_cell(data.get(column)) for column in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header only, when nothing matched
+    if buffer.tell():
+        yield buffer.getvalue().encode()
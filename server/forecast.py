@@ -0,0 +1,273 @@
+"""
+Columnar storage for wave forecast series.
+
+A forecast is kept as parallel typed arrays instead of one pydantic object per
+entry: epoch seconds (int64), heights and periods (float64) and directions as
+2-byte codes into a small per-series label table. That is 26 bytes per entry,
+and slicing by time, downsampling and summary stats work on the arrays directly.
+"""
+import calendar
+import math
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+TIME_FORMAT_SECONDS = "%Y-%m-%d %H:%M:%S"
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def parse_time(value: Any) -> int:
+    """Epoch seconds for an entry time; naive times are taken as UTC"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        return calendar.timegm(parsed.utctimetuple())
+    return calendar.timegm(parsed.timetuple())
+
+
+def _epoch_seconds(value: Any) -> int:
+    # Times are stored as int64
+    seconds = parse_time(value)
+    if not -(2 ** 63) <= seconds < 2 ** 63:
+        raise OverflowError(seconds)
+    return seconds
+
+
+def format_time(seconds: int) -> str:
+    return time.strftime(TIME_FORMAT_SECONDS if seconds % 60 else TIME_FORMAT, time.gmtime(seconds))
+
+
+def _field(entry: Any, name: str, convert) -> Any:
+    try:
+        value = entry[name] if isinstance(entry, dict) else getattr(entry, name)
+    except (KeyError, AttributeError):
+        raise ValueError(f"Wave forecast entry is missing {name!r}") from None
+    try:
+        return convert(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Wave forecast entry has an invalid {name!r}: {value!r}") from None
+
+
+def _column(columns: Dict[str, Any], name: str, convert) -> Any:
+    if name not in columns:
+        raise ValueError(f"Wave forecast columns are missing {name!r}")
+    try:
+        return convert(columns[name])
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Wave forecast column {name!r} has invalid values") from None
+
+
+class WaveSeries:
+    """One wave forecast as typed columns, sorted by time"""
+
+    __slots__ = ("times", "heights", "periods", "directions", "labels")
+
+    def __init__(
+        self,
+        times: Optional[array] = None,
+        heights: Optional[array] = None,
+        periods: Optional[array] = None,
+        directions: Optional[array] = None,
+        labels: Optional[List[str]] = None,
+    ):
+        self.times = times if times is not None else array("q")
+        self.heights = heights if heights is not None else array("d")
+        self.periods = periods if periods is not None else array("d")
+        self.directions = directions if directions is not None else array("H")
+        self.labels = labels if labels is not None else []
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, WaveSeries) and self.to_columns() == other.to_columns()
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the series, columns and labels included"""
+        columns = (self.times, self.heights, self.periods, self.directions)
+        return sum(map(sys.getsizeof, columns)) + sys.getsizeof(self.labels) + sum(map(sys.getsizeof, self.labels))
+
+    # Conversion
+
+    @classmethod
+    def coerce(cls, value: Any) -> "WaveSeries":
+        """Accept a series, a list of entries (dicts or models) or the columnar dict.
+
+        Raises ValueError, naming the bad field where it can, for anything else, so
+        pydantic reports it as a validation error.
+        """
+        if isinstance(value, cls):
+            return value
+        try:
+            if isinstance(value, dict):
+                return cls.from_columns(value)
+            if isinstance(value, (list, tuple)):
+                return cls.from_entries(value)
+        except (KeyError, TypeError, IndexError, OverflowError) as exc:
+            raise ValueError(f"Invalid wave forecast data: {exc}") from None
+        raise ValueError("Wave forecast data must be a list of entries")
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Any]) -> "WaveSeries":
+        rows = []
+        for entry in entries:
+            rows.append((
+                _field(entry, "time", _epoch_seconds),
+                _field(entry, "height", float),
+                _field(entry, "period", float),
+                _field(entry, "direction", str),
+            ))
+        rows.sort(key=lambda row: row[0])
+
+        series = cls()
+        codes: Dict[str, int] = {}
+        for seconds, height, period, direction in rows:
+            series.times.append(seconds)
+            series.heights.append(height)
+            series.periods.append(period)
+            code = codes.get(direction)
+            if code is None:
+                code = codes[direction] = len(series.labels)
+                series.labels.append(direction)
+            series.directions.append(code)
+        return series
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Any]) -> "WaveSeries":
+        series = cls(
+            _column(columns, "time", lambda values: array("q", values)),
+            _column(columns, "height", lambda values: array("d", values)),
+            _column(columns, "period", lambda values: array("d", values)),
+            _column(columns, "direction", lambda values: array("H", values)),
+            _column(columns, "labels", lambda values: [str(label) for label in values]),
+        )
+        if not len(series.times) == len(series.heights) == len(series.periods) == len(series.directions):
+            raise ValueError("Wave forecast columns must all have the same length")
+        if series.directions and max(series.directions) >= len(series.labels):
+            raise ValueError("Wave forecast directions must index into labels")
+        if any(a > b for a, b in zip(series.times, series.times[1:])):
+            raise ValueError("Wave forecast times must be sorted")
+        return series
+
+    def to_columns(self) -> Dict[str, Any]:
+        """Compact form used for storage"""
+        return {
+            "time": self.times.tolist(),
+            "height": self.heights.tolist(),
+            "period": self.periods.tolist(),
+            "direction": self.directions.tolist(),
+            "labels": list(self.labels),
+        }
+
+    def entries(self, indices: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """Entries in the API's list form, for all points or just ``indices``"""
+        if indices is None:
+            indices = range(len(self))
+        labels = self.labels
+        return [
+            {
+                "time": format_time(self.times[i]),
+                "height": self.heights[i],
+                "direction": labels[self.directions[i]],
+                "period": self.periods[i],
+            }
+            for i in indices
+        ]
+
+    # Queries
+
+    def window(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[int, int]:
+        """Index range [lo, hi) of the points between ``start`` and ``end`` (inclusive)"""
+        lo = bisect_left(self.times, start) if start is not None else 0
+        hi = bisect_right(self.times, end) if end is not None else len(self)
+        return lo, max(lo, hi)
+
+    def stats(self, lo: int = 0, hi: Optional[int] = None) -> Dict[str, Any]:
+        hi = len(self) if hi is None else hi
+        if lo >= hi:
+            return {"count": 0}
+        heights = self.heights[lo:hi]
+        periods = self.periods[lo:hi]
+        peak = heights.index(max(heights))
+        return {
+            "count": hi - lo,
+            "start": format_time(self.times[lo]),
+            "end": format_time(self.times[hi - 1]),
+            "max_height": heights[peak],
+            "max_height_time": format_time(self.times[lo + peak]),
+            "min_height": min(heights),
+            "mean_height": math.fsum(heights) / len(heights),
+            "mean_period": math.fsum(periods) / len(periods),
+            "max_period": max(periods),
+        }
+
+    def downsample(self, lo: int, hi: int, points: int, method: str = "lttb") -> List[int]:
+        """Indices of at most ``points`` entries in [lo, hi) that keep the series' shape"""
+        if hi - lo <= points:
+            return list(range(lo, hi))
+        if method == "minmax":
+            return self._minmax(lo, hi, points)
+        return self._lttb(lo, hi, points)
+
+    def _minmax(self, lo: int, hi: int, points: int) -> List[int]:
+        # Fixed buckets, keeping the lowest and highest wave of each (two points per bucket)
+        buckets = max(1, points // 2)
+        size = (hi - lo) / buckets
+        heights = self.heights
+        selected = []
+        for b in range(buckets):
+            start = lo + int(b * size)
+            stop = lo + int((b + 1) * size) if b < buckets - 1 else hi
+            if start >= stop:
+                continue
+            chunk = heights[start:stop]
+            low = start + chunk.index(min(chunk))
+            high = start + chunk.index(max(chunk))
+            selected.extend(sorted({low, high}))
+        return selected
+
+    def _lttb(self, lo: int, hi: int, points: int) -> List[int]:
+        # Largest-Triangle-Three-Buckets over (time, height)
+        if points < 3:
+            return [lo, hi - 1][:points]
+        times, heights = self.times, self.heights
+        size = (hi - lo - 2) / (points - 2)
+        selected = [lo]
+        a = lo
+        for b in range(points - 2):
+            start = lo + 1 + int(b * size)
+            stop = lo + 1 + int((b + 1) * size)
+
+            # Average of the next bucket is the third corner of the triangle
+            next_start = stop
+            next_stop = min(lo + 1 + int((b + 2) * size), hi)
+            if next_start >= next_stop:
+                next_start, next_stop = hi - 1, hi
+            count = next_stop - next_start
+            avg_t = sum(times[next_start:next_stop]) / count
+            avg_h = math.fsum(heights[next_start:next_stop]) / count
+
+            at, ah = times[a], heights[a]
+            best, best_area = start, -1.0
+            for i in range(start, stop):
+                area = abs((at - avg_t) * (heights[i] - ah) - (at - times[i]) * (avg_h - ah))
+                if area > best_area:
+                    best, best_area = i, area
+            selected.append(best)
+            a = best
+        selected.append(hi - 1)
+        return selected
+
+
+def compact_forecast(forecast: Any) -> Dict[str, Any]:
+    """Storage form of a ``WaveForecastData``: columns instead of one object per entry.
+
+    ``WaveForecastData.model_validate`` accepts it back unchanged.
+    """
+    return {"data": forecast.data.to_columns(), "location": forecast.location, "unit": forecast.unit}
@@ -0,0 +1,497 @@
+"""
+Trigger graphs of pipelines.
+
+A pipeline's jobs and the triggers between them form a DAG. ``PipelineGraphs``
+builds one pipeline's graph the first time it is asked for, keeps it current from
+store events while it stays cached, and derives from it:
+
+- a topological order (every job after its triggers, older jobs first among equals),
+  along with any cycle that prevents one;
+- the pending jobs that are ready (every trigger completed) and the ones still
+  blocked, with those blocked behind a failed or cancelled job marked as stalled;
+- the critical path: the chain of triggers whose durations add up to the longest
+  time. Finished jobs count their observed duration and unfinished ones the mean
+  duration of completed jobs of their type, so the path estimates what holds up the
+  pipeline;
+- the blast radius of a job: every job in the pipeline that depends on it, directly
+  or through other jobs, and so cannot run while it is failed.
+
+Triggers on jobs of other pipelines count for readiness but are not part of the
+graph. Adding a job appends it to the cached order and a status change only touches
+the job and its dependents; analyses are recomputed, at most once per change, when
+next requested.
+"""
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from server.models import Job, JobStatus, JobType
+from server.store import JOB_ADDED, JOB_REMOVED, JOB_STATUS, JOB_TRIGGERS, GraphNode, JobRepository
+
+# Default number of pipelines whose graph is kept
+DEFAULT_MAX_PIPELINES = 64
+
+# Statuses that keep a job's dependents from ever running until it is retried
+DEAD_ENDS = frozenset({JobStatus.FAILED, JobStatus.CANCELLED})
+
+K = TypeVar("K", bound=Hashable)
+
+
+def topological_order(nodes: Iterable[K], triggers: Callable[[K], Iterable[K]]) -> List[K]:
+    """Kahn's algorithm: the nodes with each one after its triggers.
+
+    Nodes with no ordering between them keep the order they were given in. Triggers
+    that are not among ``nodes`` are ignored. Nodes on a cycle, and everything that
+    depends on one, are left out.
+    """
+    nodes = list(nodes)
+    known = set(nodes)
+    waiting: Dict[K, int] = {}
+    dependents: Dict[K, List[K]] = defaultdict(list)
+    for node in nodes:
+        inside = [trigger for trigger in triggers(node) if trigger in known]
+        waiting[node] = len(inside)
+        for trigger in inside:
+            dependents[trigger].append(node)
+
+    order = [node for node in nodes if waiting[node] == 0]
+    next_ready = 0
+    while next_ready < len(order):
+        for dependent in dependents.get(order[next_ready], ()):
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                order.append(dependent)
+        next_ready += 1
+    return order
+
+
+def find_cycle(nodes: Iterable[K], triggers: Callable[[K], Iterable[K]]) -> List[K]:
+    """A cycle among ``nodes``, each node triggering the next, or [] if there is none"""
+    nodes = list(nodes)
+    unordered = set(nodes) - set(topological_order(nodes, triggers))
+    if not unordered:
+        return []
+    # Every node left over waits on another left-over node; following those triggers
+    # back from any of them must come round to a node already seen
+    node = next(iter(unordered))
+    seen: Dict[K, int] = {}
+    path: List[K] = []
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(trigger for trigger in triggers(node) if trigger in unordered)
+    return list(reversed(path[seen[node]:]))
+
+
+class Node:
+    __slots__ = (
+        "id", "type", "status", "created_at", "updated_at", "started_at", "triggers", "dependents", "unmet",
+    )
+
+    def __init__(self, node: GraphNode):
+        self.id, self.type, self.status, self.created_at, self.updated_at, triggers = node
+        self.triggers: Tuple[str, ...] = tuple(triggers)
+        # Set when the graph saw the job start processing
+        self.started_at: Optional[datetime] = None
+        self.dependents: Set[str] = set()
+        self.unmet = 0
+
+
+class PipelineGraph:
+    """The trigger graph of one pipeline, with analyses cached until the next change"""
+
+    def __init__(
+        self,
+        pipeline_id: str,
+        nodes: Iterable[GraphNode],
+        external: Dict[str, Tuple[JobStatus, datetime]],
+    ):
+        self.pipeline_id = pipeline_id
+        self.nodes: Dict[str, Node] = {}
+        # Triggers in other pipelines -> their status and last update. Entries are kept
+        # until the graph is dropped, even once no job here triggers on them any more.
+        self.external = external
+        self.ready: Set[str] = set()
+        self.blocked: Set[str] = set()
+        # Set by PipelineGraphs on every change
+        self.version = 0
+        self._order: Optional[List[str]] = None
+        self._analysis: Optional[Dict[str, Any]] = None
+
+        for node in sorted((Node(row) for row in nodes), key=lambda n: (n.created_at, n.id)):
+            self.nodes[node.id] = node
+        for node in self.nodes.values():
+            self._link(node)
+
+    # Structure
+
+    def _link(self, node: Node):
+        for trigger_id in node.triggers:
+            trigger = self.nodes.get(trigger_id)
+            if trigger is not None:
+                trigger.dependents.add(node.id)
+        self._classify(node)
+
+    def _unlink(self, node: Node):
+        for trigger_id in node.triggers:
+            trigger = self.nodes.get(trigger_id)
+            if trigger is not None:
+                trigger.dependents.discard(node.id)
+        self.ready.discard(node.id)
+        self.blocked.discard(node.id)
+
+    def status_of(self, job_id: str) -> Optional[JobStatus]:
+        node = self.nodes.get(job_id)
+        if node is not None:
+            return node.status
+        external = self.external.get(job_id)
+        return external[0] if external is not None else None
+
+    def _classify(self, node: Node):
+        # Triggers that no longer exist do not block, as in the ready queue
+        node.unmet = sum(
+            1 for trigger_id in node.triggers
+            if self.status_of(trigger_id) not in (None, JobStatus.COMPLETED)
+        )
+        self.ready.discard(node.id)
+        self.blocked.discard(node.id)
+        if node.status == JobStatus.PENDING:
+            (self.blocked if node.unmet else self.ready).add(node.id)
+
+    def _changed(self):
+        self._analysis = None
+
+    def add(self, job: Job):
+        node = Node((job.id, job.type, job.status, job.created_at, job.updated_at, tuple(t.id for t in job.triggers)))
+        self.nodes[node.id] = node
+        self._link(node)
+        # Its triggers were already in the store, so it can go last
+        if self._order is not None:
+            self._order.append(node.id)
+        self._changed()
+
+    def remove(self, job_id: str):
+        node = self.nodes.pop(job_id, None)
+        if node is None:
+            return
+        self._unlink(node)
+        for dependent_id in node.dependents:
+            self._classify(self.nodes[dependent_id])
+        if self._order is not None:
+            self._order.remove(job_id)
+        self._changed()
+
+    def set_triggers(self, job_id: str, trigger_ids: Tuple[str, ...]):
+        node = self.nodes.get(job_id)
+        if node is None:
+            return
+        # Dropping triggers (as removing a job does) leaves the order valid
+        if not set(trigger_ids) <= set(node.triggers):
+            self._order = None
+        self._unlink(node)
+        node.triggers = trigger_ids
+        self._link(node)
+        self._changed()
+
+    def set_status(self, job_id: str, status: JobStatus, updated_at: datetime, started_at: Optional[datetime]):
+        node = self.nodes.get(job_id)
+        if node is None:
+            return
+        was_completed = node.status == JobStatus.COMPLETED
+        node.status = status
+        node.updated_at = updated_at
+        node.started_at = started_at
+        self._classify(node)
+        if was_completed != (status == JobStatus.COMPLETED):
+            for dependent_id in node.dependents:
+                self._classify(self.nodes[dependent_id])
+        self._changed()
+
+    def set_external(self, job_id: str, status: Optional[JobStatus], updated_at: Optional[datetime]):
+        if status is None:
+            self.external.pop(job_id, None)
+        else:
+            self.external[job_id] = (status, updated_at)
+        for node in self.nodes.values():
+            if job_id in node.triggers:
+                self._classify(node)
+        self._changed()
+
+    # Analyses
+
+    def order(self) -> List[str]:
+        """Job ids in topological order; jobs on or behind a cycle are left out"""
+        if self._order is None:
+            self._order = topological_order(self.nodes, lambda job_id: self.nodes[job_id].triggers)
+        return self._order
+
+    def blast_radius(self, *job_ids: str) -> List[str]:
+        """Every job depending on the given jobs directly or transitively, nearest first"""
+        seen = set(job_ids)
+        queue = deque(job_ids)
+        affected = []
+        while queue:
+            for dependent_id in sorted(self.nodes[queue.popleft()].dependents):
+                if dependent_id not in seen:
+                    seen.add(dependent_id)
+                    affected.append(dependent_id)
+                    queue.append(dependent_id)
+        return affected
+
+    def _finished_at(self, job_id: str) -> Optional[datetime]:
+        node = self.nodes.get(job_id)
+        if node is not None:
+            return node.updated_at if node.status == JobStatus.COMPLETED else None
+        external = self.external.get(job_id)
+        return external[1] if external is not None and external[0] == JobStatus.COMPLETED else None
+
+    def _observed(self, node: Node, now: datetime) -> Optional[float]:
+        """Seconds the job took (or has taken so far), from when it started or became ready"""
+        if node.status in (JobStatus.PENDING, JobStatus.CANCELLED):
+            return None
+        started = node.started_at
+        if started is None:
+            # Not seen starting: count from when its last trigger finished
+            started = max(
+                [node.created_at] + [t for t in map(self._finished_at, node.triggers) if t is not None]
+            )
+        end = now if node.status == JobStatus.PROCESSING else node.updated_at
+        return max(0.0, (end - started).total_seconds())
+
+    def _critical_path(self, order: List[str], now: datetime, run_times: Dict[JobType, float]) -> Dict[str, Any]:
+        observed = {job_id: self._observed(self.nodes[job_id], now) for job_id in order}
+        totals: Dict[JobType, List[float]] = defaultdict(lambda: [0, 0.0])
+        for job_id in order:
+            node = self.nodes[job_id]
+            if node.status == JobStatus.COMPLETED:
+                totals[node.type][0] += 1
+                totals[node.type][1] += observed[job_id]
+
+        def expected(job_type: JobType) -> float:
+            count, total = totals.get(job_type, (0, 0.0))
+            return total / count if count else run_times.get(job_type, 0.0)
+
+        durations: Dict[str, Tuple[float, bool]] = {}
+        finish: Dict[str, float] = {}
+        via: Dict[str, Optional[str]] = {}
+        for job_id in order:
+            node = self.nodes[job_id]
+            seconds = observed[job_id]
+            if node.status == JobStatus.CANCELLED:
+                durations[job_id] = (0.0, False)
+            elif node.status == JobStatus.PENDING:
+                durations[job_id] = (expected(node.type), True)
+            elif node.status == JobStatus.PROCESSING:
+                # Still running: at least as long as it has taken so far
+                durations[job_id] = (max(seconds, expected(node.type)), True)
+            else:
+                durations[job_id] = (seconds, False)
+
+            before = max((t for t in node.triggers if t in finish), key=finish.__getitem__, default=None)
+            via[job_id] = before
+            finish[job_id] = durations[job_id][0] + (finish[before] if before is not None else 0.0)
+
+        end = max(finish, key=finish.__getitem__, default=None)
+        path = []
+        while end is not None:
+            path.append(end)
+            end = via[end]
+        path.reverse()
+        return {
+            "seconds": round(finish[path[-1]], 3) if path else 0.0,
+            "jobs": [
+                {
+                    "id": job_id,
+                    "type": self.nodes[job_id].type.value,
+                    "status": self.nodes[job_id].status.value,
+                    "seconds": round(durations[job_id][0], 3),
+                    "estimated": durations[job_id][1],
+                }
+                for job_id in path
+            ],
+        }
+
+    def analyze(self, run_times: Dict[JobType, float]) -> Dict[str, Any]:
+        """The whole analysis as a JSON-ready dict, cached until the graph changes"""
+        if self._analysis is not None:
+            return self._analysis
+
+        order = self.order()
+        position = {job_id: i for i, job_id in enumerate(order)}
+        unordered = [job_id for job_id in self.nodes if job_id not in position]
+        ranked = order + unordered
+        position.update((job_id, len(order) + i) for i, job_id in enumerate(unordered))
+
+        # Pending jobs that wait, however indirectly, on a failed or cancelled job
+        dead_ends = [node.id for node in self.nodes.values() if node.status in DEAD_ENDS]
+        stalled = [job_id for job_id in self.blast_radius(*dead_ends) if job_id in self.blocked]
+
+        def ranked_ids(ids: Iterable[str]) -> List[str]:
+            return sorted(ids, key=position.__getitem__)
+
+        edges = sum(1 for node in self.nodes.values() for t in node.triggers if t in self.nodes)
+        self._analysis = {
+            "pipeline_id": self.pipeline_id,
+            "jobs": len(self.nodes),
+            "edges": edges,
+            "nodes": [
+                {
+                    "id": job_id,
+                    "type": self.nodes[job_id].type.value,
+                    "status": self.nodes[job_id].status.value,
+                    "trigger_ids": list(self.nodes[job_id].triggers),
+                }
+                for job_id in ranked
+            ],
+            "external_triggers": {
+                t: self.external[t][0].value for node in self.nodes.values() for t in node.triggers if t in self.external
+            },
+            "ready": ranked_ids(self.ready),
+            "blocked": ranked_ids(self.blocked),
+            "stalled": ranked_ids(stalled),
+            "cycle": find_cycle(unordered, lambda job_id: self.nodes[job_id].triggers) if unordered else [],
+            "critical_path": self._critical_path(order, datetime.now(), run_times),
+        }
+        return self._analysis
+
+
+class PipelineGraphs:
+    """Cache of pipeline trigger graphs, least recently requested out first.
+
+    Subscribed to the job store, it keeps every cached graph current. It also times
+    every job from PROCESSING to COMPLETED, cached pipeline or not, for the mean run
+    time per type that estimates jobs without a completed job of their type in
+    their own pipeline.
+    """
+
+    def __init__(self, jobs: JobRepository, max_pipelines: int = DEFAULT_MAX_PIPELINES):
+        self.jobs = jobs
+        self.max_pipelines = max_pipelines
+        self.graphs: "OrderedDict[str, PipelineGraph]" = OrderedDict()
+        # Job id -> pipelines whose graph has it as an external trigger
+        self.watchers: Dict[str, Set[str]] = defaultdict(set)
+        # Processing jobs -> when they started
+        self.started: Dict[str, datetime] = {}
+        self.run_times: Dict[JobType, List[float]] = defaultdict(lambda: [0, 0.0])
+        # Shared by every graph, so a rebuilt graph never reuses an earlier version
+        self.seq = 0
+        self.builds = 0
+
+    def get(self, pipeline_id: str) -> PipelineGraph:
+        graph = self.graphs.get(pipeline_id)
+        if graph is not None:
+            self.graphs.move_to_end(pipeline_id)
+            return graph
+
+        nodes = self.jobs.graph_nodes(pipeline_id)
+        inside = {node[0] for node in nodes}
+        external = {}
+        for trigger_id in {t for node in nodes for t in node[5] if t not in inside}:
+            trigger = self.jobs.get(trigger_id)
+            if trigger is not None:
+                external[trigger_id] = (trigger.status, trigger.updated_at)
+                self.watchers[trigger_id].add(pipeline_id)
+
+        graph = PipelineGraph(pipeline_id, nodes, external)
+        for node in graph.nodes.values():
+            node.started_at = self.started.get(node.id)
+        self._bump(graph)
+        self.builds += 1
+        self.graphs[pipeline_id] = graph
+        while len(self.graphs) > self.max_pipelines:
+            self.drop(next(iter(self.graphs)))
+        return graph
+
+    def drop(self, pipeline_id: str):
+        graph = self.graphs.pop(pipeline_id, None)
+        if graph is None:
+            return
+        for trigger_id in graph.external:
+            watchers = self.watchers.get(trigger_id)
+            if watchers is not None:
+                watchers.discard(pipeline_id)
+                if not watchers:
+                    del self.watchers[trigger_id]
+
+    def _watch(self, graph: PipelineGraph, trigger_id: str):
+        """Follow a trigger from another pipeline, so the graph hears when it completes"""
+        trigger = self.jobs.get(trigger_id)
+        if trigger is not None:
+            graph.external[trigger_id] = (trigger.status, trigger.updated_at)
+            self.watchers[trigger_id].add(graph.pipeline_id)
+
+    def _watch_new(self, graph: PipelineGraph, trigger_ids: Iterable[str]):
+        for trigger_id in trigger_ids:
+            if trigger_id not in graph.nodes and trigger_id not in graph.external:
+                self._watch(graph, trigger_id)
+
+    def _bump(self, graph: PipelineGraph):
+        self.seq += 1
+        graph.version = self.seq
+
+    def mean_run_times(self) -> Dict[JobType, float]:
+        return {job_type: total / count for job_type, (count, total) in self.run_times.items() if count}
+
+    def analyze(self, pipeline_id: str) -> Dict[str, Any]:
+        graph = self.get(pipeline_id)
+        return {**graph.analyze(self.mean_run_times()), "version": graph.version}
+
+    # Keeping graphs current
+
+    def listener(self, event: str, item: Any, previous: Any = None):
+        if not isinstance(item, Job):
+            return
+
+        if event == JOB_STATUS:
+            if item.status == JobStatus.PROCESSING:
+                started_at = self.started[item.id] = item.updated_at
+            else:
+                started_at = self.started.pop(item.id, None)
+                if started_at is not None and item.status == JobStatus.COMPLETED:
+                    totals = self.run_times[item.type]
+                    totals[0] += 1
+                    totals[1] += max(0.0, (item.updated_at - started_at).total_seconds())
+                if item.status == JobStatus.PENDING:
+                    # Back in the queue; its next run starts afresh
+                    started_at = None
+            graph = self.graphs.get(item.pipeline_id)
+            if graph is not None and item.id not in graph.nodes:
+                # A listener told of the job before this one moved it on, so its
+                # JOB_ADDED, still on its way here, carries an outdated status
+                self.drop(item.pipeline_id)
+            self._update(item.pipeline_id, lambda g: g.set_status(item.id, item.status, item.updated_at, started_at))
+            self._update_watchers(item.id, item.status, item.updated_at)
+        elif event == JOB_ADDED:
+            if previous is not None:
+                # Replacing a job can rewire the graph in any way; start afresh
+                self.drop(previous.pipeline_id)
+                self.drop(item.pipeline_id)
+            else:
+                def add(graph: PipelineGraph):
+                    self._watch_new(graph, (t.id for t in item.triggers))
+                    graph.add(item)
+                    graph.nodes[item.id].started_at = self.started.get(item.id)
+
+                self._update(item.pipeline_id, add)
+            self._update_watchers(item.id, item.status, item.updated_at)
+        elif event == JOB_TRIGGERS:
+            def set_triggers(graph: PipelineGraph):
+                trigger_ids = tuple(t.id for t in item.triggers)
+                self._watch_new(graph, trigger_ids)
+                graph.set_triggers(item.id, trigger_ids)
+
+            self._update(item.pipeline_id, set_triggers)
+        elif event == JOB_REMOVED:
+            self.started.pop(item.id, None)
+            self._update(item.pipeline_id, lambda g: g.remove(item.id))
+            self._update_watchers(item.id, None, None)
+
+    def _update(self, pipeline_id: str, change: Callable[[PipelineGraph], None]):
+        graph = self.graphs.get(pipeline_id)
+        if graph is not None:
+            change(graph)
+            self._bump(graph)
+
+    def _update_watchers(self, job_id: str, status: Optional[JobStatus], updated_at: Optional[datetime]):
+        for pipeline_id in list(self.watchers.get(job_id, ())):
+            self._update(pipeline_id, lambda g: g.set_external(job_id, status, updated_at))
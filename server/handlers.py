@@ -0,0 +1,77 @@
+"""
+Built-in job handlers used by the execution engine.
+
+These stand in for the real terrain, weather, tide and wave services: the I/O-bound
+ones wait as if calling a remote API and the wave forecast is computed locally.
+Register real handlers with ``Executor.register`` to replace any of them.
+"""
+import asyncio
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from server.models import JobType, WaveForecastData
+
+# Seconds the simulated remote calls take
+SIMULATED_LATENCY = 0.5
+
+DIRECTIONS = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE", "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
+
+
+class Handler:
+    """How one job type is run: a coroutine on the event loop, or a function in the process pool.
+
+    Process pool handlers must be module-level functions so they can be pickled; both
+    kinds receive the job's ``args`` and may return a ``WaveForecastData`` (or its dict
+    form) to store as the job's result.
+    """
+
+    def __init__(self, func, cpu_bound: bool = False):
+        self.func = func
+        self.cpu_bound = cpu_bound
+
+
+async def fetch_terrain(args: Dict[str, Any]) -> None:
+    await asyncio.sleep(SIMULATED_LATENCY)
+
+
+async def weather_forecast(args: Dict[str, Any]) -> None:
+    await asyncio.sleep(SIMULATED_LATENCY)
+
+
+async def tide_forecast(args: Dict[str, Any]) -> None:
+    await asyncio.sleep(SIMULATED_LATENCY)
+
+
+def wave_forecast(args: Dict[str, Any]) -> Dict[str, Any]:
+    days = int(args.get("days", 1))
+    if days < 1:
+        raise ValueError("days must be at least 1")
+
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    data = []
+    for hour in range(days * 24):
+        swell = math.sin(hour / 6.0)
+        entry = {
+            "time": (start + timedelta(hours=hour)).strftime("%Y-%m-%d %H:%M"),
+            "height": round(1.5 + 0.5 * swell, 2),
+            "direction": DIRECTIONS[(hour // 3) % len(DIRECTIONS)] if args.get("include_direction", True) else "",
+            "period": round(8.0 + swell, 1),
+        }
+        data.append(entry)
+
+    return {"data": data, "location": args.get("location"), "unit": "metric"}
+
+
+DEFAULT_HANDLERS: Dict[JobType, Handler] = {
+    JobType.FETCH_TERRAIN: Handler(fetch_terrain),
+    JobType.WEATHER_FORECAST: Handler(weather_forecast),
+    JobType.TIDE_FORECAST: Handler(tide_forecast),
+    JobType.WAVE_FORECAST: Handler(wave_forecast, cpu_bound=True),
+}
+
+
+def as_result(value: Any) -> Optional[WaveForecastData]:
+    if value is None or isinstance(value, WaveForecastData):
+        return value
+    return WaveForecastData.model_validate(value)
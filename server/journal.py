@@ -0,0 +1,295 @@
+import asyncio
+import atexit
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from server.forecast import compact_forecast
+from server.models import Job, JobStatus, Pipeline, WaveForecastData
+from server.store import (
+    JOB_ADDED, JOB_REMOVED, JOB_STATUS, JOB_STATUSES, JOB_TRIGGERS, JOB_TYPES, PIPELINE_ADDED,
+    JobRecord, JobStore, PipelineStore, from_micros,
+)
+
+SNAPSHOT_FILE = "snapshot.jsonl"
+SEGMENT_PREFIX = "journal-"
+SEGMENT_SUFFIX = ".log"
+
+
+def _segment_name(number: int) -> str:
+    return f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}"
+
+
+def dump_job(job: Job) -> Dict[str, Any]:
+    """A job as a JSON-ready dict with its triggers as ids, as journals, snapshots and the archive store it"""
+    data = job.model_dump(mode="json", exclude={"triggers", "pipeline", "wave_forecast_data"})
+    data["wave_forecast_data"] = compact_forecast(job.wave_forecast_data) if job.wave_forecast_data else None
+    data["trigger_ids"] = [trigger.id for trigger in job.triggers]
+    return data
+
+
+def _dump_record(record: JobRecord) -> Dict[str, Any]:
+    # The same dict dump_job makes, straight from the store's compact form
+    return {
+        "id": record.id,
+        "pipeline_id": record.pipeline_id,
+        "type": JOB_TYPES[record.type].value,
+        "status": JOB_STATUSES[record.status].value,
+        "error_message": record.error_message,
+        "created_at": from_micros(record.created).isoformat(),
+        "updated_at": from_micros(record.updated).isoformat(),
+        "args": dict(zip(record.arg_keys, record.arg_values)),
+        "version": record.version,
+        "wave_forecast_data": compact_forecast(record.forecast) if record.forecast else None,
+        "result_job_id": record.result_job_id,
+        "trigger_ids": list(record.triggers),
+    }
+
+
+def _read_lines(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-write; everything before it is intact
+                return
+
+
+class Journal:
+    """Crash recovery for the in-memory store.
+
+    Every store mutation is appended to the current journal segment and fsynced in
+    batches every ``fsync_interval`` seconds. ``checkpoint`` rotates to a new segment,
+    writes a snapshot of the whole store in a worker thread and then deletes the
+    segments the snapshot covers. Recovery loads the snapshot and replays only the
+    segments written after it.
+
+    Snapshots are fuzzy: the store keeps changing while one is written. That is safe
+    because every journal record sets state rather than applying a delta, so replaying
+    the newer segments on top always converges on the latest state.
+    """
+
+    def __init__(self, directory: str, jobs: JobStore, pipelines: PipelineStore, fsync_interval: float = 0.05):
+        self.directory = directory
+        self.jobs = jobs
+        self.pipelines = pipelines
+        self.fsync_interval = fsync_interval
+        self.lock = threading.RLock()
+        self.segment = 0
+        self.file = None
+        self.dirty = False
+        self.timer: Optional[threading.Timer] = None
+        self.checkpointing = False
+
+        os.makedirs(directory, exist_ok=True)
+
+    # Recovery
+
+    def recover(self) -> bool:
+        """Load the latest snapshot and replay the journal tail into the empty stores.
+
+        Returns True if any state was restored.
+        """
+        restored = False
+        first_segment = 0
+
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            first_segment = self._load_snapshot(snapshot_path)
+            restored = True
+
+        for number in self._segments():
+            if number < first_segment:
+                continue
+            for record in _read_lines(os.path.join(self.directory, _segment_name(number))):
+                self._apply(record)
+                restored = True
+
+        return restored
+
+    def _segments(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+        return sorted(numbers)
+
+    def _load_snapshot(self, path: str) -> int:
+        lines = _read_lines(path)
+        header = next(lines)
+
+        def jobs():
+            for record in lines:
+                if "pipeline" in record:
+                    self.pipelines.add(Pipeline.model_validate(record["pipeline"]))
+                else:
+                    row = record["job"]
+                    yield Job.model_validate({**row, "triggers": []}), row["trigger_ids"]
+
+        # The store packs each job as it is read, so recovery never holds them all as models
+        self.jobs.bulk_load(jobs())
+        return header["segment"]
+
+    def _apply(self, record: Dict[str, Any]):
+        op = record["op"]
+
+        if op == PIPELINE_ADDED:
+            pipeline = Pipeline.model_validate(record["pipeline"])
+            self.pipelines.add(pipeline)
+
+        elif op == JOB_ADDED:
+            row = record["job"]
+            job = Job.model_validate({**row, "triggers": [self.jobs[t] for t in row["trigger_ids"] if t in self.jobs]})
+            self.jobs.add(job)
+
+        elif op == JOB_STATUS:
+            job = self.jobs.get(record["id"])
+            if job is not None:
+                result = record.get("wave_forecast_data")
+                self.jobs.update_status(
+                    job,
+                    JobStatus(record["status"]),
+                    record["error_message"],
+                    WaveForecastData.model_validate(result) if result else None,
+                    record.get("result_job_id"),
+                )
+                self._restore(record, job)
+
+        elif op == JOB_TRIGGERS:
+            job = self.jobs.get(record["id"])
+            if job is not None:
+                self.jobs.set_triggers(job, [self.jobs[t] for t in record["trigger_ids"] if t in self.jobs])
+                self._restore(record, job)
+
+        elif op == JOB_REMOVED:
+            if record["id"] in self.jobs:
+                self.jobs.remove(record["id"])
+
+    def _restore(self, record: Dict[str, Any], job: Job):
+        # Replaying stamps the job as updated now; put back the time and version it had
+        self.jobs.restore(job.id, datetime.fromisoformat(record["updated_at"]), record.get("version", job.version))
+
+    # Journaling
+
+    def attach(self):
+        """Start journaling every mutation made to the stores"""
+        segments = self._segments()
+        self._open_segment(segments[-1] + 1 if segments else 1)
+        self.jobs.subscribe(self.record)
+        self.pipelines.subscribe(self.record)
+
+        # Sync whatever is still batched if the process exits without a clean shutdown
+        atexit.register(self.sync)
+
+    def record(self, event: str, item: Any, previous: Any = None):
+        if event == PIPELINE_ADDED:
+            entry = {"op": event, "pipeline": item.model_dump(mode="json")}
+        elif event == JOB_ADDED:
+            entry = {"op": event, "job": dump_job(item)}
+        elif event == JOB_STATUS:
+            entry = {
+                "op": event,
+                "id": item.id,
+                "status": item.status.value,
+                "error_message": item.error_message,
+                "updated_at": item.updated_at.isoformat(),
+                "version": item.version,
+            }
+            # Results are only produced on completion; keep every other status record small
+            if item.status == JobStatus.COMPLETED and item.wave_forecast_data is not None:
+                entry["wave_forecast_data"] = compact_forecast(item.wave_forecast_data)
+            if item.result_job_id is not None:
+                entry["result_job_id"] = item.result_job_id
+        elif event == JOB_TRIGGERS:
+            entry = {
+                "op": event,
+                "id": item.id,
+                "trigger_ids": [trigger.id for trigger in item.triggers],
+                "updated_at": item.updated_at.isoformat(),
+                "version": item.version,
+            }
+        elif event == JOB_REMOVED:
+            entry = {"op": event, "id": item.id}
+        else:
+            return
+
+        with self.lock:
+            self.file.write(json.dumps(entry) + "\n")
+            self.dirty = True
+            if self.timer is None:
+                self.timer = threading.Timer(self.fsync_interval, self.sync)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def sync(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.file is not None and self.dirty:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.dirty = False
+
+    def _open_segment(self, number: int):
+        with self.lock:
+            if self.file is not None:
+                self.sync()
+                self.file.close()
+            self.segment = number
+            self.file = open(os.path.join(self.directory, _segment_name(number)), "a", encoding="utf-8")
+
+    # Snapshots
+
+    async def checkpoint(self):
+        """Snapshot the store and drop the journal segments it makes redundant"""
+        if self.checkpointing:
+            return
+        self.checkpointing = True
+        try:
+            # Rotate first: everything from here on lands in the new segment
+            self._open_segment(self.segment + 1)
+            covered_from = self.segment
+            pipelines = list(self.pipelines.values())
+            jobs = self.jobs.records()
+
+            # Serializing millions of jobs would stall the event loop, so do it off-thread
+            await asyncio.to_thread(self._write_snapshot, covered_from, pipelines, jobs)
+
+            for number in self._segments():
+                if number < covered_from:
+                    os.remove(os.path.join(self.directory, _segment_name(number)))
+        finally:
+            self.checkpointing = False
+
+    def _write_snapshot(self, segment: int, pipelines: List[Pipeline], jobs: List[JobRecord]):
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp_path = path + ".tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"segment": segment, "created_at": datetime.now().isoformat()}) + "\n")
+            for pipeline in pipelines:
+                f.write(json.dumps({"pipeline": pipeline.model_dump(mode="json")}) + "\n")
+            for record in jobs:
+                f.write(json.dumps({"job": _dump_record(record)}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Atomic swap: a crash leaves either the old snapshot or the new one
+        os.replace(tmp_path, path)
+
+    async def run_checkpoints(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.checkpoint()
+
+    def close(self):
+        with self.lock:
+            self.sync()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+        atexit.unregister(self.sync)
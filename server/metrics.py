@@ -0,0 +1,237 @@
+"""
+Prometheus metrics in the text exposition format.
+
+The few metric types the API needs are implemented here, which avoids a client
+library dependency. Request metrics are recorded by ``MetricsMiddleware``. Job
+transitions come from store events. Store sizes, queue depths and cache figures
+are read from the structures that already maintain them at scrape time, so
+nothing extra runs per write.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from server.models import Job
+from server.store import JOB_ADDED, JOB_REMOVED, JOB_STATUS
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets in seconds, and response size buckets in bytes
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+# Route label for requests that matched no route
+UNMATCHED = "unmatched"
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> Iterable[Tuple[Labels, float]]:
+        return ()
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for values, value in self.samples():
+            lines.append(f"{self.name}{_format(self.labels, values)} {_number(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Labels, float] = defaultdict(float)
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] += amount
+
+    def samples(self):
+        return sorted(self.values.items())
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        self.values[labels] = value
+
+
+class Observed(Metric):
+    """Metric kept elsewhere and read at scrape time.
+
+    ``read`` returns a number, or a dict from label values to numbers.
+    """
+
+    def __init__(self, name: str, help: str, read: Callable[[], Any], labels: Labels = (), kind: str = "gauge"):
+        super().__init__(name, help, labels)
+        self.read = read
+        self.kind = kind
+
+    def samples(self):
+        value = self.read()
+        if isinstance(value, dict):
+            return sorted(((key if isinstance(key, tuple) else (key,)), n) for key, n in value.items())
+        return [((), value)]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Labels = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        # labels -> per-bucket counts (not cumulative; the last slot is +Inf), and the sum
+        self.counts: Dict[Labels, List[int]] = {}
+        self.sums: Dict[Labels, float] = defaultdict(float)
+
+    def observe(self, value: float, *labels: str):
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for values, counts in sorted(self.counts.items()):
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                total += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_format(self.labels, values, le)} {total}")
+            lines.append(f"{self.name}_sum{_format(self.labels, values)} {_number(self.sums[values])}")
+            lines.append(f"{self.name}_count{_format(self.labels, values)} {total}")
+        return lines
+
+
+class Metrics:
+    """Registry of the API's metrics, with the HTTP and job metrics built in"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.requests = self.register(Counter(
+            "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+        self.latency = self.register(Histogram(
+            "http_request_duration_seconds", "Time to send the complete response", ("method", "route")))
+        self.sizes = self.register(Histogram(
+            "http_response_size_bytes", "Response body size as sent", ("method", "route"), SIZE_BUCKETS))
+        self.in_flight = self.register(Gauge("http_requests_in_flight", "Requests being handled"))
+        self.in_flight.set(0)
+        self.transitions = self.register(Counter(
+            "job_status_transitions_total", "Job status changes", ("from", "to")))
+        self.created = self.register(Counter("jobs_created_total", "Jobs created", ("type",)))
+        self.deleted = self.register(Counter("jobs_deleted_total", "Jobs deleted", ("type",)))
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, read: Callable[[], Any], labels: Labels = ()) -> Metric:
+        return self.register(Observed(name, help, read, labels))
+
+    def counter(self, name: str, help: str, read: Callable[[], Any], labels: Labels = ()) -> Metric:
+        """Counter whose value is kept elsewhere and read at scrape time"""
+        return self.register(Observed(name, help, read, labels, kind="counter"))
+
+    def listener(self, event: str, item: Any, previous: Any = None):
+        if not isinstance(item, Job):
+            return
+        if event == JOB_STATUS:
+            self.transitions.inc(previous.value, item.status.value)
+        elif event == JOB_ADDED and previous is None:
+            self.created.inc(item.type.value)
+        elif event == JOB_REMOVED:
+            self.deleted.inc(item.type.value)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: Optional[float], size: int):
+        self.requests.inc(method, route, str(status))
+        if seconds is not None:
+            self.latency.observe(seconds, method, route)
+            self.sizes.observe(size, method, route)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Records latency, response size and status of every HTTP request by route template.
+
+    Latency runs until the last body chunk is sent, so a streamed export counts
+    its whole transfer. Event streams stay open indefinitely and are only counted.
+    A ``profiler`` that is running is told about every finished request.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Metrics, profiler: Any = None):
+        self.app = app
+        self.metrics = metrics
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+        event_stream = False
+
+        async def send_and_measure(message: Message):
+            nonlocal status, size, event_stream
+            if message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                status = message["status"]
+                for key, value in message["headers"]:
+                    if key == b"content-type":
+                        event_stream = value.startswith(b"text/event-stream")
+            await send(message)
+
+        in_flight = self.metrics.in_flight
+        in_flight.values[()] += 1
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            end = perf_counter()
+            in_flight.values[()] -= 1
+            # FastAPI records the matched route in the scope; its path is the template
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED
+            method = scope["method"]
+            self.metrics.observe_request(method, route, status, None if event_stream else end - start, size)
+            if self.profiler is not None and self.profiler.running and not event_stream:
+                self.profiler.request_finished(f"{method} {route}", start, end)
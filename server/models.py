@@ -1,7 +1,10 @@
 from enum import Enum
-from typing import List, Optional, Dict, Any, Union
+from typing import Annotated, List, Optional, Dict, Any, Union
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PlainSerializer, PlainValidator
+from pydantic_core import core_schema
+
+from server.forecast import WaveSeries
 
 # Enums for job types and statuses
 class JobType(str, Enum):
@@ -15,6 +18,7 @@ class JobStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 class PipelineStatus(str, Enum):
     ACTIVE = "active"
@@ -28,8 +32,22 @@ class WaveForecastEntry(BaseModel):
     direction: str
     period: float
 
+class _EntryListSchema:
+    # Documented in OpenAPI as the list of entries clients send and receive
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return handler(core_schema.list_schema(WaveForecastEntry.__pydantic_core_schema__))
+
+# Held as typed columns in memory (see forecast.py), serialized as a list of entries
+WaveColumns = Annotated[
+    WaveSeries,
+    PlainValidator(WaveSeries.coerce),
+    PlainSerializer(lambda series: series.entries()),
+    _EntryListSchema,
+]
+
 class WaveForecastData(BaseModel):
-    data: List[WaveForecastEntry]
+    data: WaveColumns
     location: Optional[str] = None
     unit: Optional[str] = None
 
@@ -42,6 +60,8 @@ class Pipeline(BaseModel):
     created_at: datetime
     updated_at: datetime
     metadata: Optional[Dict[str, Any]] = None
+    # Incremented on every change; used for ETags and optimistic concurrency
+    version: int = 1
 
 # Forward reference for Job (to handle circular dependency with triggers)
 class Job(BaseModel):
@@ -54,6 +74,10 @@ class Job(BaseModel):
     updated_at: datetime
     args: Dict[str, Any]
     wave_forecast_data: Optional[WaveForecastData] = None
+    # Set when the result was reused from an earlier job with the same type and args
+    result_job_id: Optional[str] = None
+    # Incremented on every change; used for ETags and optimistic concurrency
+    version: int = 1
     triggers: List['Job'] = []
     pipeline: Optional[Pipeline] = None
     
@@ -67,6 +91,78 @@ class CreateJobPayload(BaseModel):
     args: Dict[str, Any]
     trigger_ids: Optional[List[str]] = None
 
+# Batch job creation models
+class BatchJobItem(CreateJobPayload):
+    # Client-side temporary key so other jobs in the same batch can trigger on this one
+    key: Optional[str] = None
+    trigger_keys: Optional[List[str]] = None
+
+class CreateJobBatchPayload(BaseModel):
+    jobs: List[BatchJobItem]
+
+class CreateJobBatchResult(BaseModel):
+    ids: List[str]
+    keys: Dict[str, str]
+
+# Bulk job transition models
+class BulkAction(str, Enum):
+    RETRY = "retry"
+    CANCEL = "cancel"
+    DELETE = "delete"
+
+class JobFilter(BaseModel):
+    # Same filters as GET /api/jobs
+    type: Optional[JobType] = None
+    status: Optional[JobStatus] = None
+    pipeline_id: Optional[str] = None
+    dateFrom: Optional[str] = None
+    dateTo: Optional[str] = None
+    args: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    # A filter with none of the above matches every job; bulk actions insist on this
+    all: bool = False
+
+class BulkJobPayload(BaseModel):
+    action: BulkAction
+    ids: Optional[List[str]] = None
+    filter: Optional[JobFilter] = None
+
+class BulkJobOutcome(BaseModel):
+    id: str
+    outcome: str
+    detail: Optional[str] = None
+
+class BulkJobResult(BaseModel):
+    action: BulkAction
+    counts: Dict[str, int]
+    results: List[BulkJobOutcome]
+
+# Worker protocol models
+class ClaimJobsPayload(BaseModel):
+    worker_id: str
+    types: Optional[List[JobType]] = None
+    max_jobs: int = Field(1, ge=1)
+    lease_seconds: Optional[float] = Field(None, gt=0)
+
+class HeartbeatPayload(BaseModel):
+    worker_id: str
+    job_ids: List[str]
+    lease_seconds: Optional[float] = Field(None, gt=0)
+
+class CompleteJobPayload(BaseModel):
+    worker_id: str
+    wave_forecast_data: Optional[WaveForecastData] = None
+
+class FailJobPayload(BaseModel):
+    worker_id: str
+    error_message: str
+
+# Sampling profiler switch
+class ProfilerSettings(BaseModel):
+    enabled: bool
+    interval_ms: Optional[float] = Field(None, gt=0)
+    threshold_ms: Optional[float] = Field(None, ge=0)
+
 # Create pipeline payload model
 class CreatePipelinePayload(BaseModel):
     name: str
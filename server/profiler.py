@@ -0,0 +1,102 @@
+"""
+Opt-in sampling profiler for slow requests.
+
+While running, a background thread samples the event loop thread's Python stack
+every few milliseconds into a bounded ring. The metrics middleware reports every
+finished request. For one slower than the threshold, the samples taken while it
+was in flight are added to the profile under the request's route. Those samples
+show everything the loop was doing at the time, including other requests that
+held it up.
+
+The profile is in the folded-stack format (``frame;frame;frame count`` per line)
+that flamegraph.pl, speedscope and inferno read directly.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+# Frames kept per stack; deeper stacks lose their outermost frames
+MAX_DEPTH = 128
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, threshold: float = 0.25, window: float = 60.0):
+        self.interval = interval
+        self.threshold = threshold
+        self.window = window
+        self.running = False
+        self.target: Optional[int] = None
+        self.thread: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        self.samples: Deque[Tuple[float, str]] = deque()
+        self.profile: Counter = Counter()
+        self.slow_requests = 0
+        self.names: Dict[Any, str] = {}
+
+    def start(self, interval: Optional[float] = None, threshold: Optional[float] = None):
+        """Start sampling the calling thread, which for a request handler is the event loop"""
+        self.stop()
+        self.interval = interval or self.interval
+        self.threshold = threshold if threshold is not None else self.threshold
+        self.samples = deque(maxlen=max(1, int(self.window / self.interval)))
+        self.target = threading.get_ident()
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self.running = True
+        self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+
+    def reset(self):
+        self.profile.clear()
+        self.slow_requests = 0
+
+    def _name(self, code) -> str:
+        name = self.names.get(code)
+        if name is None:
+            name = self.names[code] = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return name
+
+    def _run(self):
+        while not self.stopping.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                stack.append(self._name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples.append((time.perf_counter(), ";".join(reversed(stack))))
+
+    def request_finished(self, label: str, start: float, end: float):
+        if end - start < self.threshold:
+            return
+        self.slow_requests += 1
+        # Copying the deque is a single C call, so the sampler cannot change it underneath
+        for taken, stack in reversed(list(self.samples)):
+            if taken < start:
+                break
+            if taken <= end:
+                self.profile[f"{label};{stack}"] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.profile.most_common())
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "window_seconds": self.window,
+            "samples": len(self.samples),
+            "slow_requests": self.slow_requests,
+            "stacks": len(self.profile),
+        }
@@ -0,0 +1,111 @@
+from typing import Any, Dict, FrozenSet, Hashable, Optional, Set, Tuple
+
+from server.models import Job
+
+# Relations that are only embedded on request; by default they are returned as ids
+EXPANDABLE = frozenset({"triggers", "pipeline"})
+
+# Scalar job fields that can be selected with ``fields=``
+JOB_FIELDS = frozenset(Job.model_fields) - EXPANDABLE | {"trigger_ids"}
+
+# Embedded triggers are themselves projected, but never deeper than this
+MAX_EXPAND_DEPTH = 3
+
+
+class Projection:
+    """Which parts of a job to serialize, parsed from ``fields=`` and ``expand=``"""
+
+    def __init__(
+        self,
+        fields: Optional[FrozenSet[str]] = None,
+        expand: FrozenSet[str] = frozenset(),
+        depth: int = 1,
+    ):
+        self.fields = fields
+        self.expand = expand
+        self.depth = depth
+
+        # Columns passed straight to pydantic, so nested models are never walked needlessly
+        selected = JOB_FIELDS if fields is None else fields | {"id"}
+        self.include = frozenset(selected - {"trigger_ids"})
+        self.with_trigger_ids = "trigger_ids" in selected
+
+    @property
+    def key(self) -> Hashable:
+        """Equal for projections that serialize a job identically"""
+        return (self.include, self.with_trigger_ids, self.expand, self.depth if "triggers" in self.expand else 0)
+
+    @property
+    def trigger_depth(self) -> int:
+        """Levels of triggers a job must be loaded with to be serialized this way"""
+        levels = self.depth if "triggers" in self.expand else 0
+        return levels + 1 if self.with_trigger_ids else levels
+
+    @classmethod
+    def parse(cls, fields: Optional[str] = None, expand: Optional[str] = None, depth: int = 1) -> "Projection":
+        parsed_fields = None
+        if fields:
+            parsed_fields = frozenset(f.strip() for f in fields.split(",") if f.strip())
+            unknown = parsed_fields - JOB_FIELDS - EXPANDABLE
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        parsed_expand = frozenset()
+        if expand:
+            parsed_expand = frozenset(e.strip() for e in expand.split(",") if e.strip())
+            unknown = parsed_expand - EXPANDABLE
+            if unknown:
+                raise ValueError(f"Cannot expand: {', '.join(sorted(unknown))}")
+
+        if not 1 <= depth <= MAX_EXPAND_DEPTH:
+            raise ValueError(f"Expansion depth must be between 1 and {MAX_EXPAND_DEPTH}")
+
+        # Asking for a relation in fields= implies expanding it
+        if parsed_fields:
+            parsed_expand |= parsed_fields & EXPANDABLE
+            parsed_fields -= EXPANDABLE
+
+        return cls(parsed_fields, parsed_expand, depth)
+
+
+# Default projection: every scalar field, trigger ids and the pipeline id only
+COMPACT = Projection()
+
+
+def project_job(job: Job, projection: Projection = COMPACT, depth: Optional[int] = None) -> Dict[str, Any]:
+    """Serialize a job to a JSON-ready dict according to ``projection``"""
+    if depth is None:
+        depth = projection.depth
+
+    data = job.model_dump(mode="json", include=projection.include)
+
+    if projection.with_trigger_ids:
+        data["trigger_ids"] = [trigger.id for trigger in job.triggers]
+
+    # Past the depth limit embedded triggers fall back to their trigger ids
+    if "triggers" in projection.expand and depth > 0:
+        data["triggers"] = [project_job(trigger, projection, depth - 1) for trigger in job.triggers]
+
+    if "pipeline" in projection.expand:
+        data["pipeline"] = job.pipeline.model_dump(mode="json") if job.pipeline else None
+
+    return data
+
+
+def projection_dependencies(
+    job: Job, projection: Projection = COMPACT, depth: Optional[int] = None
+) -> Tuple[Set[str], Set[str]]:
+    """Ids of the jobs and pipelines whose data ends up in ``project_job(job, projection)``"""
+    if depth is None:
+        depth = projection.depth
+
+    jobs = {job.id}
+    pipelines: Set[str] = set()
+    if "pipeline" in projection.expand:
+        pipelines.add(job.pipeline_id)
+    if "triggers" in projection.expand and depth > 0:
+        for trigger in job.triggers:
+            trigger_jobs, trigger_pipelines = projection_dependencies(trigger, projection, depth - 1)
+            jobs |= trigger_jobs
+            pipelines |= trigger_pipelines
+    return jobs, pipelines
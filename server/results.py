@@ -0,0 +1,321 @@
+"""
+Content-addressed result cache: identical jobs are computed once.
+
+Two jobs are identical when they have the same type and the same args once
+normalized: key order does not matter and a float with an integral value equals the
+integer (``3.0`` and ``3``). Their key is a SHA-256 of that canonical form.
+
+The cache sits between the store and the ready queue. When a job becomes ready:
+
+- if a fresh result for its key is cached, the job is completed with it without
+  running, and its ``result_job_id`` names the job that computed the result;
+- if a job with the same key is already queued or running, the job waits for that
+  one instead of being queued itself, and is completed with its result;
+- otherwise it is queued as usual, and any identical job arriving while it is in
+  flight waits for it.
+
+When the job being waited on fails, is cancelled or is removed, the first job still
+waiting is queued in its place, so a failure is not copied to every duplicate.
+
+Results of jobs that ran are kept for the TTL configured for their type, within a
+memory budget, least recently used out first. A type with a TTL of 0 is coalesced
+while in flight but never cached; a type without a TTL is left alone. Jobs completed
+from the cache share the cached result object, so the in-memory store holds a
+single copy for all of them.
+
+Coalescing is per process: with several worker processes sharing a store, each one
+coalesces the jobs it queues, but results completed by any process fill every
+process's cache through the store's change sync.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from server.models import Job, JobStatus, JobType, WaveForecastData
+from server.scheduler import ReadyQueue
+from server.store import JOB_ADDED, JOB_REMOVED, JOB_STATUS, JobRepository
+
+# Default memory budget for cached results
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Rough fixed cost of one entry: the key, the entry object and its place in the LRU
+ENTRY_BYTES = 400
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def result_key(job_type: JobType, args: Dict[str, Any]) -> str:
+    """The content address of a job: a hash of its type and normalized args"""
+    canonical = json.dumps(
+        [JobType(job_type).value, _canonical(args)], sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def result_size(result: Optional[WaveForecastData]) -> int:
+    return ENTRY_BYTES + (result.data.nbytes() if result is not None else 0)
+
+
+class CachedResult:
+    __slots__ = ("result", "job_id", "expires_at", "size")
+
+    def __init__(self, result: Optional[WaveForecastData], job_id: str, expires_at: float):
+        self.result = result
+        self.job_id = job_id
+        self.expires_at = expires_at
+        self.size = result_size(result)
+
+
+class ResultCache:
+    """Deduplicates identical jobs in front of a ``ReadyQueue``.
+
+    Per key it keeps at most one cached result, one job in flight (queued or
+    running) and the jobs waiting for that one, all kept current from store events.
+    Jobs completed on the cache's behalf are completed from the event loop rather
+    than inside the store event that made them ready, so every listener sees a job
+    added before it sees it completed.
+    """
+
+    def __init__(
+        self,
+        jobs: JobRepository,
+        ttl: Dict[str, float],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock=time.monotonic,
+    ):
+        self.jobs = jobs
+        self.ttl = {JobType(job_type).value: seconds for job_type, seconds in ttl.items()}
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self.bytes = 0
+
+        # key -> id of the job computing it, and back
+        self.in_flight: Dict[str, str] = {}
+        self.in_flight_keys: Dict[str, str] = {}
+        # key -> ids of the jobs waiting for it, in arrival order, and back
+        self.waiting: Dict[str, Dict[str, None]] = {}
+        self.waiting_keys: Dict[str, str] = {}
+        # Jobs with a completion scheduled on the event loop
+        self.completing: Dict[str, str] = {}
+
+        self.ready: Optional[ReadyQueue] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # Lifecycle
+
+    def start(self, ready: ReadyQueue):
+        """Start deduplicating the jobs ``ready`` queues; must be called from the event loop"""
+        self.ready = ready
+        self.loop = asyncio.get_running_loop()
+        self.jobs.subscribe(self.listener)
+        ready.filters.append(self.admit)
+
+        # Jobs already running are in flight; of identical jobs already queued, the
+        # first stays queued and the others wait for it
+        for job in reversed(self.jobs.query(status=JobStatus.PROCESSING)):
+            key = self._key(job)
+            if key is not None and key not in self.in_flight:
+                self._fly(key, job.id)
+        for queue in list(ready.queues.values()):
+            for job_id in list(queue.entries):
+                job = self.jobs.get(job_id)
+                if job is not None and not self.admit(job):
+                    queue.discard(job_id)
+
+    def stop(self):
+        if self.ready is not None:
+            self.ready.filters.remove(self.admit)
+        self.jobs.unsubscribe(self.listener)
+        self.ready = None
+        self.loop = None
+
+    # Admission
+
+    def _key(self, job: Job) -> Optional[str]:
+        if job.type.value not in self.ttl:
+            return None
+        return result_key(job.type, job.args)
+
+    def admit(self, job: Job) -> bool:
+        """Whether a ready job should be queued; if not, the cache has taken it over"""
+        if job.id in self.completing:
+            return False
+        key = self._key(job)
+        if key is None:
+            return True
+
+        # Its args may have changed since it was last admitted
+        for index in (self.in_flight_keys, self.waiting_keys):
+            if index.get(job.id, key) != key:
+                self._release(job.id)
+
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            self._complete_later(key, [job.id], entry.result, entry.job_id)
+            return False
+
+        leader = self.in_flight.get(key)
+        if leader is None:
+            self.misses += 1
+            self._fly(key, job.id)
+            return True
+        if leader == job.id:
+            return True
+
+        if job.id not in self.waiting_keys:
+            self.coalesced += 1
+            self.waiting.setdefault(key, {})[job.id] = None
+            self.waiting_keys[job.id] = key
+        return False
+
+    def _fly(self, key: str, job_id: str):
+        self.in_flight[key] = job_id
+        self.in_flight_keys[job_id] = key
+
+    # Tracking jobs in flight
+
+    def listener(self, event: str, item: Any, previous: Any = None):
+        if not isinstance(item, Job):
+            return
+
+        if event == JOB_STATUS and item.status == JobStatus.COMPLETED:
+            # Only results that were computed are cached; reused ones are already there
+            if previous == JobStatus.PROCESSING and item.result_job_id is None:
+                key = self._key(item)
+                ttl = self.ttl.get(item.type.value)
+                if key is not None and ttl:
+                    self._store(key, item.wave_forecast_data, item.id, ttl)
+            key = self.in_flight_keys.pop(item.id, None)
+            if key is not None:
+                del self.in_flight[key]
+                waiting = self.waiting.pop(key, {})
+                for job_id in waiting:
+                    del self.waiting_keys[job_id]
+                if waiting:
+                    self._complete_later(key, list(waiting), item.wave_forecast_data, item.result_job_id or item.id)
+            else:
+                self._release(item.id)
+        elif event == JOB_STATUS and item.status in (JobStatus.PENDING, JobStatus.PROCESSING):
+            # Requeued or claimed: a job in flight stays in flight, and a waiting job
+            # cannot be claimed because it was never queued
+            return
+        elif event in (JOB_STATUS, JOB_REMOVED):
+            self._release(item.id)
+        elif event == JOB_ADDED and previous is not None and item.status != JobStatus.PENDING:
+            # Replaced by a job that will never be queued; pending replacements are
+            # admitted again, which notices changed args
+            self._release(item.id)
+
+    def _release(self, job_id: str):
+        """Stop tracking the job; if others were waiting for it, queue the first of them instead"""
+        key = self.waiting_keys.pop(job_id, None)
+        if key is not None:
+            waiting = self.waiting[key]
+            del waiting[job_id]
+            if not waiting:
+                del self.waiting[key]
+
+        key = self.in_flight_keys.pop(job_id, None)
+        if key is None:
+            return
+        del self.in_flight[key]
+        waiting = self.waiting.get(key)
+        while waiting and key not in self.in_flight:
+            next_id = next(iter(waiting))
+            del waiting[next_id]
+            del self.waiting_keys[next_id]
+            job = self.jobs.get(next_id)
+            if job is not None and self.ready is not None:
+                # Admitted again with nothing in flight, so it is queued and flies
+                self.ready.offer(job)
+        if not waiting:
+            self.waiting.pop(key, None)
+
+    # Completing jobs
+
+    def _complete_later(self, key: str, job_ids: List[str], result: Optional[WaveForecastData], source_id: str):
+        for job_id in job_ids:
+            self.completing[job_id] = key
+        self.loop.call_soon(self._complete, key, job_ids, result, source_id)
+
+    def _complete(self, key: str, job_ids: List[str], result: Optional[WaveForecastData], source_id: str):
+        jobs = []
+        for job_id in job_ids:
+            if self.completing.get(job_id) != key:
+                continue
+            del self.completing[job_id]
+            # Skip jobs that were cancelled, removed or given other args in the meantime
+            job = self.jobs.get(job_id)
+            if job is not None and job.status == JobStatus.PENDING and self._key(job) == key:
+                jobs.append(job)
+        if jobs:
+            self.jobs.update_status_many(jobs, JobStatus.COMPLETED, wave_forecast_data=result, result_job_id=source_id)
+
+    # Cached results
+
+    def _lookup(self, key: str) -> Optional[CachedResult]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self.clock():
+            self._drop(key)
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, result: Optional[WaveForecastData], job_id: str, ttl: float):
+        if key in self.entries:
+            self._drop(key)
+        entry = CachedResult(result, job_id, self.clock() + ttl)
+        if entry.size > self.max_bytes:
+            return
+        self.entries[key] = entry
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        self.bytes -= self.entries.pop(key).size
+
+    def clear(self):
+        """Forget every cached result; jobs in flight and waiting are unaffected"""
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "ttl_seconds": dict(self.ttl),
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "in_flight": len(self.in_flight),
+            "waiting": len(self.waiting_keys),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "dedup_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
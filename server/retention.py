@@ -0,0 +1,182 @@
+"""
+Retention: moves finished jobs out of the live store into the archive.
+
+A job becomes eligible under any of three policies:
+
+- it has been in a finished status for longer than that status's TTL;
+- its pipeline has more than ``keep_per_pipeline`` newer jobs;
+- its pipeline is ARCHIVED, in which case every job that is not processing goes.
+
+Pending and processing jobs are otherwise never touched. A job is only archived
+together with every job that lists it as a trigger, so no live job ever loses a
+trigger to retention.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from server.archive import JobArchive
+from server.models import Job, JobStatus, PipelineStatus
+from server.store import JobRepository, PipelineRepository, SortKey, sort_key
+
+# Statuses a job never leaves on its own
+FINISHED = frozenset({JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED})
+
+
+class Retention:
+    """Runs the retention policies in small batches.
+
+    Each batch of at most ``batch_size`` jobs is found with keyset-paginated store
+    queries, written to the archive in a worker thread and then removed from the
+    store, with the event loop free between batches. A job that changes while its
+    batch is being archived stays live and is taken out of the archive again.
+    """
+
+    def __init__(
+        self,
+        jobs: JobRepository,
+        pipelines: PipelineRepository,
+        archive: JobArchive,
+        ttl: Optional[Dict[str, float]] = None,
+        keep_per_pipeline: Optional[int] = None,
+        archive_pipelines: bool = True,
+        batch_size: int = 500,
+    ):
+        self.jobs = jobs
+        self.pipelines = pipelines
+        self.archive = archive
+        self.ttl = {JobStatus(status): seconds for status, seconds in (ttl or {}).items()}
+        self.keep_per_pipeline = keep_per_pipeline
+        self.archive_pipelines = archive_pipelines
+        self.batch_size = batch_size
+        self.lock = asyncio.Lock()
+
+        self.archived = 0
+        self.passes = 0
+        self.last_pass: Optional[Dict[str, Any]] = None
+
+    # Finding candidates
+
+    def _pages(self, keep: Callable[[Job], bool], before: Optional[SortKey] = None, **filters) -> Iterator[List[Job]]:
+        """Matching jobs newest first, one page per step, without the ones ``keep`` rejects"""
+        while True:
+            # Archiving needs trigger ids but nothing further up the trigger graph
+            page = self.jobs.query(before=before, limit=self.batch_size, depth=1, **filters)
+            if not page:
+                return
+            yield [job for job in page if keep(job)]
+            if len(page) < self.batch_size:
+                return
+            before = sort_key(page[-1])
+
+    def _candidates(self, now: datetime) -> Iterator[List[Job]]:
+        for pipeline in list(self.pipelines.values()):
+            if self.archive_pipelines and pipeline.status == PipelineStatus.ARCHIVED:
+                yield from self._pages(lambda job: job.status != JobStatus.PROCESSING, pipeline_id=pipeline.id)
+            elif self.keep_per_pipeline is not None:
+                newest = self.jobs.query(pipeline_id=pipeline.id, limit=self.keep_per_pipeline + 1, depth=0)
+                if len(newest) <= self.keep_per_pipeline:
+                    continue
+                # Everything older than the newest jobs the pipeline keeps
+                before = sort_key(newest[self.keep_per_pipeline - 1]) if self.keep_per_pipeline else None
+                yield from self._pages(lambda job: job.status in FINISHED, before, pipeline_id=pipeline.id)
+
+        if self.ttl:
+            cutoffs = {status: now - timedelta(seconds=seconds) for status, seconds in self.ttl.items()}
+
+            def expired(job: Job) -> bool:
+                cutoff = cutoffs.get(job.status)
+                return cutoff is not None and job.updated_at <= cutoff
+
+            # A job is created before it is last updated, so only jobs created before the
+            # latest cutoff can have expired. One walk over that date range covers every
+            # status; filtering on status instead would rescan each status set per page.
+            yield from self._pages(expired, date_to=max(cutoffs.values()))
+
+    def _closed_under_dependents(self, candidates: List[Job]) -> List[Job]:
+        """The candidates whose dependents are all candidates too"""
+        selected = {job.id: job for job in candidates if job.id in self.jobs}
+        dependents = {job_id: [d.id for d in self.jobs.get_dependents(job_id, depth=0)] for job_id in selected}
+        changed = True
+        while changed:
+            changed = False
+            for job_id in list(selected):
+                if any(dependent_id not in selected for dependent_id in dependents[job_id]):
+                    del selected[job_id]
+                    changed = True
+        return list(selected.values())
+
+    # Archiving
+
+    async def _archive(self, candidates: List[Job]) -> int:
+        jobs = self._closed_under_dependents(candidates)
+        if not jobs:
+            return 0
+        versions = {job.id: job.version for job in jobs}
+
+        await asyncio.to_thread(self.archive.put_many, jobs)
+
+        # The store may have moved on while the batch was written: only jobs that are
+        # unchanged leave it, and changed ones must not linger in the archive
+        removable, changed = [], []
+        for job in jobs:
+            current = self.jobs.get(job.id, depth=0)
+            if current is None:
+                continue
+            if current.version == versions[job.id]:
+                removable.append(job.id)
+            else:
+                changed.append(job.id)
+        if changed:
+            await asyncio.to_thread(self.archive.discard_many, changed)
+
+        # Archiving a job's dependents can fail the same way; keep their triggers then
+        still_live = [job for job in (self.jobs.get(job_id, depth=0) for job_id in removable) if job is not None]
+        removable = [job.id for job in self._closed_under_dependents(still_live)]
+        try:
+            self.jobs.remove_many(removable)
+        except KeyError:
+            # Another process sharing the store removed some of them first
+            return 0
+        return len(removable)
+
+    async def run_pass(self) -> Dict[str, Any]:
+        """Apply every policy once and return a summary of what was archived"""
+        async with self.lock:
+            started = time.perf_counter()
+            archived = 0
+            for candidates in self._candidates(datetime.now()):
+                if candidates:
+                    archived += await self._archive(candidates)
+                # Let requests in between pages even when a page had nothing to archive
+                await asyncio.sleep(0)
+
+            self.archived += archived
+            self.passes += 1
+            self.last_pass = {
+                "finished_at": datetime.now().isoformat(),
+                "seconds": round(time.perf_counter() - started, 3),
+                "archived": archived,
+            }
+            return self.last_pass
+
+    async def run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.run_pass()
+
+    async def status(self) -> Dict[str, Any]:
+        # Reading the archive blocks on its lock, which a pass may be holding
+        archive = await asyncio.to_thread(self.archive.stats)
+        return {
+            "policies": {
+                "ttl_seconds": {status.value: seconds for status, seconds in self.ttl.items()},
+                "keep_per_pipeline": self.keep_per_pipeline,
+                "archive_pipelines": self.archive_pipelines,
+            },
+            "passes": self.passes,
+            "archived": self.archived,
+            "last_pass": self.last_pass,
+            "archive": archive,
+        }
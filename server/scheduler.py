@@ -0,0 +1,213 @@
+import heapq
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from server.models import Job, JobStatus, JobType, Pipeline
+from server.store import JOB_ADDED, JOB_REMOVED, JOB_STATUS, JOB_TRIGGERS, JobRepository
+
+# Priority classes read from ``Pipeline.metadata["priority"]``, with their fair-share weights
+PRIORITY_WEIGHTS = {"high": 4.0, "normal": 2.0, "low": 1.0}
+PRIORITY_ALIASES = {"medium": "normal"}
+DEFAULT_PRIORITY = "normal"
+
+# Seconds of virtual time one job costs a weight-1 pipeline. This also bounds aging:
+# a newly queued job can only overtake jobs that have waited less than QUANTUM / weight.
+QUANTUM = 60.0
+
+
+def priority_class(pipeline: Optional[Pipeline]) -> str:
+    value = ((pipeline.metadata or {}).get("priority") if pipeline else None) or DEFAULT_PRIORITY
+    value = PRIORITY_ALIASES.get(str(value).lower(), str(value).lower())
+    return value if value in PRIORITY_WEIGHTS else DEFAULT_PRIORITY
+
+
+class ClassStats:
+    def __init__(self):
+        self.depth = 0
+        self.dequeued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "dequeued": self.dequeued,
+            "mean_wait": self.total_wait / self.dequeued if self.dequeued else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+class FairQueue:
+    """Ready-job queue ordered by pipeline priority, age and per-pipeline fair share.
+
+    Each job is tagged with a virtual finish time when it is enqueued:
+    ``max(now, pipeline's last tag) + QUANTUM / weight``. Jobs are dequeued smallest
+    tag first, so
+
+    * a pipeline's backlog is spread out in virtual time and interleaves with other
+      pipelines instead of running to completion first (fair share),
+    * higher priority pipelines advance their tags more slowly and get a larger share,
+    * tags are anchored to wall-clock time, so anything that has waited long enough
+      sorts ahead of newer arrivals whatever its priority (aging, no starvation).
+
+    Enqueue and dequeue are O(log n). Removed jobs are discarded lazily when they
+    reach the top of the heap; each heap entry carries the sequence number of its
+    push, so the entry of a job that was removed and queued again is recognised as
+    stale too.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, quantum: float = QUANTUM, clock=time.monotonic):
+        self.weights = weights or PRIORITY_WEIGHTS
+        self.quantum = quantum
+        self.clock = clock
+        self.heap: List[Tuple[float, int, str]] = []
+        self.entries: Dict[str, Tuple[str, float, int]] = {}  # job id -> (priority class, enqueued at, seq)
+        self.finish_tags: Dict[str, float] = {}
+        self.pending: Dict[str, int] = defaultdict(int)  # queued jobs per pipeline
+        self.pipelines: Dict[str, str] = {}  # job id -> pipeline id
+        self.stats: Dict[str, ClassStats] = defaultdict(ClassStats)
+        self.seq = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self.entries
+
+    def push(self, job_id: str, pipeline_id: str, priority: str = DEFAULT_PRIORITY):
+        if job_id in self.entries:
+            return
+        now = self.clock()
+        start = max(now, self.finish_tags.get(pipeline_id, now))
+        tag = start + self.quantum / self.weights.get(priority, 1.0)
+        self.finish_tags[pipeline_id] = tag
+
+        self.seq += 1
+        heapq.heappush(self.heap, (tag, self.seq, job_id))
+        self.entries[job_id] = (priority, now, self.seq)
+        self.pipelines[job_id] = pipeline_id
+        self.pending[pipeline_id] += 1
+        self.stats[priority].depth += 1
+
+    def pop(self) -> Optional[str]:
+        while self.heap:
+            _, seq, job_id = heapq.heappop(self.heap)
+            entry = self.entries.get(job_id)
+            if entry is None or entry[2] != seq:
+                continue
+            priority, enqueued_at = self._forget(job_id)
+            wait = self.clock() - enqueued_at
+            stats = self.stats[priority]
+            stats.dequeued += 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+            return job_id
+        return None
+
+    def discard(self, job_id: str):
+        if job_id in self.entries:
+            self._forget(job_id)
+
+    def _forget(self, job_id: str) -> Tuple[str, float]:
+        priority, enqueued_at, _ = self.entries.pop(job_id)
+        self.stats[priority].depth -= 1
+
+        pipeline_id = self.pipelines.pop(job_id)
+        self.pending[pipeline_id] -= 1
+        if not self.pending[pipeline_id]:
+            # An idle pipeline starts afresh rather than keeping credit or debt
+            del self.pending[pipeline_id]
+            self.finish_tags.pop(pipeline_id, None)
+
+        if not self.entries:
+            self.heap.clear()
+        return priority, enqueued_at
+
+
+def merge_stats(queues: List[FairQueue]) -> Dict[str, Dict[str, Any]]:
+    """Queue depth and wait times per priority class, summed over several queues"""
+    merged: Dict[str, ClassStats] = {priority: ClassStats() for priority in PRIORITY_WEIGHTS}
+    for queue in queues:
+        for priority, stats in queue.stats.items():
+            total = merged.setdefault(priority, ClassStats())
+            total.depth += stats.depth
+            total.dequeued += stats.dequeued
+            total.total_wait += stats.total_wait
+            total.max_wait = max(total.max_wait, stats.max_wait)
+    return {priority: stats.as_dict() for priority, stats in merged.items()}
+
+
+class ReadyQueue:
+    """Pending jobs whose triggers have all completed, in one ``FairQueue`` per job type.
+
+    Kept current from store events, so a job is queued when it is created or retried,
+    when its last trigger completes, or when a blocking trigger is removed, and dropped
+    as soon as it leaves PENDING. Every dispatcher (the built-in executor and remote
+    workers claiming jobs) takes work from here, so no one ever scans the store for it.
+    """
+
+    def __init__(self, jobs: JobRepository):
+        self.jobs = jobs
+        self.queues: Dict[JobType, FairQueue] = defaultdict(FairQueue)
+        # Called with the job type whenever a job becomes ready
+        self.consumers: List[Callable[[JobType], None]] = []
+        # Asked about every job about to be queued; one returning False keeps it out
+        self.filters: List[Callable[[Job], bool]] = []
+
+    def start(self):
+        self.jobs.subscribe(self.listener)
+        # Pick up whatever was already waiting, oldest first
+        for job in reversed(self.jobs.query(status=JobStatus.PENDING)):
+            self.offer(job)
+
+    def stop(self):
+        self.jobs.unsubscribe(self.listener)
+
+    def listener(self, event: str, item: Any, previous: Any = None):
+        if not isinstance(item, Job):
+            return
+
+        if event in (JOB_ADDED, JOB_TRIGGERS):
+            self.offer(item)
+        elif event == JOB_STATUS:
+            if item.status == JobStatus.PENDING:
+                self.offer(item)
+            else:
+                self.queues[item.type].discard(item.id)
+                if item.status == JobStatus.COMPLETED:
+                    for dependent in self.jobs.get_dependents(item.id):
+                        self.offer(dependent)
+        elif event == JOB_REMOVED:
+            self.queues[item.type].discard(item.id)
+
+    def is_ready(self, job: Job) -> bool:
+        for trigger in job.triggers:
+            current = self.jobs.get(trigger.id)
+            if current is not None and current.status != JobStatus.COMPLETED:
+                return False
+        return True
+
+    def offer(self, job: Job):
+        if job.status != JobStatus.PENDING or job.id in self.queues[job.type] or not self.is_ready(job):
+            return
+        if not all(admit(job) for admit in self.filters):
+            return
+        self.queues[job.type].push(job.id, job.pipeline_id, priority_class(job.pipeline))
+        for consumer in self.consumers:
+            consumer(job.type)
+
+    def pop(self, job_type: JobType) -> Optional[Job]:
+        queue = self.queues[job_type]
+        while queue:
+            job = self.jobs.get(queue.pop())
+            # Safety net: the job may have changed without the queue hearing about it
+            if job is not None and job.status == JobStatus.PENDING:
+                return job
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth_by_type": {job_type.value: len(queue) for job_type, queue in self.queues.items()},
+            "priorities": merge_stats(list(self.queues.values())),
+        }
@@ -0,0 +1,54 @@
+"""
+Search terms for finding jobs by their args and error messages.
+
+A job is indexed under one term per scalar arg, ``("args.<key>", value)``, and one
+per word of its error message, ``("error_message", word)``. Values and words are
+case-folded, and numbers and booleans are written as in JSON, so ``days:3`` finds
+``{"days": 3}`` and ``location:san francisco bay`` finds "San Francisco Bay".
+Nested args (lists and objects) are not indexed.
+
+Both stores index the same terms, so a search means the same thing whichever one
+serves it.
+"""
+import json
+import re
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+Term = Tuple[str, str]
+
+ERROR_FIELD = "error_message"
+ARG_PREFIX = "args."
+
+_WORD = re.compile(r"\w+")
+
+
+def _normalize(value: Any) -> Optional[str]:
+    if isinstance(value, str):
+        return value.casefold()
+    if value is None or isinstance(value, (bool, int, float)):
+        return json.dumps(value)
+    return None
+
+
+def words(text: Optional[str]) -> Set[str]:
+    """The distinct case-folded words of ``text``"""
+    return set(_WORD.findall(text.casefold())) if text else set()
+
+
+def arg_terms(args: Dict[str, Any]) -> Iterator[Term]:
+    for key, value in args.items():
+        normalized = _normalize(value)
+        if normalized is not None:
+            yield (ARG_PREFIX + key, normalized)
+
+
+def error_terms(error_message: Optional[str]) -> Iterator[Term]:
+    for word in words(error_message):
+        yield (ERROR_FIELD, word)
+
+
+def search_terms(args: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> Set[Term]:
+    """The terms a job must have to match every arg and every word of ``error``"""
+    terms = set(arg_terms(args or {}))
+    terms.update(error_terms(error))
+    return terms
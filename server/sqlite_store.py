@@ -0,0 +1,850 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from server.forecast import compact_forecast
+from server.models import Job, JobStatus, JobType, Pipeline, PipelineStatus, WaveForecastData
+from server.search import ERROR_FIELD, arg_terms, error_terms, search_terms
+from server.store import (
+    JOB_ADDED, JOB_REMOVED, JOB_STATUS, JOB_TRIGGERS, PIPELINE_ADDED,
+    TRIGGER_DEPTH, GraphNode, JobRepository, PipelineRepository, SortKey,
+)
+from server.workers import Lease
+
+# Mirrors the pipelines/jobs/job_triggers tables in shared/schema.ts.
+# Timestamps are fixed-width ISO strings so they sort correctly as text.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pipelines (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    metadata TEXT,
+    version INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    pipeline_id TEXT NOT NULL REFERENCES pipelines(id),
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error_message TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    args TEXT NOT NULL,
+    wave_forecast_data TEXT,
+    version INTEGER NOT NULL DEFAULT 1,
+    result_job_id TEXT
+);
+
+CREATE TABLE IF NOT EXISTS job_triggers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    trigger_id TEXT NOT NULL REFERENCES jobs(id)
+);
+
+CREATE INDEX IF NOT EXISTS jobs_created_at_idx ON jobs (created_at, id);
+CREATE INDEX IF NOT EXISTS jobs_type_idx ON jobs (type, created_at, id);
+CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, created_at, id);
+CREATE INDEX IF NOT EXISTS jobs_pipeline_idx ON jobs (pipeline_id, created_at, id);
+CREATE INDEX IF NOT EXISTS job_triggers_job_idx ON job_triggers (job_id);
+CREATE INDEX IF NOT EXISTS job_triggers_trigger_idx ON job_triggers (trigger_id);
+
+-- Coordination between processes sharing the database (not part of shared/schema.ts):
+-- every write in shared mode is logged to changes, and worker leases live in leases
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    event TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    data TEXT,
+    created REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS leases (
+    job_id TEXT PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS leases_expires_idx ON leases (expires_at);
+"""
+
+# Search terms of every job (see server/search.py), also not part of shared/schema.ts.
+# Created apart from SCHEMA so an existing database can be indexed in the same transaction.
+TERMS_SCHEMA = [
+    """
+    CREATE TABLE job_terms (
+        field TEXT NOT NULL,
+        value TEXT NOT NULL,
+        job_id TEXT NOT NULL,
+        PRIMARY KEY (field, value, job_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX job_terms_job_idx ON job_terms (job_id, field)",
+]
+
+JOB_COLUMNS = (
+    "id, pipeline_id, type, status, error_message, created_at, updated_at, args, wave_forecast_data, version, "
+    "result_job_id"
+)
+PIPELINE_COLUMNS = "id, name, description, status, created_at, updated_at, metadata, version"
+
+# Columns added after the original schema, with the DDL that adds them to older databases
+MIGRATIONS = [
+    ("jobs", "version", "ALTER TABLE jobs ADD COLUMN version INTEGER NOT NULL DEFAULT 1"),
+    ("pipelines", "version", "ALTER TABLE pipelines ADD COLUMN version INTEGER NOT NULL DEFAULT 1"),
+    ("jobs", "result_job_id", "ALTER TABLE jobs ADD COLUMN result_job_id TEXT"),
+]
+
+# Upserts rather than INSERT OR REPLACE, which would delete rows other tables reference
+INSERT_JOB = f"""
+    INSERT INTO jobs ({JOB_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        pipeline_id = excluded.pipeline_id, type = excluded.type, status = excluded.status,
+        error_message = excluded.error_message, created_at = excluded.created_at,
+        updated_at = excluded.updated_at, args = excluded.args,
+        wave_forecast_data = excluded.wave_forecast_data, result_job_id = excluded.result_job_id,
+        version = MAX(excluded.version, jobs.version + 1)
+"""
+INSERT_TRIGGER = "INSERT INTO job_triggers (job_id, trigger_id) VALUES (?, ?)"
+INSERT_PIPELINE = f"""
+    INSERT INTO pipelines ({PIPELINE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        name = excluded.name, description = excluded.description, status = excluded.status,
+        created_at = excluded.created_at, updated_at = excluded.updated_at,
+        metadata = excluded.metadata, version = MAX(excluded.version, pipelines.version + 1)
+"""
+# Versions are bumped in SQL so writers in different processes never reuse one
+UPDATE_STATUS = """
+    UPDATE jobs SET status = ?, error_message = ?, result_job_id = ?, updated_at = ?, version = version + 1
+    WHERE id = ?
+"""
+TRANSITION_STATUS = """
+    UPDATE jobs SET status = ?, error_message = NULL, result_job_id = NULL, updated_at = ?, version = version + 1
+    WHERE id = ? AND status = ? RETURNING version
+"""
+UPDATE_RESULT = "UPDATE jobs SET wave_forecast_data = ? WHERE id = ?"
+UPDATE_UPDATED_AT = "UPDATE jobs SET updated_at = ?, version = version + 1 WHERE id = ?"
+BUMP_VERSION = "UPDATE jobs SET version = version + 1 WHERE id = ?"
+DELETE_JOB_TRIGGERS = "DELETE FROM job_triggers WHERE job_id = ?"
+DELETE_TRIGGERS_OF = "DELETE FROM job_triggers WHERE trigger_id = ?"
+DELETE_JOB = "DELETE FROM jobs WHERE id = ?"
+INSERT_TERM = "INSERT OR IGNORE INTO job_terms (field, value, job_id) VALUES (?, ?, ?)"
+DELETE_JOB_TERMS = "DELETE FROM job_terms WHERE job_id = ?"
+DELETE_ERROR_TERMS = f"DELETE FROM job_terms WHERE job_id = ? AND field = '{ERROR_FIELD}'"
+INSERT_CHANGE = "INSERT INTO changes (origin, event, item_id, data, created) VALUES (?, ?, ?, ?, ?)"
+
+# SQLite's default limit on bound parameters is 999
+CHUNK_SIZE = 500
+
+# Shared mode: how long a write waits for another process's transaction, and how
+# long logged changes are kept for processes that have not replayed them yet
+BUSY_TIMEOUT_MS = 5000
+CHANGE_RETENTION = 600
+
+
+def _timestamp(value: datetime) -> str:
+    return value.isoformat(timespec="microseconds")
+
+
+def _chunks(items: Sequence[str]) -> Iterator[Sequence[str]]:
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
+
+
+def _placeholders(count: int) -> str:
+    return ", ".join("?" * count)
+
+
+def _term_rows(job_id: str, args: dict, error_message: Optional[str]) -> List[Tuple[str, str, str]]:
+    return [(field, value, job_id) for field, value in chain(arg_terms(args), error_terms(error_message))]
+
+
+class SqliteDatabase:
+    """A single WAL-mode SQLite connection shared by the job and pipeline stores.
+
+    Writes are grouped into one transaction and committed once ``batch_size``
+    writes are pending or ``commit_interval`` seconds have passed, whichever comes
+    first. Each write runs in its own savepoint so a failed write never takes the
+    rest of the batch down with it.
+
+    With ``shared`` set, several processes (uvicorn workers) use the same file.
+    Every write then commits straight away and takes the write lock up front,
+    waiting up to ``BUSY_TIMEOUT_MS`` for other processes. Each write is also
+    logged to the changes table, where the other processes pick it up.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, commit_interval: float = 0.05, shared: bool = False):
+        self.path = path
+        self.shared = shared
+        self.batch_size = 1 if shared else batch_size
+        self.commit_interval = commit_interval
+        self.lock = threading.RLock()
+        self.pending = 0
+        self.held = 0
+        self.timer: Optional[threading.Timer] = None
+
+        # Identifies this process's entries in the changes table
+        self.origin = uuid.uuid4().hex
+        self.seq = 0
+        self.data_version: Optional[int] = None
+        self.pruned = time.time()
+
+        # Autocommit mode; transactions are managed explicitly below
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if shared:
+            self.conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        for table, column, ddl in MIGRATIONS:
+            columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+            if column not in columns:
+                self.conn.execute(ddl)
+        self._create_terms()
+
+        # Commit whatever is still batched if the process exits without a clean shutdown
+        atexit.register(self.flush)
+
+    def _create_terms(self):
+        # Inside one write transaction, so of several processes opening an older
+        # database at once exactly one indexes the jobs already in it
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'job_terms'").fetchone()
+            if not exists:
+                for ddl in TERMS_SCHEMA:
+                    self.conn.execute(ddl)
+                rows = self.conn.execute("SELECT id, args, error_message FROM jobs")
+                while True:
+                    chunk = rows.fetchmany(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    self.conn.executemany(INSERT_TERM, [
+                        term for job_id, args, error_message in chunk
+                        for term in _term_rows(job_id, json.loads(args), error_message)
+                    ])
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def read(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    @contextmanager
+    def write(self):
+        with self.lock:
+            if not self.conn.in_transaction:
+                # Take the write lock now: a deferred transaction that later needs it
+                # fails at once if another process wrote in the meantime
+                self.conn.execute("BEGIN IMMEDIATE" if self.shared else "BEGIN")
+            self.conn.execute("SAVEPOINT write")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK TO write")
+                self.conn.execute("RELEASE write")
+                raise
+            self.conn.execute("RELEASE write")
+
+            # Inside an explicit transaction, which commits when it ends
+            if self.held:
+                return
+            self.pending += 1
+            if self.pending >= self.batch_size:
+                self.flush()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.commit_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.conn.in_transaction:
+                self.conn.execute("COMMIT")
+            self.pending = 0
+
+    @contextmanager
+    def transaction(self):
+        """Hold the write lock across several writes and commit them together"""
+        with self.lock:
+            self.flush()
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.held += 1
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+            finally:
+                self.held -= 1
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.conn.close()
+        atexit.unregister(self.flush)
+
+    # Change log for shared mode
+
+    def log(self, conn: sqlite3.Connection, changes: List[Tuple[str, str, Optional[dict]]]):
+        """Record (event, item id, data) changes as part of the current write"""
+        if not self.shared or not changes:
+            return
+        now = time.time()
+        conn.executemany(INSERT_CHANGE, [
+            (self.origin, event, item_id, json.dumps(data) if data is not None else None, now)
+            for event, item_id, data in changes
+        ])
+
+    def mark_synced(self):
+        """Treat everything logged so far as already seen"""
+        with self.lock:
+            self.seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+            self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def changes(self) -> List[Tuple[str, str, Optional[dict]]]:
+        """Changes other processes logged since the last call, oldest first"""
+        with self.lock:
+            # data_version only moves when another connection commits, so an idle
+            # database costs one pragma per call rather than a query
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self.data_version:
+                return []
+            self.data_version = data_version
+
+            rows = self.conn.execute(
+                "SELECT seq, origin, event, item_id, data FROM changes WHERE seq > ? ORDER BY seq", (self.seq,)
+            ).fetchall()
+            if rows:
+                self.seq = rows[-1][0]
+            self._prune()
+            return [
+                (event, item_id, json.loads(data) if data is not None else None)
+                for _, origin, event, item_id, data in rows
+                if origin != self.origin
+            ]
+
+    def _prune(self):
+        now = time.time()
+        if now - self.pruned < CHANGE_RETENTION / 10:
+            return
+        self.pruned = now
+        with self.write() as conn:
+            conn.execute("DELETE FROM changes WHERE created < ?", (now - CHANGE_RETENTION,))
+
+
+class SqlitePipelineStore(PipelineRepository):
+    def __init__(self, db: SqliteDatabase):
+        super().__init__()
+        self.db = db
+
+    def get(self, pipeline_id: str, default: Optional[Pipeline] = None) -> Optional[Pipeline]:
+        rows = self.db.read(f"SELECT {PIPELINE_COLUMNS} FROM pipelines WHERE id = ?", (pipeline_id,))
+        return self._from_row(rows[0]) if rows else default
+
+    def get_many(self, pipeline_ids: Iterable[str]) -> Dict[str, Pipeline]:
+        ids = list(set(pipeline_ids))
+        pipelines = {}
+        for chunk in _chunks(ids):
+            sql = f"SELECT {PIPELINE_COLUMNS} FROM pipelines WHERE id IN ({_placeholders(len(chunk))})"
+            for row in self.db.read(sql, chunk):
+                pipelines[row[0]] = self._from_row(row)
+        return pipelines
+
+    def __contains__(self, pipeline_id: str) -> bool:
+        return bool(self.db.read("SELECT 1 FROM pipelines WHERE id = ?", (pipeline_id,)))
+
+    def __len__(self) -> int:
+        return self.db.read("SELECT COUNT(*) FROM pipelines")[0][0]
+
+    def values(self) -> List[Pipeline]:
+        rows = self.db.read(f"SELECT {PIPELINE_COLUMNS} FROM pipelines ORDER BY created_at, id")
+        return [self._from_row(row) for row in rows]
+
+    def add(self, pipeline: Pipeline):
+        with self.db.write() as conn:
+            conn.execute(INSERT_PIPELINE, (
+                pipeline.id,
+                pipeline.name,
+                pipeline.description,
+                pipeline.status.value,
+                _timestamp(pipeline.created_at),
+                _timestamp(pipeline.updated_at),
+                json.dumps(pipeline.metadata) if pipeline.metadata is not None else None,
+                pipeline.version,
+            ))
+            self.db.log(conn, [(PIPELINE_ADDED, pipeline.id, None)])
+        self._emit(PIPELINE_ADDED, pipeline)
+
+    @staticmethod
+    def _from_row(row: tuple) -> Pipeline:
+        return Pipeline(
+            id=row[0],
+            name=row[1],
+            description=row[2],
+            status=PipelineStatus(row[3]),
+            created_at=datetime.fromisoformat(row[4]),
+            updated_at=datetime.fromisoformat(row[5]),
+            metadata=json.loads(row[6]) if row[6] is not None else None,
+            version=row[7],
+        )
+
+
+class SqliteJobStore(JobRepository):
+    """Durable job storage on SQLite.
+
+    Jobs are rebuilt from rows on every read, with their triggers loaded level by
+    level (one query per level, not per job) down to the requested depth.
+    """
+
+    def __init__(self, db: SqliteDatabase, pipelines: SqlitePipelineStore):
+        super().__init__()
+        self.db = db
+        self.pipelines = pipelines
+
+    def get(self, job_id: str, default: Optional[Job] = None, depth: int = TRIGGER_DEPTH) -> Optional[Job]:
+        return self._load([job_id], depth).get(job_id, default)
+
+    def __contains__(self, job_id: str) -> bool:
+        return bool(self.db.read("SELECT 1 FROM jobs WHERE id = ?", (job_id,)))
+
+    def __len__(self) -> int:
+        return self.db.read("SELECT COUNT(*) FROM jobs")[0][0]
+
+    def values(self) -> Iterator[Job]:
+        # Walk the table in created_at order one page at a time
+        before = None
+        while True:
+            page = self.query(before=before, limit=CHUNK_SIZE)
+            if not page:
+                return
+            yield from page
+            before = (page[-1].created_at, page[-1].id)
+
+    def add(self, job: Job):
+        self.add_many([job])
+
+    def add_many(self, jobs: List[Job]):
+        # One savepoint for the whole batch: either every job is stored or none is
+        with self.db.write() as conn:
+            conn.executemany(DELETE_JOB_TRIGGERS, [(job.id,) for job in jobs])
+            conn.executemany(DELETE_JOB_TERMS, [(job.id,) for job in jobs])
+            conn.executemany(INSERT_JOB, [self._to_row(job) for job in jobs])
+            conn.executemany(INSERT_TRIGGER, [
+                (job.id, trigger.id) for job in jobs for trigger in job.triggers
+            ])
+            conn.executemany(INSERT_TERM, [
+                term for job in jobs for term in _term_rows(job.id, job.args, job.error_message)
+            ])
+            self.db.log(conn, [(JOB_ADDED, job.id, {"status": job.status.value}) for job in jobs])
+        for job in jobs:
+            self._emit(JOB_ADDED, job)
+
+    @staticmethod
+    def _to_row(job: Job) -> tuple:
+        return (
+            job.id,
+            job.pipeline_id,
+            job.type.value,
+            job.status.value,
+            job.error_message,
+            _timestamp(job.created_at),
+            _timestamp(job.updated_at),
+            json.dumps(job.args),
+            json.dumps(compact_forecast(job.wave_forecast_data)) if job.wave_forecast_data else None,
+            job.version,
+            job.result_job_id,
+        )
+
+    def remove(self, job_id: str) -> Job:
+        if job_id not in self:
+            raise KeyError(job_id)
+        return self.remove_many([job_id])[0]
+
+    def remove_many(self, job_ids: List[str]) -> List[Job]:
+        loaded = self._load(list(job_ids))
+        missing = [job_id for job_id in job_ids if job_id not in loaded]
+        if missing:
+            raise KeyError(missing[0])
+        removed = [loaded[job_id] for job_id in job_ids]
+        removed_ids = set(job_ids)
+
+        # Surviving jobs that trigger off any removed job lose that trigger
+        dependent_ids = set()
+        for chunk in _chunks(job_ids):
+            rows = self.db.read(
+                f"SELECT job_id FROM job_triggers WHERE trigger_id IN ({_placeholders(len(chunk))})", chunk
+            )
+            dependent_ids.update(row[0] for row in rows)
+        dependent_ids -= removed_ids
+        loaded = self._load(list(dependent_ids))
+        dependents = [loaded[job_id] for job_id in dependent_ids]
+
+        with self.db.write() as conn:
+            conn.executemany(BUMP_VERSION, [(dependent.id,) for dependent in dependents])
+            params = [(job_id,) for job_id in job_ids]
+            conn.executemany(DELETE_TRIGGERS_OF, params)
+            conn.executemany(DELETE_JOB_TRIGGERS, params)
+            conn.executemany(DELETE_JOB_TERMS, params)
+            conn.executemany(DELETE_JOB, params)
+            # Replaying processes can no longer load removed jobs, so their rows travel with the change
+            self.db.log(conn, [(JOB_REMOVED, job.id, {"row": self._to_row(job)}) for job in removed])
+            self.db.log(conn, [(JOB_TRIGGERS, dependent.id, None) for dependent in dependents])
+
+        for job in removed:
+            self._emit(JOB_REMOVED, job)
+        for dependent in dependents:
+            dependent.triggers = [t for t in dependent.triggers if t.id not in removed_ids]
+            dependent.version += 1
+            self._emit(JOB_TRIGGERS, dependent)
+        return removed
+
+    def update_status(
+        self,
+        job: Job,
+        status: JobStatus,
+        error_message: Optional[str] = None,
+        wave_forecast_data: Optional[WaveForecastData] = None,
+        result_job_id: Optional[str] = None,
+    ):
+        self.update_status_many([job], status, error_message, wave_forecast_data, result_job_id)
+
+    def update_status_many(
+        self,
+        jobs: List[Job],
+        status: JobStatus,
+        error_message: Optional[str] = None,
+        wave_forecast_data: Optional[WaveForecastData] = None,
+        result_job_id: Optional[str] = None,
+    ):
+        now = datetime.now()
+        previous = []
+        for job in jobs:
+            previous.append(job.status)
+            job.status = status
+            job.error_message = error_message
+            if wave_forecast_data is not None:
+                job.wave_forecast_data = wave_forecast_data
+            job.result_job_id = result_job_id
+            job.updated_at = now
+            job.version += 1
+
+        with self.db.write() as conn:
+            conn.executemany(UPDATE_STATUS, [
+                (status.value, error_message, result_job_id, _timestamp(now), job.id) for job in jobs
+            ])
+            conn.executemany(DELETE_ERROR_TERMS, [(job.id,) for job in jobs])
+            conn.executemany(INSERT_TERM, [
+                (field, value, job.id) for job in jobs for field, value in error_terms(error_message)
+            ])
+            if wave_forecast_data is not None:
+                result = json.dumps(compact_forecast(wave_forecast_data))
+                conn.executemany(UPDATE_RESULT, [(result, job.id) for job in jobs])
+            self.db.log(conn, [
+                (JOB_STATUS, job.id, {"status": status.value, "previous": previous_status.value})
+                for job, previous_status in zip(jobs, previous)
+            ])
+        for job, previous_status in zip(jobs, previous):
+            self._emit(JOB_STATUS, job, previous_status)
+
+    def transition_many(self, jobs: List[Job], expected: JobStatus, status: JobStatus) -> List[Job]:
+        # The status check happens in the UPDATE itself, so it holds against other processes
+        now = datetime.now()
+        moved = []
+        with self.db.write() as conn:
+            for job in jobs:
+                rows = conn.execute(TRANSITION_STATUS, (status.value, _timestamp(now), job.id, expected.value)).fetchall()
+                if rows:
+                    moved.append((job, rows[0][0]))
+            conn.executemany(DELETE_ERROR_TERMS, [(job.id,) for job, _ in moved])
+            self.db.log(conn, [
+                (JOB_STATUS, job.id, {"status": status.value, "previous": expected.value}) for job, _ in moved
+            ])
+
+        for job, version in moved:
+            job.status = status
+            job.error_message = None
+            job.result_job_id = None
+            job.updated_at = now
+            job.version = version
+            self._emit(JOB_STATUS, job, expected)
+        return [job for job, _ in moved]
+
+    def set_triggers(self, job: Job, triggers: List[Job]):
+        job.triggers = triggers
+        job.updated_at = datetime.now()
+        job.version += 1
+
+        with self.db.write() as conn:
+            conn.execute(DELETE_JOB_TRIGGERS, (job.id,))
+            conn.executemany(INSERT_TRIGGER, [(job.id, trigger.id) for trigger in triggers])
+            conn.execute(UPDATE_UPDATED_AT, (_timestamp(job.updated_at), job.id))
+            self.db.log(conn, [(JOB_TRIGGERS, job.id, None)])
+        self._emit(JOB_TRIGGERS, job)
+
+    def counts(self) -> Dict[Tuple[str, str, str], int]:
+        rows = self.db.read("SELECT pipeline_id, status, type, COUNT(*) FROM jobs GROUP BY pipeline_id, status, type")
+        return {(pipeline_id, status, job_type): count for pipeline_id, status, job_type, count in rows}
+
+    def graph_nodes(self, pipeline_id: str) -> List[GraphNode]:
+        rows = self.db.read(
+            "SELECT id, type, status, created_at, updated_at FROM jobs WHERE pipeline_id = ?", (pipeline_id,)
+        )
+        edges = self.db.read(
+            "SELECT t.job_id, t.trigger_id FROM job_triggers t JOIN jobs j ON j.id = t.job_id "
+            "WHERE j.pipeline_id = ? ORDER BY t.id",
+            (pipeline_id,),
+        )
+        triggers: Dict[str, List[str]] = defaultdict(list)
+        for job_id, trigger_id in edges:
+            triggers[job_id].append(trigger_id)
+        return [
+            (
+                job_id,
+                JobType(job_type),
+                JobStatus(status),
+                datetime.fromisoformat(created_at),
+                datetime.fromisoformat(updated_at),
+                tuple(triggers.get(job_id, ())),
+            )
+            for job_id, job_type, status, created_at, updated_at in rows
+        ]
+
+    def get_dependents(self, job_id: str, depth: int = TRIGGER_DEPTH) -> List[Job]:
+        rows = self.db.read("SELECT job_id FROM job_triggers WHERE trigger_id = ?", (job_id,))
+        dependent_ids = [row[0] for row in rows]
+        loaded = self._load(dependent_ids, depth)
+        jobs = [loaded[dependent_id] for dependent_id in set(dependent_ids)]
+        jobs.sort(key=lambda job: (job.created_at, job.id), reverse=True)
+        return jobs
+
+    def query(
+        self,
+        type: Optional[str] = None,
+        status: Optional[str] = None,
+        pipeline_id: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        before: Optional[SortKey] = None,
+        limit: Optional[int] = None,
+        args: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        depth: int = TRIGGER_DEPTH,
+    ) -> List[Job]:
+        clauses = []
+        params: List = []
+        for field, value in search_terms(args, error):
+            clauses.append("id IN (SELECT job_id FROM job_terms WHERE field = ? AND value = ?)")
+            params.extend((field, value))
+        for column, value in (("type", type), ("status", status), ("pipeline_id", pipeline_id)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(getattr(value, "value", value))
+        if date_from is not None:
+            clauses.append("created_at >= ?")
+            params.append(_timestamp(date_from))
+        if date_to is not None:
+            clauses.append("created_at <= ?")
+            params.append(_timestamp(date_to))
+        if before is not None:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend((_timestamp(before[0]), before[1]))
+
+        sql = "SELECT id FROM jobs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        ids = [row[0] for row in self.db.read(sql, params)]
+        loaded = self._load(ids, depth)
+        return [loaded[job_id] for job_id in ids]
+
+    def _load(self, job_ids: List[str], depth: int = TRIGGER_DEPTH) -> Dict[str, Job]:
+        """Build Job objects for ``job_ids`` with their trigger graph attached down to ``depth``"""
+        rows: Dict[str, tuple] = {}
+        edges: Dict[str, List[str]] = {}
+        levels: Dict[str, int] = {}
+
+        # Breadth-first so each job is assigned the shallowest level it appears at
+        frontier = list(dict.fromkeys(job_ids))
+        for level in range(depth + 1):
+            frontier = [job_id for job_id in frontier if job_id not in rows]
+            if not frontier:
+                break
+
+            for chunk in _chunks(frontier):
+                marks = _placeholders(len(chunk))
+                for row in self.db.read(f"SELECT {JOB_COLUMNS} FROM jobs WHERE id IN ({marks})", chunk):
+                    rows[row[0]] = row
+                    levels[row[0]] = level
+
+            if level == depth:
+                break
+
+            next_frontier = []
+            for chunk in _chunks(frontier):
+                marks = _placeholders(len(chunk))
+                sql = f"SELECT job_id, trigger_id FROM job_triggers WHERE job_id IN ({marks}) ORDER BY id"
+                for job_id, trigger_id in self.db.read(sql, chunk):
+                    edges.setdefault(job_id, []).append(trigger_id)
+                    next_frontier.append(trigger_id)
+            frontier = next_frontier
+
+        pipelines = self.pipelines.get_many(row[1] for row in rows.values())
+        jobs = {job_id: self._from_row(row, pipelines.get(row[1])) for job_id, row in rows.items()}
+
+        # Attach triggers once every object exists, so shared triggers stay shared
+        for job_id, job in jobs.items():
+            if levels[job_id] < depth:
+                job.triggers = [jobs[t] for t in edges.get(job_id, ()) if t in jobs]
+
+        return jobs
+
+    @staticmethod
+    def _from_row(row: tuple, pipeline: Optional[Pipeline]) -> Job:
+        return Job(
+            id=row[0],
+            pipeline_id=row[1],
+            type=JobType(row[2]),
+            status=JobStatus(row[3]),
+            error_message=row[4],
+            created_at=datetime.fromisoformat(row[5]),
+            updated_at=datetime.fromisoformat(row[6]),
+            args=json.loads(row[7]),
+            wave_forecast_data=WaveForecastData.model_validate_json(row[8]) if row[8] else None,
+            version=row[9],
+            result_job_id=row[10],
+            triggers=[],
+            pipeline=pipeline,
+        )
+
+    def exclusive(self):
+        if not self.db.shared:
+            return super().exclusive()
+        return self._exclusive()
+
+    @contextmanager
+    def _exclusive(self):
+        with self.db.transaction():
+            self.db.mark_synced()
+            yield
+
+    def sync(self) -> int:
+        changes = self.db.changes()
+        if not changes:
+            return 0
+
+        loaded = self._load([item_id for event, item_id, _ in changes if event in (JOB_ADDED, JOB_STATUS, JOB_TRIGGERS)])
+        pipelines = self.pipelines.get_many(item_id for event, item_id, _ in changes if event == PIPELINE_ADDED)
+        for event, item_id, data in changes:
+            if event == PIPELINE_ADDED:
+                if item_id in pipelines:
+                    self.pipelines._emit(PIPELINE_ADDED, pipelines[item_id])
+            elif event == JOB_REMOVED:
+                row = data["row"]
+                self._emit(JOB_REMOVED, self._from_row(row, self.pipelines.get(row[1])))
+            elif item_id in loaded:
+                job = loaded[item_id]
+                # Listeners see the job as it was right after this change, not as it is now
+                if event == JOB_STATUS:
+                    self._emit(JOB_STATUS, job.model_copy(update={"status": JobStatus(data["status"])}),
+                               JobStatus(data["previous"]))
+                elif event == JOB_ADDED:
+                    self._emit(JOB_ADDED, job.model_copy(update={"status": JobStatus(data["status"])}))
+                else:
+                    self._emit(event, job)
+        return len(changes)
+
+    def lease_table(self) -> Optional["SqliteLeaseTable"]:
+        return SqliteLeaseTable(self.db) if self.db.shared else None
+
+    def flush(self):
+        self.db.flush()
+
+    def close(self):
+        self.db.close()
+
+
+class SqliteLeaseTable:
+    """Worker leases in the database, so every process sees the same ones.
+
+    Each check-and-change is a single UPDATE or DELETE whose row count says whether
+    it applied, which keeps it atomic however many processes race for a lease.
+    """
+
+    def __init__(self, db: SqliteDatabase):
+        self.db = db
+
+    def __len__(self) -> int:
+        return self.db.read("SELECT COUNT(*) FROM leases")[0][0]
+
+    def __contains__(self, job_id: str) -> bool:
+        return bool(self.db.read("SELECT 1 FROM leases WHERE job_id = ?", (job_id,)))
+
+    def put_many(self, leases: List[Lease]):
+        with self.db.write() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO leases (job_id, worker_id, expires_at) VALUES (?, ?, ?)",
+                [(lease.job_id, lease.worker_id, lease.expires_at) for lease in leases],
+            )
+
+    def extend(self, job_id: str, worker_id: str, expires_at: float, now: float) -> bool:
+        with self.db.write() as conn:
+            cursor = conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE job_id = ? AND worker_id = ? AND expires_at > ?",
+                (expires_at, job_id, worker_id, now),
+            )
+            return cursor.rowcount > 0
+
+    def take(self, job_id: str, worker_id: str, now: float) -> bool:
+        with self.db.write() as conn:
+            cursor = conn.execute(
+                "DELETE FROM leases WHERE job_id = ? AND worker_id = ? AND expires_at > ?", (job_id, worker_id, now)
+            )
+            return cursor.rowcount > 0
+
+    def discard(self, job_id: str):
+        # Replayed changes arrive late: by then another process may have claimed the job
+        # again, so the lease only goes if the job really has stopped processing
+        with self.db.write() as conn:
+            conn.execute(
+                "DELETE FROM leases WHERE job_id = ? AND NOT EXISTS (SELECT 1 FROM jobs WHERE id = ? AND status = ?)",
+                (job_id, job_id, JobStatus.PROCESSING.value),
+            )
+
+    def expire(self, now: float) -> List[str]:
+        with self.db.write() as conn:
+            return [row[0] for row in conn.execute("DELETE FROM leases WHERE expires_at <= ? RETURNING job_id", (now,))]
+
+
+def open_sqlite_store(database_url: str, shared: bool = False) -> Tuple[SqliteJobStore, SqlitePipelineStore]:
+    # sqlite:///relative.db, sqlite:////absolute/path.db or sqlite:///:memory:
+    path = database_url[len("sqlite:///"):] if database_url.startswith("sqlite:///") else database_url[len("sqlite://"):]
+    if shared and (not path or path == ":memory:"):
+        raise ValueError("A store shared between processes needs a database file, not :memory:")
+    db = SqliteDatabase(path or ":memory:", shared=shared)
+    pipelines = SqlitePipelineStore(db)
+    return SqliteJobStore(db, pipelines), pipelines
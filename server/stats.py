@@ -0,0 +1,183 @@
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from server.models import Job, JobStatus
+from server.store import JOB_ADDED, JOB_REMOVED, JOB_STATUS, JobRepository
+
+# Sliding windows reported for the failure rate, in minutes
+FAILURE_WINDOWS = {"5m": 5, "1h": 60, "24h": 1440}
+
+# Histogram resolutions: bucket size in minutes and number of buckets returned
+HISTOGRAMS = {"minute": (1, 60), "hour": (60, 24)}
+
+# One slot per minute of the longest window
+SLOTS = 1440
+
+TERMINAL = (JobStatus.COMPLETED.value, JobStatus.FAILED.value)
+
+
+class MinuteRing:
+    """Per-minute event counts for the last ``SLOTS`` minutes.
+
+    Slot ``minute % SLOTS`` holds that minute's counts, and a stale slot is reset the
+    first time a newer minute lands in it. Events may arrive out of order; anything
+    older than the ring is dropped. Reads touch a fixed number of slots.
+    """
+
+    def __init__(self, kinds: Tuple[str, ...]):
+        self.kinds = kinds
+        self.minutes: List[int] = [-1] * SLOTS
+        self.counts: List[List[int]] = [[0] * len(kinds) for _ in range(SLOTS)]
+
+    def record(self, kind: str, minute: int, now: int, delta: int = 1):
+        if minute <= now - SLOTS or minute > now:
+            return
+        slot = minute % SLOTS
+        if self.minutes[slot] != minute:
+            if self.minutes[slot] > minute:
+                return
+            self.minutes[slot] = minute
+            self.counts[slot] = [0] * len(self.kinds)
+        self.counts[slot][self.kinds.index(kind)] += delta
+
+    def total(self, since: int) -> List[int]:
+        totals = [0] * len(self.kinds)
+        for minute, counts in zip(self.minutes, self.counts):
+            if minute >= since:
+                for i, count in enumerate(counts):
+                    totals[i] += count
+        return totals
+
+    def buckets(self, now: int, size: int, count: int) -> List[Dict[str, Any]]:
+        first = (now // size - count + 1) * size
+        result = [[0] * len(self.kinds) for _ in range(count)]
+        for minute, counts in zip(self.minutes, self.counts):
+            if minute >= first:
+                bucket = result[(minute - first) // size]
+                for i, value in enumerate(counts):
+                    bucket[i] += value
+        return [
+            {"start": datetime.fromtimestamp((first + i * size) * 60).isoformat(), **dict(zip(self.kinds, bucket))}
+            for i, bucket in enumerate(result)
+        ]
+
+
+def _minute(value: Optional[datetime] = None) -> int:
+    return int((value.timestamp() if value else time.time()) // 60)
+
+
+class JobStats:
+    """Aggregate job counters kept current from store events.
+
+    Counts by pipeline x status x type are adjusted on every create, status change
+    and delete, and the totals by status and by type are kept alongside them, so a
+    read never looks at individual jobs. Creations and terminal transitions are also
+    counted per minute for the failure-rate windows and the histograms; those cover
+    the last 24 hours of activity seen by this process.
+    """
+
+    def __init__(self, jobs: JobRepository):
+        self.jobs = jobs
+        # pipeline id -> (status, type) -> count
+        self.counts: Dict[str, Dict[Tuple[str, str], int]] = defaultdict(lambda: defaultdict(int))
+        self.by_status: Dict[str, int] = defaultdict(int)
+        self.by_type: Dict[str, int] = defaultdict(int)
+        self.total = 0
+        self.activity = MinuteRing(("created", "completed", "failed"))
+
+    def start(self):
+        for (pipeline_id, status, job_type), count in self.jobs.counts().items():
+            self._adjust(pipeline_id, status, job_type, count)
+        self.jobs.subscribe(self.listener)
+
+    def stop(self):
+        self.jobs.unsubscribe(self.listener)
+
+    def _adjust(self, pipeline_id: str, status: str, job_type: str, delta: int):
+        cell = self.counts[pipeline_id]
+        cell[(status, job_type)] += delta
+        if not cell[(status, job_type)]:
+            del cell[(status, job_type)]
+            if not cell:
+                del self.counts[pipeline_id]
+        self.by_status[status] += delta
+        self.by_type[job_type] += delta
+        self.total += delta
+
+    def listener(self, event: str, item: Any, previous: Any = None):
+        if not isinstance(item, Job):
+            return
+
+        now = _minute()
+        if event == JOB_ADDED:
+            if previous is not None:
+                self._adjust(previous.pipeline_id, previous.status.value, previous.type.value, -1)
+            else:
+                self.activity.record("created", _minute(item.created_at), now)
+            self._adjust(item.pipeline_id, item.status.value, item.type.value, 1)
+
+        elif event == JOB_STATUS:
+            self._adjust(item.pipeline_id, previous.value, item.type.value, -1)
+            self._adjust(item.pipeline_id, item.status.value, item.type.value, 1)
+            if item.status.value in TERMINAL:
+                self.activity.record(item.status.value, _minute(item.updated_at), now)
+
+        elif event == JOB_REMOVED:
+            self._adjust(item.pipeline_id, item.status.value, item.type.value, -1)
+
+    # Reads
+
+    def failure_rates(self) -> Dict[str, Dict[str, Any]]:
+        now = _minute()
+        rates = {}
+        for name, minutes in FAILURE_WINDOWS.items():
+            _, completed, failed = self.activity.total(now - minutes + 1)
+            finished = completed + failed
+            rates[name] = {
+                "completed": completed,
+                "failed": failed,
+                "failure_rate": failed / finished if finished else 0.0,
+            }
+        return rates
+
+    def summary(self, histogram: str = "hour") -> Dict[str, Any]:
+        size, count = HISTOGRAMS[histogram]
+        by_status_type: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        pipelines: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for pipeline_id, cell in self.counts.items():
+            nested: Dict[str, Dict[str, int]] = defaultdict(dict)
+            for (status, job_type), n in cell.items():
+                nested[status][job_type] = n
+                by_status_type[status][job_type] += n
+            pipelines[pipeline_id] = nested
+
+        return {
+            "total": self.total,
+            "by_status": {status: n for status, n in self.by_status.items() if n},
+            "by_type": {job_type: n for job_type, n in self.by_type.items() if n},
+            "by_status_type": by_status_type,
+            "by_pipeline": pipelines,
+            "failure_rate": self.failure_rates(),
+            "histogram": {
+                "bucket_minutes": size,
+                "buckets": self.activity.buckets(_minute(), size, count),
+            },
+        }
+
+    def pipeline_summary(self, pipeline_id: str) -> Dict[str, Any]:
+        by_status: Dict[str, int] = defaultdict(int)
+        by_type: Dict[str, int] = defaultdict(int)
+        by_status_type: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for (status, job_type), n in self.counts.get(pipeline_id, {}).items():
+            by_status[status] += n
+            by_type[job_type] += n
+            by_status_type[status][job_type] = n
+        return {
+            "pipeline_id": pipeline_id,
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "by_type": by_type,
+            "by_status_type": by_status_type,
+        }
@@ -0,0 +1,815 @@
+import sys
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from enum import Enum
+from functools import partial
+from heapq import nlargest
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from server.models import Job, JobStatus, JobType, Pipeline, WaveForecastData
+from server.projection import MAX_EXPAND_DEPTH
+from server.search import Term, arg_terms, error_terms, search_terms
+
+# Jobs are ordered by (created_at, id) so that ties on the timestamp stay stable
+SortKey = Tuple[datetime, str]
+# A job as the trigger graph sees it: id, type, status, created_at, updated_at, trigger ids
+GraphNode = Tuple[str, JobType, JobStatus, datetime, datetime, Tuple[str, ...]]
+
+# Trigger levels built into a job read from a store unless the caller asks for fewer:
+# enough for the deepest expansion a client may request, plus the trigger ids at the
+# bottom level
+TRIGGER_DEPTH = MAX_EXPAND_DEPTH + 1
+
+# Compact job records (see JobRecord) store type and status as positions in these,
+# and timestamps as naive local microseconds since EPOCH
+JOB_TYPES: Tuple[JobType, ...] = tuple(JobType)
+JOB_STATUSES: Tuple[JobStatus, ...] = tuple(JobStatus)
+_TYPE_CODES = {job_type.value: code for code, job_type in enumerate(JOB_TYPES)}
+_STATUS_CODES = {status.value: code for code, status in enumerate(JOB_STATUSES)}
+
+EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# A step of a query's walk down the creation index (one set membership test) costs
+# about a quarter of sorting a candidate job by creation time
+WALK_STEPS_PER_JOB = 4
+
+# Strings in args up to this length are interned; longer ones are rarely repeated
+INTERN_MAX_LENGTH = 64
+
+# What Job.model_construct does, without its per-field bookkeeping
+_new_job = partial(object.__new__, Job)
+_set_attr = object.__setattr__
+_JOB_FIELDS = set(Job.model_fields)
+
+
+def _index_key(value) -> str:
+    # Enum members hash by name, so index on the raw value to allow lookups by query string
+    return value.value if isinstance(value, Enum) else value
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str and len(value) <= INTERN_MAX_LENGTH else value
+
+
+def to_micros(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return (value - EPOCH) // _MICROSECOND
+
+
+def from_micros(value: int) -> datetime:
+    return EPOCH + timedelta(0, 0, value)
+
+
+def sort_key(job: Job) -> SortKey:
+    return (job.created_at, job.id)
+
+
+# Mutation events, delivered to listeners as listener(event, item, previous)
+JOB_ADDED = "job_added"            # item: new Job, previous: the Job it replaced, if any
+JOB_REMOVED = "job_removed"        # item: removed Job
+JOB_STATUS = "job_status"          # item: Job, previous: its old JobStatus
+JOB_TRIGGERS = "job_triggers"      # item: Job whose triggers changed
+PIPELINE_ADDED = "pipeline_added"  # item: new Pipeline, previous: the Pipeline it replaced, if any
+
+Listener = Callable[[str, Any, Any], None]
+
+
+class Observable:
+    """Lets other subsystems react to every write without the API wiring each one"""
+
+    def __init__(self):
+        self.listeners: List[Listener] = []
+        # Bumped on every write, so any cached view of the store can be revalidated cheaply
+        self.version = 0
+
+    def subscribe(self, listener: Listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener):
+        self.listeners.remove(listener)
+
+    def _emit(self, event: str, item: Any, previous: Any = None):
+        self.version += 1
+        for listener in self.listeners:
+            listener(event, item, previous)
+
+
+class JobRepository(Observable, ABC):
+    """Storage interface for jobs.
+
+    The API only reads and writes jobs through these methods, so any backend that
+    implements them can be selected with ``DATABASE_URL``.
+    """
+
+    @abstractmethod
+    def get(self, job_id: str, default: Optional[Job] = None, depth: int = TRIGGER_DEPTH) -> Optional[Job]:
+        """The job, with its triggers attached down to ``depth`` levels"""
+
+    @abstractmethod
+    def __contains__(self, job_id: str) -> bool: ...
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    def values(self) -> Iterable[Job]: ...
+
+    @abstractmethod
+    def add(self, job: Job): ...
+
+    def add_many(self, jobs: List[Job]):
+        """Add jobs in order; a trigger must come before the jobs that depend on it"""
+        for job in jobs:
+            self.add(job)
+
+    @abstractmethod
+    def remove(self, job_id: str) -> Job: ...
+
+    @abstractmethod
+    def update_status(
+        self,
+        job: Job,
+        status: JobStatus,
+        error_message: Optional[str] = None,
+        wave_forecast_data: Optional[WaveForecastData] = None,
+        result_job_id: Optional[str] = None,
+    ): ...
+
+    def remove_many(self, job_ids: List[str]) -> List[Job]:
+        return [self.remove(job_id) for job_id in job_ids]
+
+    def update_status_many(
+        self,
+        jobs: List[Job],
+        status: JobStatus,
+        error_message: Optional[str] = None,
+        wave_forecast_data: Optional[WaveForecastData] = None,
+        result_job_id: Optional[str] = None,
+    ):
+        for job in jobs:
+            self.update_status(job, status, error_message, wave_forecast_data, result_job_id)
+
+    def transition_many(self, jobs: List[Job], expected: JobStatus, status: JobStatus) -> List[Job]:
+        """Move the jobs still in ``expected`` to ``status`` and return the ones that moved.
+
+        When several processes share a store they can race for the same job (two
+        claims, say); this check-and-set makes sure only one of them wins.
+        """
+        moved = [job for job in jobs if job.status == expected]
+        self.update_status_many(moved, status)
+        return moved
+
+    @abstractmethod
+    def set_triggers(self, job: Job, triggers: List[Job]): ...
+
+    @abstractmethod
+    def get_dependents(self, job_id: str, depth: int = TRIGGER_DEPTH) -> List[Job]: ...
+
+    @abstractmethod
+    def query(
+        self,
+        type: Optional[str] = None,
+        status: Optional[str] = None,
+        pipeline_id: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        before: Optional[SortKey] = None,
+        limit: Optional[int] = None,
+        args: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        depth: int = TRIGGER_DEPTH,
+    ) -> List[Job]:
+        """Return matching jobs, newest first.
+
+        ``args`` matches jobs with each of those arg values and ``error`` jobs whose
+        error message has every word of it; see server.search. ``depth`` is as for
+        ``get``: callers that serialize less of the trigger graph can load less of it.
+        """
+
+    def counts(self) -> Dict[Tuple[str, str, str], int]:
+        """Number of jobs per (pipeline id, status, type)"""
+        counts: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        for job in self.values():
+            counts[(job.pipeline_id, job.status.value, job.type.value)] += 1
+        return counts
+
+    def graph_nodes(self, pipeline_id: str) -> List[GraphNode]:
+        """Every job of a pipeline with its trigger ids, for building the trigger graph"""
+        return [
+            (job.id, job.type, job.status, job.created_at, job.updated_at, tuple(t.id for t in job.triggers))
+            for job in self.query(pipeline_id=pipeline_id)
+        ]
+
+    def __getitem__(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        return job
+
+    def __iter__(self) -> Iterator[str]:
+        return (job.id for job in self.values())
+
+    def __setitem__(self, job_id: str, job: Job):
+        if job_id != job.id:
+            raise ValueError(f"Job id {job.id} does not match key {job_id}")
+        self.add(job)
+
+    def flush(self):
+        """Make pending writes durable; a no-op for in-memory storage"""
+
+    def close(self):
+        self.flush()
+
+    # Sharing the store between processes
+
+    def exclusive(self):
+        """Keep other processes from writing while startup state is loaded.
+
+        Changes made before this point are never replayed by ``sync``. A no-op for
+        storage only this process can see.
+        """
+        return nullcontext()
+
+    def sync(self) -> int:
+        """Replay changes other processes made to the store; returns how many"""
+        return 0
+
+    def lease_table(self):
+        """Lease storage shared by every process, or None to keep leases in memory"""
+        return None
+
+
+class PipelineRepository(Observable, ABC):
+    """Storage interface for pipelines"""
+
+    @abstractmethod
+    def get(self, pipeline_id: str, default: Optional[Pipeline] = None) -> Optional[Pipeline]: ...
+
+    @abstractmethod
+    def __contains__(self, pipeline_id: str) -> bool: ...
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    def values(self) -> Iterable[Pipeline]: ...
+
+    @abstractmethod
+    def add(self, pipeline: Pipeline): ...
+
+    def __getitem__(self, pipeline_id: str) -> Pipeline:
+        pipeline = self.get(pipeline_id)
+        if pipeline is None:
+            raise KeyError(pipeline_id)
+        return pipeline
+
+    def __iter__(self) -> Iterator[str]:
+        return (pipeline.id for pipeline in self.values())
+
+    def __setitem__(self, pipeline_id: str, pipeline: Pipeline):
+        if pipeline_id != pipeline.id:
+            raise ValueError(f"Pipeline id {pipeline.id} does not match key {pipeline_id}")
+        self.add(pipeline)
+
+
+class PipelineStore(PipelineRepository):
+    """In-memory pipeline storage"""
+
+    def __init__(self):
+        super().__init__()
+        self.pipelines: Dict[str, Pipeline] = {}
+
+    def get(self, pipeline_id: str, default: Optional[Pipeline] = None) -> Optional[Pipeline]:
+        return self.pipelines.get(pipeline_id, default)
+
+    def __contains__(self, pipeline_id: str) -> bool:
+        return pipeline_id in self.pipelines
+
+    def __getitem__(self, pipeline_id: str) -> Pipeline:
+        return self.pipelines[pipeline_id]
+
+    def __len__(self) -> int:
+        return len(self.pipelines)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.pipelines)
+
+    def values(self):
+        return self.pipelines.values()
+
+    def add(self, pipeline: Pipeline):
+        previous = self.pipelines.get(pipeline.id)
+        if previous is not None:
+            pipeline.version = max(pipeline.version, previous.version + 1)
+        self.pipelines[pipeline.id] = pipeline
+        self._emit(PIPELINE_ADDED, pipeline, previous)
+
+
+class JobRecord:
+    """A stored job in compact form.
+
+    Kept as pydantic models, stored jobs spend most of their memory on per-object
+    dicts, datetimes and repeated strings. A record keeps the same data in fixed
+    slots instead: type and status as small integer codes, timestamps as integer
+    microseconds, triggers as a tuple of ids, and args split into a key tuple shared
+    by every job with the same keys plus a tuple of values. Pipeline ids, error
+    messages, arg keys and short arg values are interned, so a value repeated across
+    jobs is stored once.
+    """
+
+    __slots__ = (
+        "id", "pipeline_id", "type", "status", "error_message", "created", "updated",
+        "arg_keys", "arg_values", "forecast", "result_job_id", "version", "triggers",
+    )
+
+
+class JobStore(JobRepository):
+    """In-memory job storage with secondary indexes kept up to date on every write.
+
+    Jobs are held as ``JobRecord`` objects and every read builds fresh ``Job`` models
+    from them, with triggers down to the requested depth (``TRIGGER_DEPTH`` unless
+    told otherwise), the same as the SQLite store. Changing a returned job therefore
+    changes nothing stored: all writes must go through ``add``, ``remove``,
+    ``update_status`` or ``set_triggers``.
+    """
+
+    def __init__(self, pipelines: Optional[PipelineRepository] = None):
+        super().__init__()
+        # Materialized jobs carry their pipeline from here
+        self.pipelines = pipelines
+        self.jobs: Dict[str, JobRecord] = {}
+        self.by_type: Dict[str, Set[str]] = defaultdict(set)
+        self.by_status: Dict[str, Set[str]] = defaultdict(set)
+        self.by_pipeline: Dict[str, Set[str]] = defaultdict(set)
+        # Sorted ascending by (created microseconds, id); date ranges are found by bisection
+        self.by_created: List[Tuple[int, str]] = []
+        # Reverse trigger adjacency: trigger job id -> ids of jobs it triggers
+        self.dependents: Dict[str, Set[str]] = defaultdict(set)
+        # Search terms (arg values and error message words) -> ids of jobs that have them
+        self.by_term: Dict[Term, Set[str]] = defaultdict(set)
+        # One canonical tuple per distinct set of arg keys
+        self.arg_keys: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    # Dict-style read access
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self.jobs
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.jobs)
+
+    def get(self, job_id: str, default: Optional[Job] = None, depth: int = TRIGGER_DEPTH) -> Optional[Job]:
+        if job_id not in self.jobs:
+            return default
+        return self._load([job_id], depth)[job_id]
+
+    def values(self) -> Iterator[Job]:
+        for job_id in list(self.jobs):
+            job = self.get(job_id)
+            if job is not None:
+                yield job
+
+    def records(self) -> List[JobRecord]:
+        """Every stored record, for bulk readers such as snapshots that need no models"""
+        return list(self.jobs.values())
+
+    def counts(self) -> Dict[Tuple[str, str, str], int]:
+        counts: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        for record in self.jobs.values():
+            counts[(record.pipeline_id, JOB_STATUSES[record.status].value, JOB_TYPES[record.type].value)] += 1
+        return counts
+
+    def graph_nodes(self, pipeline_id: str) -> List[GraphNode]:
+        # Straight from the records; building models would load every trigger graph too
+        nodes = []
+        for job_id in self.by_pipeline.get(pipeline_id, ()):
+            record = self.jobs[job_id]
+            nodes.append((
+                record.id,
+                JOB_TYPES[record.type],
+                JOB_STATUSES[record.status],
+                from_micros(record.created),
+                from_micros(record.updated),
+                record.triggers,
+            ))
+        return nodes
+
+    # Compact form
+
+    def _pack(self, job: Job, trigger_ids: Iterable[str]) -> JobRecord:
+        record = JobRecord()
+        record.id = job.id
+        record.pipeline_id = sys.intern(job.pipeline_id)
+        record.type = _TYPE_CODES[_index_key(job.type)]
+        record.status = _STATUS_CODES[_index_key(job.status)]
+        record.error_message = _intern(job.error_message)
+        record.created = to_micros(job.created_at)
+        updated = to_micros(job.updated_at)
+        record.updated = record.created if updated == record.created else updated
+        record.arg_keys, record.arg_values = self._pack_args(job.args)
+        record.forecast = job.wave_forecast_data
+        record.result_job_id = job.result_job_id
+        record.version = job.version
+        record.triggers = self._pack_triggers(trigger_ids)
+        return record
+
+    def _pack_args(self, args: Dict[str, Any]) -> Tuple[Tuple[str, ...], Tuple[Any, ...]]:
+        if not args:
+            return (), ()
+        keys = tuple(args)
+        shared = self.arg_keys.get(keys)
+        if shared is None:
+            shared = self.arg_keys[keys] = tuple(sys.intern(key) for key in keys)
+        return shared, tuple(_intern(value) for value in args.values())
+
+    def _pack_triggers(self, trigger_ids: Iterable[str]) -> Tuple[str, ...]:
+        # Reuse the stored id strings rather than keeping another copy of each
+        return tuple(self.jobs[t].id if t in self.jobs else t for t in trigger_ids)
+
+    def _job(self, record: JobRecord) -> Job:
+        created_at = from_micros(record.created)
+        # Every value was validated when the job was stored; validating it again on
+        # each read would cost more than the rest of building the model
+        job = _new_job()
+        _set_attr(job, "__dict__", {
+            "id": record.id,
+            "pipeline_id": record.pipeline_id,
+            "type": JOB_TYPES[record.type],
+            "status": JOB_STATUSES[record.status],
+            "error_message": record.error_message,
+            "created_at": created_at,
+            "updated_at": created_at if record.updated == record.created else from_micros(record.updated),
+            "args": dict(zip(record.arg_keys, record.arg_values)),
+            "wave_forecast_data": record.forecast,
+            "result_job_id": record.result_job_id,
+            "version": record.version,
+            "triggers": [],
+            "pipeline": self.pipelines.get(record.pipeline_id) if self.pipelines is not None else None,
+        })
+        _set_attr(job, "__pydantic_fields_set__", _JOB_FIELDS.copy())
+        _set_attr(job, "__pydantic_extra__", None)
+        _set_attr(job, "__pydantic_private__", None)
+        return job
+
+    def _load(self, job_ids: Iterable[str], depth: int = TRIGGER_DEPTH) -> Dict[str, Job]:
+        """Build Job objects for ``job_ids`` with their trigger graph attached down to ``depth``"""
+        records: Dict[str, JobRecord] = {}
+        levels: Dict[str, int] = {}
+
+        # Breadth-first so each job is assigned the shallowest level it appears at
+        frontier = list(job_ids)
+        for level in range(depth + 1):
+            next_frontier = []
+            for job_id in frontier:
+                if job_id in records:
+                    continue
+                record = self.jobs.get(job_id)
+                if record is None:
+                    continue
+                records[job_id] = record
+                levels[job_id] = level
+                next_frontier.extend(record.triggers)
+            frontier = next_frontier
+            if not frontier:
+                break
+
+        jobs = {job_id: self._job(record) for job_id, record in records.items()}
+
+        # Attach triggers once every object exists, so shared triggers stay shared
+        for job_id, record in records.items():
+            if record.triggers and levels[job_id] < depth:
+                jobs[job_id].triggers = [jobs[t] for t in record.triggers if t in jobs]
+
+        return jobs
+
+    # Writes
+
+    def add(self, job: Job):
+        replaced = None
+        previous = self.jobs.get(job.id)
+        if previous is not None:
+            replaced = self._load([job.id], depth=1)[job.id]
+            self._unindex(previous)
+            job.version = max(job.version, previous.version + 1)
+
+        record = self._pack(job, (trigger.id for trigger in job.triggers))
+        self._index(record)
+        insort(self.by_created, (record.created, record.id))
+
+        self._emit(JOB_ADDED, job, replaced)
+
+    def bulk_load(self, jobs: Iterable[Tuple[Job, List[str]]]):
+        """Add (job, trigger ids) pairs to an empty store, sorting the creation index a single time.
+
+        Jobs may come in any order; trigger ids that never turn up are dropped. Used
+        when restoring state; listeners are not notified.
+        """
+        if self.jobs:
+            raise ValueError("bulk_load requires an empty store")
+        linked = []
+        for job, trigger_ids in jobs:
+            record = self._pack(job, ())
+            record.triggers = tuple(trigger_ids)
+            self.jobs[record.id] = record
+            self.by_created.append((record.created, record.id))
+            if record.triggers:
+                linked.append(record)
+        for record in linked:
+            record.triggers = self._pack_triggers(t for t in record.triggers if t in self.jobs)
+        for record in self.jobs.values():
+            self._index(record)
+        self.by_created.sort()
+
+    def remove(self, job_id: str) -> Job:
+        return self.remove_many([job_id])[0]
+
+    def remove_many(self, job_ids: List[str]) -> List[Job]:
+        missing = [job_id for job_id in job_ids if job_id not in self.jobs]
+        if missing:
+            raise KeyError(missing[0])
+        # Removal events carry the jobs as they were, so build them before anything changes
+        loaded = self._load(job_ids, depth=1)
+        removed = [loaded[job_id] for job_id in job_ids]
+        removed_ids = set(job_ids)
+
+        records = [self.jobs.pop(job_id) for job_id in removed_ids]
+        for record in records:
+            self._unindex(record, created=False)
+        # Rebuild the creation index in one pass rather than one deletion per job
+        if len(records) == 1:
+            self._unindex_created(records[0])
+        else:
+            self.by_created = [key for key in self.by_created if key[1] not in removed_ids]
+
+        for job in removed:
+            self._emit(JOB_REMOVED, job)
+
+        # Only the surviving jobs that depend on removed ones need their triggers rewritten
+        affected: Set[str] = set()
+        for job_id in removed_ids:
+            affected.update(self.dependents.pop(job_id, ()))
+        for dependent_id in affected - removed_ids:
+            record = self.jobs[dependent_id]
+            record.triggers = tuple(t for t in record.triggers if t not in removed_ids)
+            record.version += 1
+            self._emit(JOB_TRIGGERS, self._load([dependent_id], depth=1)[dependent_id])
+
+        return removed
+
+    def set_triggers(self, job: Job, triggers: List[Job]):
+        job.triggers = triggers
+        job.updated_at = datetime.now()
+
+        record = self.jobs.get(job.id)
+        if record is None:
+            job.version += 1
+        else:
+            for trigger_id in record.triggers:
+                self._discard(self.dependents, trigger_id, job.id)
+            record.triggers = self._pack_triggers(trigger.id for trigger in triggers)
+            record.updated = to_micros(job.updated_at)
+            record.version += 1
+            job.version = record.version
+            for trigger_id in record.triggers:
+                self.dependents[trigger_id].add(job.id)
+
+        self._emit(JOB_TRIGGERS, job)
+
+    def restore(self, job_id: str, updated_at: datetime, version: int):
+        """Set a job's update time and version as recorded elsewhere, e.g. in a journal being replayed"""
+        record = self.jobs.get(job_id)
+        if record is not None:
+            record.updated = to_micros(updated_at)
+            record.version = version
+
+    def _index(self, record: JobRecord):
+        self.jobs[record.id] = record
+        self.by_type[JOB_TYPES[record.type].value].add(record.id)
+        self.by_status[JOB_STATUSES[record.status].value].add(record.id)
+        self.by_pipeline[record.pipeline_id].add(record.id)
+        for trigger_id in record.triggers:
+            self.dependents[trigger_id].add(record.id)
+        for term in self._terms(record):
+            self.by_term[term].add(record.id)
+
+    def _unindex(self, record: JobRecord, created: bool = True):
+        self._discard(self.by_type, JOB_TYPES[record.type].value, record.id)
+        self._discard(self.by_status, JOB_STATUSES[record.status].value, record.id)
+        self._discard(self.by_pipeline, record.pipeline_id, record.id)
+        for trigger_id in record.triggers:
+            self._discard(self.dependents, trigger_id, record.id)
+        for term in self._terms(record):
+            self._discard(self.by_term, term, record.id)
+        if created:
+            self._unindex_created(record)
+
+    def _unindex_created(self, record: JobRecord):
+        key = (record.created, record.id)
+        pos = bisect_left(self.by_created, key)
+        if pos < len(self.by_created) and self.by_created[pos] == key:
+            del self.by_created[pos]
+
+    def update_status(
+        self,
+        job: Job,
+        status: JobStatus,
+        error_message: Optional[str] = None,
+        wave_forecast_data: Optional[WaveForecastData] = None,
+        result_job_id: Optional[str] = None,
+    ):
+        record = self.jobs.get(job.id)
+        previous = JOB_STATUSES[record.status] if record is not None else job.status
+
+        job.status = status
+        job.error_message = error_message
+        if wave_forecast_data is not None:
+            job.wave_forecast_data = wave_forecast_data
+        job.result_job_id = result_job_id
+        job.updated_at = datetime.now()
+
+        if record is not None:
+            self._discard(self.by_status, previous.value, job.id)
+            for term in error_terms(record.error_message):
+                self._discard(self.by_term, term, job.id)
+            record.status = _STATUS_CODES[_index_key(status)]
+            record.error_message = _intern(error_message)
+            for term in error_terms(error_message):
+                self.by_term[term].add(job.id)
+            if wave_forecast_data is not None:
+                record.forecast = wave_forecast_data
+            record.result_job_id = result_job_id
+            record.updated = to_micros(job.updated_at)
+            record.version += 1
+            job.version = record.version
+            self.by_status[status.value].add(job.id)
+        else:
+            job.version += 1
+
+        self._emit(JOB_STATUS, job, previous)
+
+    def transition_many(self, jobs: List[Job], expected: JobStatus, status: JobStatus) -> List[Job]:
+        # Check the stored status, not the caller's copy, which may be out of date
+        code = _STATUS_CODES[_index_key(expected)]
+        moved = [job for job in jobs if job.id in self.jobs and self.jobs[job.id].status == code]
+        self.update_status_many(moved, status)
+        return moved
+
+    @staticmethod
+    def _terms(record: JobRecord) -> Iterator[Term]:
+        yield from arg_terms(dict(zip(record.arg_keys, record.arg_values)))
+        yield from error_terms(record.error_message)
+
+    @staticmethod
+    def _discard(index: Dict[Any, Set[str]], key: Any, job_id: str):
+        ids = index.get(key)
+        if ids is None:
+            return
+        ids.discard(job_id)
+        if not ids:
+            del index[key]
+
+    # Queries
+
+    def get_dependents(self, job_id: str, depth: int = TRIGGER_DEPTH) -> List[Job]:
+        """Return the jobs that list ``job_id`` as a trigger, newest first"""
+        records = [self.jobs[dependent_id] for dependent_id in self.dependents.get(job_id, ())]
+        records.sort(key=lambda record: (record.created, record.id), reverse=True)
+        loaded = self._load((record.id for record in records), depth)
+        return [loaded[record.id] for record in records]
+
+    def query(
+        self,
+        type: Optional[str] = None,
+        status: Optional[str] = None,
+        pipeline_id: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        before: Optional[SortKey] = None,
+        limit: Optional[int] = None,
+        args: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        depth: int = TRIGGER_DEPTH,
+    ) -> List[Job]:
+        """Return matching jobs sorted by creation date, newest first.
+
+        ``before`` is an exclusive (created_at, id) keyset cursor and ``limit`` caps the
+        page size. ``args`` and ``error`` search the term index (see server.search).
+        Cost is proportional to the smaller of the narrowest index set and the date
+        range, never to the total number of stored jobs or the page depth.
+        """
+        lo = 0
+        hi = len(self.by_created)
+        if date_from is not None:
+            lo = bisect_left(self.by_created, to_micros(date_from), key=lambda k: k[0])
+        if date_to is not None:
+            hi = bisect_right(self.by_created, to_micros(date_to), key=lambda k: k[0])
+        if before is not None:
+            hi = min(hi, bisect_left(self.by_created, (to_micros(before[0]), before[1])))
+        if lo >= hi or limit == 0:
+            return []
+
+        filters = []
+        for index, value in (
+            (self.by_type, type),
+            (self.by_status, status),
+            (self.by_pipeline, pipeline_id),
+        ):
+            if value:
+                ids = index.get(_index_key(value))
+                if not ids:
+                    return []
+                filters.append(ids)
+        for term in search_terms(args, error):
+            ids = self.by_term.get(term)
+            if not ids:
+                return []
+            filters.append(ids)
+        filters.sort(key=len)
+
+        matches: List[str] = []
+        if not filters:
+            self._walk(matches, [], hi - 1, lo, limit)
+            return self._page(matches, depth)
+
+        # Walk the date range backwards when the filters are expected to fill the page
+        # within as many steps as the narrowest index set has ids (assuming they match
+        # independently of each other and of age)
+        pos = hi - 1
+        smallest = filters[0]
+        if limit is not None:
+            matching = len(self.by_created)
+            for ids in filters:
+                matching *= len(ids) / len(self.by_created)
+            if limit * len(self.by_created) / max(matching, 1) <= len(smallest):
+                pos = self._walk(matches, filters, pos, max(lo, pos + 1 - len(smallest)), limit)
+        if pos < lo or len(matches) == limit:
+            return self._page(matches, depth)
+
+        # Otherwise intersect the index sets, then walk on with one membership test per
+        # step while that is expected to beat sorting what is left
+        candidates = smallest.intersection(*filters[1:]) if len(filters) > 1 else smallest
+        if limit is not None and candidates:
+            budget = WALK_STEPS_PER_JOB * len(candidates)
+            if (limit - len(matches)) * (pos + 1 - lo) / len(candidates) <= budget:
+                pos = self._walk(matches, [candidates], pos, max(lo, pos + 1 - budget), limit)
+            if pos < lo or len(matches) == limit:
+                return self._page(matches, depth)
+
+        jobs = self.jobs
+        keys = [(jobs[job_id].created, job_id) for job_id in candidates]
+        if lo > 0 or pos < len(self.by_created) - 1:
+            low_key, high_key = self.by_created[lo], self.by_created[pos]
+            keys = [key for key in keys if low_key <= key <= high_key]
+        if limit is not None:
+            keys = nlargest(limit - len(matches), keys)
+        else:
+            keys.sort(reverse=True)
+        matches.extend(job_id for _, job_id in keys)
+        return self._page(matches, depth)
+
+    def _walk(self, matches: List[str], filters: List[Set[str]], pos: int, stop: int, limit: Optional[int]) -> int:
+        """Collect ids in every filter from ``pos`` down to ``stop`` in creation order, newest
+        first, until ``limit`` are matched; returns the position reached"""
+        # The narrowest set rejects the most ids, so test it before the rest
+        first, rest = (filters[0], filters[1:]) if filters else (None, [])
+        by_created = self.by_created
+        while pos >= stop:
+            job_id = by_created[pos][1]
+            if (first is None or job_id in first) and (not rest or all(job_id in ids for ids in rest)):
+                matches.append(job_id)
+                if limit is not None and len(matches) >= limit:
+                    return pos - 1
+            pos -= 1
+        return pos
+
+    def _page(self, job_ids: List[str], depth: int) -> List[Job]:
+        loaded = self._load(job_ids, depth)
+        return [loaded[job_id] for job_id in job_ids]
+
+
+def open_store(database_url: Optional[str] = None, shared: bool = False) -> Tuple[JobRepository, PipelineRepository]:
+    """Create the job and pipeline repositories selected by ``database_url``.
+
+    ``None`` or ``memory://`` keeps everything in process memory;
+    ``sqlite:///path/to/file.db`` uses the durable SQLite backend. ``shared`` is
+    for several processes serving one store, which only SQLite supports.
+    """
+    if not database_url or database_url == "memory://":
+        if shared:
+            raise ValueError("The in-memory store cannot be shared between processes; use a sqlite:/// DATABASE_URL")
+        pipelines = PipelineStore()
+        return JobStore(pipelines), pipelines
+
+    if database_url.startswith("sqlite://"):
+        from server.sqlite_store import open_sqlite_store
+        return open_sqlite_store(database_url, shared)
+
+    raise ValueError(f"Unsupported DATABASE_URL: {database_url}")
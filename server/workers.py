@@ -0,0 +1,174 @@
+import asyncio
+import heapq
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from server.models import Job, JobStatus, JobType, WaveForecastData
+from server.scheduler import ReadyQueue
+from server.store import JOB_REMOVED, JOB_STATUS, JobRepository
+
+
+class LeaseError(Exception):
+    """The worker does not (or no longer) hold a lease on the job"""
+
+
+class Lease:
+    def __init__(self, job_id: str, worker_id: str, expires_at: float):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.expires_at = expires_at
+
+
+class LeaseTable:
+    """Leases held in process memory, with their expiry times in a heap.
+
+    Each check-and-change is a single method so a shared implementation
+    (``SqliteLeaseTable``) can make it atomic across processes.
+    """
+
+    def __init__(self):
+        self.leases: Dict[str, Lease] = {}
+        # (expires_at, job_id); superseded entries are skipped when they surface
+        self.expiry: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.leases)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self.leases
+
+    def _held(self, job_id: str, worker_id: str, now: float) -> bool:
+        lease = self.leases.get(job_id)
+        return lease is not None and lease.worker_id == worker_id and lease.expires_at > now
+
+    def put_many(self, leases: List[Lease]):
+        for lease in leases:
+            self.leases[lease.job_id] = lease
+            heapq.heappush(self.expiry, (lease.expires_at, lease.job_id))
+
+    def extend(self, job_id: str, worker_id: str, expires_at: float, now: float) -> bool:
+        """Move the lease's expiry if ``worker_id`` still holds it"""
+        if not self._held(job_id, worker_id, now):
+            return False
+        self.put_many([Lease(job_id, worker_id, expires_at)])
+        return True
+
+    def take(self, job_id: str, worker_id: str, now: float) -> bool:
+        """Release the lease if ``worker_id`` still holds it"""
+        if not self._held(job_id, worker_id, now):
+            return False
+        del self.leases[job_id]
+        return True
+
+    def discard(self, job_id: str):
+        self.leases.pop(job_id, None)
+
+    def expire(self, now: float) -> List[str]:
+        """Drop every lease that has run out and return their job ids"""
+        expired = []
+        while self.expiry and self.expiry[0][0] <= now:
+            expires_at, job_id = heapq.heappop(self.expiry)
+            lease = self.leases.get(job_id)
+            if lease is None or lease.expires_at != expires_at:
+                continue
+            del self.leases[job_id]
+            expired.append(job_id)
+        return expired
+
+
+class LeaseManager:
+    """Hands pending jobs to remote workers under time-limited leases.
+
+    ``claim`` takes ready jobs straight from the shared ``ReadyQueue`` and moves them to
+    PROCESSING, so it costs O(batch) however many jobs are stored. The move is a
+    check-and-set on the store, so even when several processes serve one store and
+    pop the same job from their own ready queues, only one claim gets it.
+
+    Workers keep their leases alive with ``heartbeat`` and finish with ``complete`` or
+    ``fail``. The reaper returns jobs whose lease ran out to PENDING, which puts them
+    back on the ready queue. Leases live in a ``LeaseTable`` (in memory, or shared
+    through the store when several processes serve it), which only ever looks at the
+    leases that have actually expired.
+    """
+
+    def __init__(self, jobs: JobRepository, ready: ReadyQueue, leases: Optional[LeaseTable] = None):
+        self.jobs = jobs
+        self.ready = ready
+        self.leases = leases if leases is not None else LeaseTable()
+
+    def start(self):
+        self.jobs.subscribe(self.listener)
+
+    def stop(self):
+        self.jobs.unsubscribe(self.listener)
+
+    def listener(self, event: str, item: Any, previous: Any = None):
+        if not isinstance(item, Job):
+            return
+        # Cancelled or deleted behind the worker's back: the lease is void
+        if event == JOB_REMOVED or (event == JOB_STATUS and item.status != JobStatus.PROCESSING):
+            if item.id in self.leases:
+                self.leases.discard(item.id)
+
+    def _take(self, job_id: str, worker_id: str) -> Job:
+        job = self.jobs.get(job_id) if self.leases.take(job_id, worker_id, time.time()) else None
+        if job is None or job.status != JobStatus.PROCESSING:
+            raise LeaseError(f"Worker {worker_id} holds no lease on job {job_id}")
+        return job
+
+    def _pop(self, types: List[JobType], count: int) -> List[Job]:
+        popped = []
+        for job_type in types:
+            while len(popped) < count:
+                job = self.ready.pop(job_type)
+                if job is None:
+                    break
+                popped.append(job)
+            if len(popped) >= count:
+                break
+        return popped
+
+    def claim(self, worker_id: str, types: List[JobType], max_jobs: int, seconds: float) -> List[Job]:
+        claimed: List[Job] = []
+        while len(claimed) < max_jobs:
+            candidates = self._pop(types, max_jobs - len(claimed))
+            if not candidates:
+                break
+            # Jobs another process claimed first are simply skipped
+            claimed.extend(self.jobs.transition_many(candidates, JobStatus.PENDING, JobStatus.PROCESSING))
+
+        expires_at = time.time() + seconds
+        self.leases.put_many([Lease(job.id, worker_id, expires_at) for job in claimed])
+        return claimed
+
+    def heartbeat(self, worker_id: str, job_ids: List[str], seconds: float) -> Tuple[List[str], List[str]]:
+        """Extend the worker's leases; returns (extended, lost) job ids"""
+        extended, lost = [], []
+        now = time.time()
+        for job_id in job_ids:
+            if self.leases.extend(job_id, worker_id, now + seconds, now):
+                extended.append(job_id)
+            else:
+                lost.append(job_id)
+        return extended, lost
+
+    def complete(self, worker_id: str, job_id: str, wave_forecast_data: Optional[WaveForecastData] = None) -> Job:
+        job = self._take(job_id, worker_id)
+        self.jobs.update_status(job, JobStatus.COMPLETED, wave_forecast_data=wave_forecast_data)
+        return job
+
+    def fail(self, worker_id: str, job_id: str, error_message: str) -> Job:
+        job = self._take(job_id, worker_id)
+        self.jobs.update_status(job, JobStatus.FAILED, error_message)
+        return job
+
+    def reap(self) -> int:
+        """Return every job whose lease has expired to PENDING"""
+        expired = [self.jobs.get(job_id) for job_id in self.leases.expire(time.time())]
+        expired = [job for job in expired if job is not None]
+        return len(self.jobs.transition_many(expired, JobStatus.PROCESSING, JobStatus.PENDING))
+
+    async def run_reaper(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.reap()